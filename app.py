@@ -1,13 +1,21 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import pickle
-import joblib
+import os
+import time
 import warnings
-from datetime import datetime
+from datetime import date, datetime
 from ui import load_custom_ui  
-import time
-import numpy_financial as npf
+from attribution import decision_drivers, has_attributions
+from history import history_from_env
+from irr import solve_irr
+from model_loader import ModelStore
+from portfolio import (MAX_YEARS, PERIODS_PER_YEAR, annualize_rate, discount_factors, payback_periods, period_rate,
+                       to_periods)
+from result_cache import analysis_key, cache_from_env
+from simulation import (PERCENTILES, cash_flow_bands, has_tree_predictions, percentile_summary, simulate,
+                        tree_predictions)
+from sensitivity import decision_frame, sweep
+from timing import tracer_from_env
 
 
 # Suppress warnings
@@ -21,55 +29,83 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Load UI
-load_custom_ui()
+# Stage timing spans, shared by all sessions; off unless TIMING_SPANS=1 or enabled under Diagnostics
+@st.cache_resource
+def get_tracer():
+    return tracer_from_env()
+
+tracer = get_tracer()
 
 # --- Load Models ---
+# Models load on a background thread started by the first run, so the page renders without
+# waiting for scikit-learn and the pickles; the first analysis waits only if it is still
+# running. The served set is the model registry's CURRENT version (MODELS_DIR/versions,
+# see registry.py) or else the flat MODELS_DIR, e.g. the output of distill.py. Versions
+# published while the app runs are loaded, canaried and swapped in by the same thread,
+# checked every MODEL_RELOAD_INTERVAL seconds (default 30, 0 = only from Diagnostics).
+# Exported array directories (*.forest) are memory-mapped and shared across processes.
+MODELS_DIR = os.environ.get('MODELS_DIR', 'models')
+
 @st.cache_resource
-def load_models():
-    try:
-        with open('models/cash_flow_regressor.pkl', 'rb') as file:
-            regressor_model = pickle.load(file)
-        classifier_model = joblib.load('models/decision_classifier.pkl')
-        return regressor_model, classifier_model
-    except FileNotFoundError as e:
-        st.error(f"Model file not found: {e}")
-        st.error("Please ensure 'cash_flow_regressor.pkl' and 'decision_classifier.pkl' are in the same directory.")
-        return None, None
-    except Exception as e:
-        st.error(f"Error loading models: {e}")
-        return None, None
+def get_model_store():
+    return ModelStore(MODELS_DIR, os.path.join(MODELS_DIR, 'versions'), tracer,
+                      float(os.environ.get('MODEL_RELOAD_INTERVAL', 30)),
+                      float(os.environ.get('MODEL_CANARY_MIN_AGREEMENT', 0.8))).start()
+
+model_store = get_model_store()
+
+def get_models():
+    """The served LoadedModels, waiting for the background load if needed.
+
+    Each run takes the set once, so a swap mid-run does not mix model versions.
+    """
+    if not model_store.ready:
+        with st.spinner("Loading models..."):
+            model_store.get()
+    models = model_store.get()
+    for message in models.errors:
+        st.error(message)
+    for message in models.warnings:
+        st.warning(message)
+    return models
+
+# Load UI
+with tracer.span('load_custom_ui'):
+    load_custom_ui()
+
+# Process-wide LRU cache of full analysis results, shared by all sessions
+@st.cache_resource
+def get_analysis_cache():
+    return cache_from_env()
 
-regressor_model, classifier_model = load_models()
+analysis_cache = get_analysis_cache()
+
+# Every analysis is appended to a SQLite history (HISTORY_DB, default analysis_history.sqlite3,
+# empty to turn it off) by a background writer, so recording never waits on the disk
+@st.cache_resource
+def get_history():
+    return history_from_env()
+
+history = get_history()
 
 # --- Financial Metrics Function ---
-def calculate_financial_metrics(initial_cost, discount_rate, cash_flows):
-    """Calculate NPV, IRR, PI, and Payback Period with error handling"""
+def calculate_financial_metrics(initial_cost, discount_rate, cash_flows, periods_per_year=1):
+    """Calculate NPV, IRR, PI, and Payback Period with error handling
+
+    `cash_flows` has one value per period (periods_per_year to a year); the discount
+    rate and the returned IRR are annual and the payback period is in years.
+    """
     try:
-        cash_flows = np.array(cash_flows)
-        npv = np.sum(cash_flows / (1 + discount_rate/100) ** np.arange(1, len(cash_flows) + 1)) - abs(initial_cost)
-        try:
-            all_cash_flows = np.concatenate([[initial_cost], cash_flows])
-            irr = npf.irr(all_cash_flows) * 100
-        except:
-            irr = (np.sum(cash_flows) / abs(initial_cost) - 1) * 100 / len(cash_flows)
-        pi = (npv + abs(initial_cost)) / abs(initial_cost) if initial_cost != 0 else 0
-
-        cumulative_cf = 0
-        payback_period = None
-        for i, cf in enumerate(cash_flows, 1):
-            cumulative_cf += cf
-            if cumulative_cf >= abs(initial_cost):
-                if i > 1:
-                    prev_cumulative = cumulative_cf - cf
-                    remaining = abs(initial_cost) - prev_cumulative
-                    fraction = remaining / cf if cf != 0 else 0
-                    payback_period = i - 1 + fraction
-                else:
-                    payback_period = i
-                break
-        if payback_period is None:
-            payback_period = len(cash_flows)
+        cash_flows = np.array(cash_flows, dtype=float)
+        cost = abs(initial_cost)
+        npv = cash_flows @ discount_factors(discount_rate, len(cash_flows), periods_per_year) - cost
+        # IRR is NaN when the cash flows have no root (e.g. they never cover the cost)
+        period_irr = solve_irr(np.concatenate([[initial_cost], cash_flows]), guess=period_rate(0.1, periods_per_year)).rate[0]
+        irr = annualize_rate(period_irr, periods_per_year) * 100
+        pi = (npv + cost) / cost if initial_cost != 0 else 0
+        # First period whose cumulative inflow covers the cost, interpolated within it
+        payback = payback_periods(cash_flows[None, :], np.array([cost]), np.array([len(cash_flows)]))[0]
+        payback_period = payback / periods_per_year
         return npv, irr, pi, payback_period
     except Exception as e:
         st.error(f"Error calculating financial metrics: {e}")
@@ -100,10 +136,17 @@ with st.sidebar:
     duration_years = st.slider(
         "Project Duration (Years)", 
         min_value=1, 
-        max_value=10, 
+        max_value=MAX_YEARS, 
         value=5, 
         help="Expected duration of the project in years"
     )
+    period_label = st.radio(
+        "Cash Flow Periods",
+        options=list(PERIODS_PER_YEAR),
+        horizontal=True,
+        help="Discount, chart and compute payback on yearly or monthly cash flows (each year's prediction spread evenly over its months)"
+    )
+    periods_per_year = PERIODS_PER_YEAR[period_label]
     
     st.markdown('<div class="section-header">⚠️ Risk Assessment</div>', unsafe_allow_html=True)
 
@@ -123,6 +166,29 @@ with st.sidebar:
         index=0
     )
 
+    st.markdown('<div class="section-header">🎲 Simulation</div>', unsafe_allow_html=True)
+
+    monte_carlo = st.checkbox(
+        "Monte Carlo mode",
+        value=False,
+        help="Sample yearly cash flows from the regressor's individual trees and show metric distributions"
+    )
+    if monte_carlo:
+        mc_max_paths = st.select_slider(
+            "Max Simulated Paths",
+            options=[1000, 5000, 10000, 20000, 50000],
+            value=20000,
+            help="Upper bound on paths; sampling stops earlier once the NPV percentiles settle"
+        )
+        mc_rate_std = st.number_input(
+            "Discount Rate Std Dev (%)",
+            min_value=0.0,
+            max_value=10.0,
+            value=0.0,
+            step=0.1,
+            help="Draw each path's discount rate from a normal distribution around the chosen rate (0 = fixed)"
+        )
+
 # --- Main Content Area ---
 # Welcome/Info Box
 st.markdown("""
@@ -134,58 +200,115 @@ st.markdown("""
 
 # --- Main Analysis ---
 if st.sidebar.button("🔍 Analyze Investment", type="primary"):
-    if regressor_model is None or classifier_model is None:
+    models = get_models()
+    regressor_model, classifier_model = models.regressor_model, models.classifier_model
+    cash_flow_table = models.cash_flow_table
+    import pandas as pd
+    if (regressor_model is None and cash_flow_table is None) or classifier_model is None:
         st.error("Models could not be loaded. Please check the model files and try again.")
     else:
-        # Show loading spinner
-        with st.spinner("Analyzing investment opportunity..."):
-            # Simulate processing time for better UX
-            time.sleep(1.5)
-            
-            try:
-                years = list(range(1, duration_years + 1))
-                prediction_data = pd.DataFrame({
-                    'Year': years,
-                    'Risk_Rating': [risk_rating] * duration_years,
-                    'Project_Type': [project_type] * duration_years,
-                    'Market_Condition': [market_condition] * duration_years
-                })
-                prediction_data = prediction_data.astype(str)
-
-                predicted_cash_flows = regressor_model.predict(prediction_data)
-                predicted_cash_flows = np.maximum(predicted_cash_flows, 0)
-
-                npv, irr, pi, payback_period = calculate_financial_metrics(initial_cost, discount_rate, predicted_cash_flows)
-                total_inflows = np.sum(predicted_cash_flows)
-                avg_cash_flow = np.mean(predicted_cash_flows)
-                cf_volatility = np.std(predicted_cash_flows)
-
-                classifier_data = pd.DataFrame({
-                    'Initial_Cost': [initial_cost],
-                    'Discount_Rate_%': [discount_rate],
-                    'Risk_Rating': [risk_rating],
-                    'Project_Type': [project_type],
-                    'Market_Condition': [market_condition],
-                    'Duration_Years': [duration_years],
-                    'Total_Cash_Inflows': [total_inflows],
-                    'Avg_Cash_Flow': [avg_cash_flow],
-                    'CF_Volatility': [cf_volatility]
-                }).astype(str)
-
-                decision = classifier_model.predict(classifier_data)[0]
-                decision_proba = classifier_model.predict_proba(classifier_data)[0]
-                confidence = max(decision_proba) * 100
-
-                st.markdown('<h2 class="sub-header">📊 Analysis Results</h2>', unsafe_allow_html=True)
-                decision_color = "positive" if decision == "accept" else "negative"
-                st.markdown(f"""
+        # Each section gets its own placeholder and is filled as soon as its inputs are ready:
+        # decision first, then the metric cards, then the chart and insights
+        st.markdown('<h2 class="sub-header">📊 Analysis Results</h2>', unsafe_allow_html=True)
+        decision_slot = st.empty()
+        metrics_slot = st.empty()
+        chart_slot = st.empty()
+        insights_slot = st.empty()
+        drivers_slot = st.empty()
+        simulation_slot = st.empty()
+
+        # Repeated scenarios are served from the cache without touching the models
+        analysis_start = time.perf_counter()
+        stage_times = {}
+        years = list(range(1, duration_years + 1))
+        cache_key = analysis_key(models.version, initial_cost, discount_rate, duration_years,
+                                 risk_rating, project_type, market_condition, periods_per_year)
+        with tracer.span('analyze.cache_lookup', stage_times):
+            analysis = analysis_cache.get(cache_key)
+
+        try:
+            if analysis is not None:
+                predicted_cash_flows = analysis['predicted_cash_flows']
+                decision, confidence = analysis['decision'], analysis['confidence']
+            else:
+                with decision_slot, st.spinner("Analyzing investment opportunity..."):
+                    if cash_flow_table is not None and cash_flow_table.covers(duration_years):
+                        with tracer.span('analyze.cash_flow_table', stage_times):
+                            predicted_cash_flows = cash_flow_table.lookup(risk_rating, project_type, market_condition, duration_years)
+                    else:
+                        # Plain mappings: the loaded models encode them without building DataFrames
+                        prediction_data = {
+                            'Year': years,
+                            'Risk_Rating': risk_rating,
+                            'Project_Type': project_type,
+                            'Market_Condition': market_condition
+                        }
+                        with tracer.span('analyze.regressor_predict', stage_times):
+                            predicted_cash_flows = regressor_model.predict(prediction_data)
+                    predicted_cash_flows = np.maximum(predicted_cash_flows, 0)
+
+                    with tracer.span('analyze.frame_building', stage_times):
+                        total_inflows = np.sum(predicted_cash_flows)
+                        avg_cash_flow = np.mean(predicted_cash_flows)
+                        cf_volatility = np.std(predicted_cash_flows)
+
+                        classifier_data = {
+                            'Initial_Cost': initial_cost,
+                            'Discount_Rate_%': discount_rate,
+                            'Risk_Rating': risk_rating,
+                            'Project_Type': project_type,
+                            'Market_Condition': market_condition,
+                            'Duration_Years': duration_years,
+                            'Total_Cash_Inflows': total_inflows,
+                            'Avg_Cash_Flow': avg_cash_flow,
+                            'CF_Volatility': cf_volatility
+                        }
+
+                    with tracer.span('analyze.classifier_predict', stage_times):
+                        decision_proba = classifier_model.predict_proba(classifier_data)[0]
+                    decision = classifier_model.classes_[np.argmax(decision_proba)]
+                    confidence = max(decision_proba) * 100
+
+            decision_color = "positive" if decision == "accept" else "negative"
+            with tracer.span('analyze.render_decision', stage_times):
+                decision_slot.markdown(f"""
                 <div class="result-box">
                     <h3>Investment Decision: <span class="{decision_color}">{decision.upper()}</span></h3>
                     <p>Confidence: {confidence:.1f}%</p>
                 </div>
                 """, unsafe_allow_html=True)
 
-                # Metrics in columns
+            # Yearly predictions spread over the chosen periods; the rest of the analysis works per period
+            period_cash_flows = to_periods(predicted_cash_flows, periods_per_year)
+            period_name = 'Year' if periods_per_year == 1 else 'Month'
+            periods = np.arange(1, len(period_cash_flows) + 1)
+
+            # Metrics in columns
+            if analysis is not None:
+                npv, irr, pi, payback_period = analysis['metrics']
+                drivers = analysis['drivers']
+            else:
+                with tracer.span('analyze.financial_metrics', stage_times):
+                    npv, irr, pi, payback_period = calculate_financial_metrics(initial_cost, discount_rate,
+                                                                               period_cash_flows, periods_per_year)
+                # Which inputs moved P(accept) and the cash flows, from the forests' tree paths
+                drivers = None
+                if has_attributions(classifier_model):
+                    with tracer.span('analyze.attributions', stage_times):
+                        drivers = decision_drivers(classifier_model, classifier_data, regressor_model, {
+                            'Year': years,
+                            'Risk_Rating': risk_rating,
+                            'Project_Type': project_type,
+                            'Market_Condition': market_condition
+                        } if regressor_model is not None else None)
+                analysis_cache.put(cache_key, {
+                    'predicted_cash_flows': predicted_cash_flows,
+                    'decision': decision,
+                    'confidence': confidence,
+                    'metrics': (npv, irr, pi, payback_period),
+                    'drivers': drivers,
+                })
+            with tracer.span('analyze.render_metrics', stage_times), metrics_slot.container():
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
                     npv_color = "positive" if npv > 0 else "negative"
@@ -197,10 +320,11 @@ if st.sidebar.button("🔍 Analyze Investment", type="primary"):
                     """, unsafe_allow_html=True)
                 with col2:
                     irr_color = "positive" if irr > discount_rate else "negative"
+                    irr_text = f"{irr:.2f}%" if np.isfinite(irr) else "N/A"
                     st.markdown(f"""
                     <div class="metric-card">
                         <h4>Internal Rate of Return</h4>
-                        <p class="{irr_color}">{irr:.2f}%</p>
+                        <p class="{irr_color}">{irr_text}</p>
                     </div>
                     """, unsafe_allow_html=True)
                 with col3:
@@ -220,51 +344,69 @@ if st.sidebar.button("🔍 Analyze Investment", type="primary"):
                     </div>
                     """, unsafe_allow_html=True)
 
-                # Cash Flow Visualization
+            # Cash Flow Visualization
+            with tracer.span('analyze.render_chart', stage_times), chart_slot.container():
                 st.markdown('<h2 class="sub-header">📈 Predicted Cash Flows</h2>', unsafe_allow_html=True)
+                if duration_years > 10:
+                    st.caption("The models were trained on projects of up to 10 years; later years are extrapolated.")
                 cf_df = pd.DataFrame({
-                    'Year': years,
-                    'Predicted Cash Flow': predicted_cash_flows,
-                    'Cumulative Cash Flow': np.cumsum(predicted_cash_flows)
+                    period_name: periods,
+                    'Predicted Cash Flow': period_cash_flows,
+                    'Cumulative Cash Flow': np.cumsum(period_cash_flows)
                 })
-                st.line_chart(cf_df.set_index('Year'))
+                st.line_chart(cf_df.set_index(period_name))
 
-                # Cash Flow Details in Expander
+                # Cash Flow Details in Expander; long horizons get a scrollable table
                 with st.expander("View Cash Flow Details"):
                     cf_table = pd.DataFrame({
-                        'Year': years,
-                        'Cash Flow': [f"${cf:,.2f}" for cf in predicted_cash_flows],
-                        'Cumulative': [f"${cf:,.2f}" for cf in np.cumsum(predicted_cash_flows)]
+                        period_name: periods,
+                        'Cash Flow': [f"${cf:,.2f}" for cf in period_cash_flows],
+                        'Cumulative': [f"${cf:,.2f}" for cf in np.cumsum(period_cash_flows)]
                     })
-                    st.table(cf_table)
+                    if len(cf_table) <= 20:
+                        st.table(cf_table)
+                    else:
+                        st.dataframe(cf_table.set_index(period_name))
 
-                # Investment Insights
+            # Investment Insights
+            insights = []
+            if npv > 0:
+                insights.append("✅ Positive NPV indicates the project is expected to generate value")
+            else:
+                insights.append("❌ Negative NPV suggests the project may not be profitable")
+            if not np.isfinite(irr):
+                insights.append("❌ IRR is undefined for these cash flows (NPV never crosses zero)")
+            elif irr > discount_rate:
+                insights.append("✅ IRR exceeds the discount rate, indicating good return potential")
+            else:
+                insights.append("❌ IRR is below the discount rate, consider alternative investments")
+            if pi > 1:
+                insights.append("✅ PI > 1 means the project creates value for each dollar invested")
+            else:
+                insights.append("❌ PI < 1 indicates the project destroys value")
+            if payback_period <= duration_years * 0.5:
+                insights.append("✅ Quick payback period reduces investment risk")
+            elif payback_period <= duration_years:
+                insights.append("⚠️ Moderate payback period")
+            else:
+                insights.append("❌ Payback period exceeds project duration")
+            if risk_rating == "High":
+                insights.append("⚠️ High risk project requires careful consideration")
+            elif risk_rating == "Low":
+                insights.append("✅ Low risk project with stable returns expected")
+            if drivers is not None:
+                toward_accept = max(drivers.accept, key=drivers.accept.get)
+                toward_reject = min(drivers.accept, key=drivers.accept.get)
+                if drivers.accept[toward_accept] > 0:
+                    insights.append(f"🔎 {toward_accept.replace('_', ' ')} pushed hardest toward accept "
+                                    f"({drivers.accept[toward_accept]:+.1f} pp)")
+                if drivers.accept[toward_reject] < 0:
+                    insights.append(f"🔎 {toward_reject.replace('_', ' ')} pushed hardest toward reject "
+                                    f"({drivers.accept[toward_reject]:+.1f} pp)")
+
+            # Display insights in columns
+            with tracer.span('analyze.render_insights', stage_times), insights_slot.container():
                 st.markdown('<h2 class="sub-header">💡 Investment Insights</h2>', unsafe_allow_html=True)
-                insights = []
-                if npv > 0:
-                    insights.append("✅ Positive NPV indicates the project is expected to generate value")
-                else:
-                    insights.append("❌ Negative NPV suggests the project may not be profitable")
-                if irr > discount_rate:
-                    insights.append("✅ IRR exceeds the discount rate, indicating good return potential")
-                else:
-                    insights.append("❌ IRR is below the discount rate, consider alternative investments")
-                if pi > 1:
-                    insights.append("✅ PI > 1 means the project creates value for each dollar invested")
-                else:
-                    insights.append("❌ PI < 1 indicates the project destroys value")
-                if payback_period <= duration_years * 0.5:
-                    insights.append("✅ Quick payback period reduces investment risk")
-                elif payback_period <= duration_years:
-                    insights.append("⚠️ Moderate payback period")
-                else:
-                    insights.append("❌ Payback period exceeds project duration")
-                if risk_rating == "High":
-                    insights.append("⚠️ High risk project requires careful consideration")
-                elif risk_rating == "Low":
-                    insights.append("✅ Low risk project with stable returns expected")
-                
-                # Display insights in columns
                 col1, col2 = st.columns(2)
                 with col1:
                     for i, insight in enumerate(insights[:len(insights)//2]):
@@ -272,10 +414,248 @@ if st.sidebar.button("🔍 Analyze Investment", type="primary"):
                 with col2:
                     for i, insight in enumerate(insights[len(insights)//2:]):
                         st.markdown(f"<p>{insight}</p>", unsafe_allow_html=True)
-                        
+
+            # Decision Drivers
+            if drivers is not None:
+                with tracer.span('analyze.render_drivers', stage_times), drivers_slot.container():
+                    st.markdown('<h2 class="sub-header">🔎 Decision Drivers</h2>', unsafe_allow_html=True)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.bar_chart(pd.DataFrame({'Change in P(accept) (pp)': drivers.accept}).sort_values(
+                            'Change in P(accept) (pp)'), horizontal=True)
+                        st.caption(f"P(accept) starts at {drivers.accept_base:.1f}% before any split and ends at "
+                                   f"{drivers.accept_base + sum(drivers.accept.values()):.1f}%")
+                    if drivers.cash_flow is not None:
+                        with col2:
+                            st.bar_chart(pd.DataFrame({'Change in total cash inflows ($)': drivers.cash_flow}).sort_values(
+                                'Change in total cash inflows ($)'), horizontal=True)
+                            st.caption(f"Total predicted inflows start at ${drivers.cash_flow_base:,.0f} "
+                                       f"before any split (yearly predictions summed, before clipping at 0)")
+
+            # Monte Carlo Distribution
+            if monte_carlo:
+                with tracer.span('analyze.monte_carlo', stage_times), simulation_slot.container():
+                    st.markdown('<h2 class="sub-header">🎲 Monte Carlo Distribution</h2>', unsafe_allow_html=True)
+                    if regressor_model is None:
+                        st.info("Monte Carlo mode needs the cash flow regressor model.")
+                    elif not has_tree_predictions(regressor_model):
+                        st.info("Monte Carlo mode needs a random forest cash flow regressor.")
+                    else:
+                        with st.spinner("Simulating cash flow paths..."):
+                            tree_cash_flows = tree_predictions(regressor_model, {
+                                'Year': years,
+                                'Risk_Rating': risk_rating,
+                                'Project_Type': project_type,
+                                'Market_Condition': market_condition
+                            })
+                            simulation = simulate(tree_cash_flows, initial_cost, discount_rate, mc_max_paths, mc_rate_std,
+                                                  periods_per_year=periods_per_year)
+                        stop_reason = "percentiles converged" if simulation.converged else "path limit reached"
+                        st.caption(f"{simulation.n_paths:,} paths ({stop_reason}) · "
+                                   f"P(NPV > 0) = {np.mean(simulation.npv > 0):.0%} · "
+                                   f"IRR undefined on {np.mean(~np.isfinite(simulation.irr)):.0%} of paths")
+
+                        summary = percentile_summary(simulation)
+                        formats = {"NPV": "${:,.0f}", "IRR (%)": "{:.2f}%", "PI": "{:.3f}", "Payback (years)": "{:.1f}"}
+                        st.table(pd.DataFrame(
+                            {f"P{p}": [formats[name].format(values[i]) for name, values in summary.items()]
+                             for i, p in enumerate(PERCENTILES)},
+                            index=list(summary)
+                        ))
+
+                        _, cumulative_bands = cash_flow_bands(simulation)
+                        st.line_chart(pd.DataFrame({
+                            f'Cumulative P{p}': cumulative_bands[i] for i, p in enumerate(PERCENTILES) if p in (5, 50, 95)
+                        }, index=pd.Index(years, name='Year')))
+
+            analysis_seconds = time.perf_counter() - analysis_start
+            tracer.record('analyze.total', analysis_seconds)
+            if history is not None:
+                history.record({
+                    'initial_cost': initial_cost, 'discount_rate': discount_rate, 'duration_years': duration_years,
+                    'risk_rating': risk_rating, 'project_type': project_type, 'market_condition': market_condition,
+                    'periods_per_year': periods_per_year,
+                    'cash_flows': predicted_cash_flows, 'npv': npv, 'irr': irr, 'pi': pi,
+                    'payback_period': payback_period, 'decision': decision, 'confidence': confidence,
+                    'model_version': models.version, 'cached': analysis is not None,
+                    'analysis_ms': analysis_seconds * 1000,
+                    'timings': {name.split('.', 1)[1]: round(seconds * 1000, 3) for name, seconds in stage_times.items()},
+                })
+        except Exception as e:
+            st.error(f"An error occurred during analysis: {e}")
+            st.error("Please check your input values and try again.")
+
+# --- Sensitivity Sweep ---
+with st.expander("🧭 Sensitivity Sweep"):
+    st.caption(f"Decision over a grid of discount rates, initial costs and 1-{MAX_YEARS} year durations for a "
+               f"{risk_rating} risk {project_type} project in a {market_condition} market.")
+    col1, col2, col3 = st.columns(3)
+    sweep_rates = col1.slider("Discount Rate Range (%)", 0.0, 50.0, (0.0, 30.0), step=0.5)
+    sweep_costs = col2.slider("Initial Cost Range ($)", -1000000, 0, (-500000, 0), step=10000)
+    sweep_points = col3.select_slider("Grid Points per Axis", options=[50, 100, 200], value=200)
+
+    if st.button("Run Sweep"):
+        models = get_models()
+        regressor_model, classifier_model = models.regressor_model, models.classifier_model
+        if regressor_model is None or classifier_model is None:
+            st.info("The sensitivity sweep needs both models.")
+        else:
+            try:
+                with st.spinner("Scoring the grid..."):
+                    sweep_start = datetime.now()
+                    sweep_result = sweep(regressor_model, classifier_model, risk_rating, project_type,
+                                         market_condition, np.linspace(*sweep_rates, sweep_points),
+                                         np.linspace(*sweep_costs, sweep_points), range(1, MAX_YEARS + 1),
+                                         models.cash_flow_table)
+                    sweep_seconds = (datetime.now() - sweep_start).total_seconds()
+                    tracer.record('sensitivity_sweep', sweep_seconds)
+                st.session_state['sensitivity_sweep'] = (f"{risk_rating} risk {project_type}, {market_condition} market, "
+                                                         f"model version {models.version}",
+                                                         sweep_result, sweep_seconds)
             except Exception as e:
-                st.error(f"An error occurred during analysis: {e}")
-                st.error("Please check your input values and try again.")
+                st.error(f"An error occurred during the sweep: {e}")
+
+    if 'sensitivity_sweep' in st.session_state:
+        sweep_profile, sweep_result, sweep_seconds = st.session_state['sensitivity_sweep']
+        # The sidebar duration may have changed since the sweep; show the nearest swept one
+        first, last = int(sweep_result.durations[0]), int(sweep_result.durations[-1])
+        sweep_duration = st.slider("Duration Shown (Years)", first, last, min(max(duration_years, first), last))
+        frame = decision_frame(sweep_result, sweep_duration)
+        # Cell edges, so each grid point is drawn as a rectangle
+        rate_half = np.diff(sweep_result.discount_rates).mean() / 2 if len(sweep_result.discount_rates) > 1 else 0.5
+        cost_half = np.diff(sweep_result.initial_costs).mean() / 2 if len(sweep_result.initial_costs) > 1 else 500
+        frame['Rate_Low'], frame['Rate_High'] = frame['Discount_Rate_%'] - rate_half, frame['Discount_Rate_%'] + rate_half
+        frame['Cost_Low'], frame['Cost_High'] = frame['Initial_Cost'] - cost_half, frame['Initial_Cost'] + cost_half
+
+        # NPV = 0 where the discount rate equals the IRR
+        i = list(sweep_result.durations).index(sweep_duration)
+        irr = sweep_result.irr[i]
+        in_range = np.isfinite(irr) & (irr >= sweep_result.discount_rates[0]) & (irr <= sweep_result.discount_rates[-1])
+        break_even = [{'Discount_Rate_%': float(rate), 'Initial_Cost': float(cost)}
+                      for rate, cost in zip(irr[in_range], sweep_result.initial_costs[in_range])]
+
+        st.vega_lite_chart(frame, {
+            'layer': [
+                {
+                    'mark': 'rect',
+                    'encoding': {
+                        'x': {'field': 'Rate_Low', 'type': 'quantitative', 'title': 'Discount Rate (%)'},
+                        'x2': {'field': 'Rate_High'},
+                        'y': {'field': 'Cost_Low', 'type': 'quantitative', 'title': 'Initial Cost ($)'},
+                        'y2': {'field': 'Cost_High'},
+                        'color': {'field': 'Accept_Probability', 'type': 'quantitative', 'title': 'P(accept)',
+                                  'scale': {'scheme': 'redyellowgreen', 'domain': [0, 1], 'domainMid': 0.5}},
+                        'tooltip': [
+                            {'field': 'Discount_Rate_%', 'type': 'quantitative', 'format': '.2f'},
+                            {'field': 'Initial_Cost', 'type': 'quantitative', 'format': ',.0f'},
+                            {'field': 'Accept_Probability', 'type': 'quantitative', 'format': '.1%'},
+                            {'field': 'Decision', 'type': 'nominal'},
+                            {'field': 'NPV', 'type': 'quantitative', 'format': ',.0f'},
+                        ],
+                    },
+                },
+                {
+                    'data': {'values': break_even},
+                    'mark': {'type': 'line', 'color': 'black', 'strokeDash': [4, 3]},
+                    'encoding': {
+                        'x': {'field': 'Discount_Rate_%', 'type': 'quantitative'},
+                        'y': {'field': 'Initial_Cost', 'type': 'quantitative'},
+                        'order': {'field': 'Initial_Cost'},
+                    },
+                },
+            ],
+        })
+        n_points = sweep_result.proba.shape[0] * sweep_result.proba.shape[1] * sweep_result.proba.shape[2]
+        st.caption(f"{sweep_profile}: {n_points:,} grid points scored in {sweep_seconds:.2f} s · "
+                   f"{(frame['Decision'] == 'accept').mean():.0%} accepted at {sweep_duration} years · "
+                   f"dashed line: NPV = 0")
+
+# --- Analysis History ---
+with st.expander("🗂️ Analysis History"):
+    if history is None:
+        st.caption("History is off (HISTORY_DB is empty).")
+    # Queried only on request: expander bodies run on every rerun, and the tables need pandas
+    elif st.checkbox("Show past analyses", value=False):
+        import pandas as pd
+        from pipeline import CATEGORY_OPTIONS
+
+        col1, col2, col3, col4 = st.columns(4)
+        history_filters = {
+            'project_types': col1.multiselect("Project Type", CATEGORY_OPTIONS['Project_Type']),
+            'risk_ratings': col2.multiselect("Risk Rating", CATEGORY_OPTIONS['Risk_Rating']),
+            'decisions': col3.multiselect("Decision", ["accept", "reject"]),
+        }
+        history_dates = col4.date_input("Dates", value=(), max_value=date.today())
+        if len(history_dates) == 2:
+            history_filters['start'], history_filters['end'] = history_dates
+        group_by = st.selectbox("Group By", ["decision", "project_type", "risk_rating", "market_condition", "day"])
+
+        query_start = time.perf_counter()
+        overall = history.aggregate(history_filters)[0]
+        groups = history.aggregate(history_filters, [group_by])
+        latest = history.recent(history_filters, limit=100)
+        query_ms = (time.perf_counter() - query_start) * 1000
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Analyses", f"{overall['analyses'] or 0:,}")
+        col2.metric("Accepted", f"{overall['accept_share']:.0%}" if overall['analyses'] else "-")
+        col3.metric("Average NPV", f"${overall['avg_npv']:,.0f}" if overall['analyses'] else "-")
+        col4.metric("Average Confidence", f"{overall['avg_confidence']:.1f}%" if overall['analyses'] else "-")
+        if groups:
+            st.dataframe(pd.DataFrame(groups).set_index(group_by).style.format({
+                'accept_share': '{:.0%}', 'avg_npv': '${:,.0f}', 'avg_pi': '{:.3f}', 'avg_irr': '{:.2f}%',
+                'avg_confidence': '{:.1f}%', 'avg_analysis_ms': '{:.1f}'}, na_rep='N/A'))
+        if latest:
+            latest_frame = pd.DataFrame(latest)
+            latest_frame['created'] = pd.to_datetime(latest_frame['created'], unit='s')
+            st.dataframe(latest_frame.drop(columns=['day']).set_index('id'))
+        if history.last_error:
+            st.warning(f"Last history write failed: {history.last_error}")
+        st.caption(f"{history.path}: {history.written:,} analyses written by this process · "
+                   f"queries took {query_ms:.1f} ms · the latest 100 matches are listed")
+
+# --- Diagnostics ---
+with st.expander("🛠️ Diagnostics"):
+    cache_stats = analysis_cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cache Hits", cache_stats['hits'])
+    col2.metric("Cache Misses", cache_stats['misses'])
+    col3.metric("Evictions", cache_stats['evictions'] + cache_stats['expirations'])
+    col4.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+    ttl_text = f"{cache_stats['ttl_s']:.0f} s TTL" if cache_stats['ttl_s'] else "no TTL"
+    st.caption(f"Result cache: {cache_stats['size']}/{cache_stats['maxsize']} entries, {ttl_text} "
+               f"({cache_stats['expirations']} expired), keyed by model version")
+
+    # Served model version and hot-reload history
+    if model_store.ready:
+        served = model_store.get()
+        st.caption(f"Model version {served.version}, loaded in {served.seconds:.2f} s on a background thread · "
+                   f"registry {model_store.registry_dir}, last checked {model_store.last_check or 'never'}")
+    else:
+        st.caption("Models are still loading on a background thread")
+    if st.button("Check for New Model Version"):
+        model_store.request_reload()
+        st.caption("Checking the registry; a new version is swapped in after its canary passes.")
+    for at, message in reversed(model_store.events[-5:]):
+        st.caption(f"{at} · {message}")
+
+    # Stage timings over the recent spans of every session
+    tracer.enabled = st.checkbox("Record stage timings", value=tracer.enabled,
+                                 help="Time each Analyze stage, model loading and UI setup (all sessions)")
+    timing_summary = tracer.summary()
+    if timing_summary:
+        import pandas as pd
+        st.dataframe(pd.DataFrame.from_dict(timing_summary, orient='index').rename(columns={
+            'count': 'Spans', 'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)', 'last_ms': 'Last (ms)'
+        }).sort_index().style.format({'p50 (ms)': '{:.2f}', 'p95 (ms)': '{:.2f}', 'Last (ms)': '{:.2f}'}))
+        col1, col2 = st.columns(2)
+        col1.download_button("Export Spans (JSONL)", tracer.to_jsonl(), file_name="timing_spans.jsonl",
+                             mime="application/jsonl")
+        if col2.button("Clear Spans"):
+            tracer.clear()
+            st.rerun()
+    elif tracer.enabled:
+        st.caption(f"No spans recorded yet; the last {tracer.spans.maxlen:,} are kept.")
 
 # --- Enhanced Footer ---
 st.markdown("---")
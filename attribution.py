@@ -0,0 +1,156 @@
+"""Per-input contributions to the forests' predictions, from their tree paths (Saabas' method).
+
+Walking a tree from root to leaf, each split moves the node value (mean target, or
+class probabilities) from the parent's to the child's; that change is credited to the
+split's feature. A tree's prediction is then its root value plus the sum of its
+credits, and the forest's is the mean over trees, so for every row
+
+    prediction = bias + contributions.sum(over inputs)
+
+exactly. One-hot columns are summed back into their categorical input, so the
+contributions are per raw input (e.g. 'Project_Type', 'Discount_Rate_%').
+
+All (tree, row) pairs of a chunk walk the flattened node arrays of a CompiledForest
+together, one level per step, and finished paths drop out, so there is no Python loop
+over trees or rows. Pickled random forests are flattened in memory on first use.
+
+    python attribution.py projects.csv attributions.csv
+"""
+import argparse
+import weakref
+from collections import namedtuple
+
+import numpy as np
+
+
+Attribution = namedtuple("Attribution", ["bias", "contributions", "inputs", "outputs"])
+Attribution.__doc__ = """Tree-path attributions of a batch.
+
+bias          -- (n_outputs,) mean root value of the trees, the prediction before any split
+contributions -- (n_rows x n_inputs x n_outputs) change of the prediction credited to each input
+inputs        -- raw input names, numeric then categorical (the model's column order)
+outputs       -- class names for a classifier, ['prediction'] for a regressor
+"""
+
+Drivers = namedtuple("Drivers", ["accept_base", "accept", "cash_flow_base", "cash_flow"])
+Drivers.__doc__ = """One analysis: P(accept) before any split and {input: change}, both in percentage points;
+total predicted cash inflow before any split and {input: change} in $ (None without a regressor forest)."""
+
+_COMPILED = weakref.WeakKeyDictionary()
+
+
+def has_attributions(model):
+    """Whether the model is a random/extra-trees forest whose paths can be decomposed."""
+    if hasattr(model, "leaf_values"):
+        return True
+    from sklearn.ensemble import (ExtraTreesClassifier, ExtraTreesRegressor, RandomForestClassifier,
+                                  RandomForestRegressor)
+    return isinstance(getattr(model, "estimator", None), (RandomForestClassifier, RandomForestRegressor,
+                                                          ExtraTreesClassifier, ExtraTreesRegressor))
+
+
+def tree_model(model):
+    """The CompiledForest behind a model: itself, or the EncodedPipeline's forest flattened once and kept."""
+    if hasattr(model, "leaf_values"):
+        return model
+    if not has_attributions(model):
+        raise TypeError("Attributions need a CompiledForest or an EncodedPipeline of a random forest")
+    forest = _COMPILED.get(model)
+    if forest is None:
+        from forest_runtime import compile_pipeline
+
+        forest = _COMPILED[model] = compile_pipeline(model.pipeline)
+    return forest
+
+
+def path_contributions(forest, features, chunk_size=2048):
+    """(n_rows x n_columns x n_outputs) credits per encoded column for a transformed feature matrix."""
+    n_rows, n_columns = features.shape
+    n_trees = forest.roots.size
+    n_outputs = forest.value.shape[1]
+    out = np.empty((n_rows, n_columns, n_outputs))
+    for start in range(0, n_rows, chunk_size):
+        block = np.asarray(features[start:start + chunk_size], dtype=forest.threshold.dtype)
+        flat = block.ravel()
+        size = block.shape[0]
+        totals = np.zeros((n_outputs, size * n_columns))
+        row_offsets = np.tile(np.arange(size, dtype=np.intp) * n_columns, n_trees)
+        node = np.repeat(forest.roots, size)
+        for _ in range(forest.max_depth):
+            cell = row_offsets + forest.feature[node]
+            child = forest.children[2 * node + (flat[cell] > forest.threshold[node])]
+            # Leaves point to themselves; only pairs still descending carry on
+            moving = child != node
+            if not moving.all():
+                cell, child, node, row_offsets = cell[moving], child[moving], node[moving], row_offsets[moving]
+            if node.size == 0:
+                break
+            delta = forest.value[child] - forest.value[node]
+            for k in range(n_outputs):
+                totals[k] += np.bincount(cell, weights=delta[:, k], minlength=totals.shape[1])
+            node = child
+        out[start:start + size] = totals.T.reshape(size, n_columns, n_outputs)
+    return out / n_trees
+
+
+def attribute(model, X, chunk_size=2048):
+    """Attribution of a forest model's predictions for raw inputs X (mapping or DataFrame)."""
+    forest = tree_model(model)
+    encoded = path_contributions(forest, forest.transform(X), chunk_size)
+    # Encoded columns: one per numeric feature, then one block of one-hot columns per categorical
+    sizes = [1] * len(forest.numeric_features) + [len(c) for c in forest.categories]
+    contributions = np.add.reduceat(encoded, np.concatenate([[0], np.cumsum(sizes)[:-1]]), axis=1)
+    outputs = [str(c) for c in forest.classes_] if forest.is_classifier else ['prediction']
+    return Attribution(forest.value[forest.roots].mean(axis=0), contributions,
+                       forest.numeric_features + forest.categorical_features, outputs)
+
+
+def decision_drivers(classifier_model, classifier_data, regressor_model=None, regressor_data=None):
+    """Drivers of one analysis: the classifier row's P(accept) and the regressor's yearly rows, summed."""
+    result = attribute(classifier_model, classifier_data)
+    accept = result.outputs.index('accept')
+    accept_changes = dict(zip(result.inputs, result.contributions[0, :, accept] * 100))
+    cash_flow_base = cash_flow_changes = None
+    if regressor_model is not None and regressor_data is not None and has_attributions(regressor_model):
+        cash_flows = attribute(regressor_model, regressor_data)
+        cash_flow_base = float(cash_flows.bias[0]) * cash_flows.contributions.shape[0]
+        cash_flow_changes = dict(zip(cash_flows.inputs, cash_flows.contributions[:, :, 0].sum(axis=0)))
+    return Drivers(float(result.bias[accept]) * 100, accept_changes, cash_flow_base, cash_flow_changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attribute each project's P(accept) to its inputs.")
+    parser.add_argument("input", help="CSV or Parquet file of projects (see score_batch.py)")
+    parser.add_argument("output", help="CSV or Parquet file of per-input contributions in percentage points")
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+
+    import pandas as pd
+    from forest_runtime import load_model
+    from pipeline import classifier_features, is_parquet, predict_cash_flows, validate_projects
+    from prediction_table import load_prediction_table
+
+    read = pd.read_parquet if is_parquet(args.input) else pd.read_csv
+    projects = read(args.input)
+    validate_projects(projects)
+    regressor_model = load_model('cash_flow_regressor', args.models_dir)
+    classifier_model = load_model('decision_classifier', args.models_dir)
+    cash_flow_table = load_prediction_table(f"{args.models_dir}/cash_flow_table.npz",
+                                            f"{args.models_dir}/cash_flow_regressor.pkl")
+
+    cash_flows = predict_cash_flows(regressor_model, projects, cash_flow_table)
+    result = attribute(classifier_model, classifier_features(projects, cash_flows))
+    accept = result.outputs.index('accept')
+    frame = pd.DataFrame(result.contributions[:, :, accept] * 100, index=projects.index,
+                         columns=[f"{name}_pp" for name in result.inputs])
+    frame.insert(0, 'Base_Accept_%', result.bias[accept] * 100)
+    frame['Accept_%'] = frame.sum(axis=1)
+    if is_parquet(args.output):
+        frame.to_parquet(args.output)
+    else:
+        frame.to_csv(args.output)
+    print(f"Wrote contributions to P(accept) for {len(frame):,} projects to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
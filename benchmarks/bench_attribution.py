@@ -0,0 +1,78 @@
+"""Tree-path attribution cost: a 10k-row batch per model and one app analysis.
+
+For each model, from its .forest export and from the pickle (flattened in memory on the
+first call, included in the first timing), attributes --rows random inputs and checks
+that bias + contributions reproduces the predictions. Then times decision_drivers as
+the app calls it after an analysis: one classifier row plus the regressor's yearly rows.
+
+Usage: python benchmarks/bench_attribution.py [--rows 10000] [--years 10] [--repeats 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from attribution import attribute, decision_drivers, tree_model  # noqa: E402
+from feature_encoder import encoded_pipeline  # noqa: E402
+from forest_runtime import load_forest, sample_inputs  # noqa: E402
+
+MODEL_NAMES = ("cash_flow_regressor", "decision_classifier")
+
+
+def batch(model, inputs):
+    start = time.perf_counter()
+    result = attribute(model, inputs)
+    seconds = time.perf_counter() - start
+    predicted = model.predict_proba(inputs) if result.outputs != ['prediction'] else model.predict(inputs)[:, None]
+    error = np.abs(result.bias + result.contributions.sum(axis=1) - predicted).max()
+    return seconds, float(error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--years", type=int, default=10, help="regressor rows of the single analysis")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    models = {}
+    print(f"Batch of {args.rows:,} rows")
+    for name in MODEL_NAMES:
+        forest_path = os.path.join(ROOT, args.models_dir, f"{name}.forest")
+        pickle_path = os.path.join(ROOT, args.models_dir, f"{name}.pkl")
+        kinds = []
+        if os.path.isdir(forest_path):
+            kinds.append((".forest", load_forest(forest_path)))
+        kinds.append(("pickle", encoded_pipeline(joblib.load(pickle_path))))
+        models[name] = kinds[0][1]
+        inputs = None
+        for kind, model in kinds:
+            if inputs is None:
+                inputs = sample_inputs(tree_model(model), args.rows)
+            seconds, error = batch(model, inputs)
+            print(f"  {name:<22} {kind:<8} {seconds:6.2f} s  ({args.rows / seconds:9,.0f} rows/s)  "
+                  f"max |bias + sum - prediction| {error:.1e}")
+
+    classifier_row = {'Initial_Cost': -100000.0, 'Discount_Rate_%': 10.0, 'Risk_Rating': 'Medium',
+                      'Project_Type': 'Retail', 'Market_Condition': 'Stable', 'Duration_Years': args.years,
+                      'Total_Cash_Inflows': 120000.0, 'Avg_Cash_Flow': 12000.0, 'CF_Volatility': 3000.0}
+    regressor_rows = {'Year': list(range(1, args.years + 1)), 'Risk_Rating': 'Medium', 'Project_Type': 'Retail',
+                      'Market_Condition': 'Stable'}
+    seconds = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        decision_drivers(models["decision_classifier"], classifier_row, models["cash_flow_regressor"], regressor_rows)
+        seconds.append(time.perf_counter() - start)
+    print(f"Single analysis ({args.years} regressor rows): median {np.median(seconds) * 1000:.2f} ms, "
+          f"p95 {np.percentile(seconds, 95) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Cold-start time-to-interactive of the app, each run in a fresh interpreter.
+
+Streamlit is imported before timing starts, as the server has it loaded before the
+first script run. Per run:
+  interactive -- first script run until the whole page, sidebar included, is rendered
+  first click -- an "Analyze Investment" click --think-time seconds after that, until
+                 its rerun finishes (it waits for models that are still loading)
+  ready       -- launch until the first analysis has finished
+
+Usage: python benchmarks/bench_cold_start.py [--app app.py] [--runs 5] [--think-time 0] [--pickles-only]
+To measure an older revision: git show <rev>:app.py > app_before.py, then --app app_before.py
+--pickles-only runs on a copy of the models without the .forest exports, as in a fresh clone.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import json, os, sys, time
+from streamlit.testing.v1 import AppTest
+os.chdir({root!r})
+sys.path.insert(0, {root!r})
+
+start = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=300).run()
+interactive = time.perf_counter() - start
+time.sleep({think_time!r})
+clicked = time.perf_counter()
+app.sidebar.button[0].click().run()
+end = time.perf_counter()
+decisions = [m.value for m in app.markdown if 'Investment Decision:' in m.value]
+print(json.dumps({{'interactive_s': interactive, 'first_click_s': end - clicked, 'ready_s': end - start,
+                  'errors': [e.value for e in app.error], 'decided': bool(decisions)}}))
+"""
+
+
+def run_once(app, think_time, models_dir):
+    environment = dict(os.environ, MODELS_DIR=models_dir)
+    output = subprocess.run([sys.executable, "-c", WORKER.format(root=ROOT, app=app, think_time=think_time)],
+                            cwd=ROOT, env=environment, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between first paint and the click")
+    parser.add_argument("--models-dir", default=os.environ.get('MODELS_DIR', 'models'))
+    parser.add_argument("--pickles-only", action="store_true", help="copy the models without their .forest exports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        models_dir = args.models_dir
+        if args.pickles_only:
+            for name in os.listdir(os.path.join(ROOT, models_dir)):
+                if name.endswith(('.pkl', '.npz')):
+                    shutil.copyfile(os.path.join(ROOT, models_dir, name), os.path.join(directory, name))
+            models_dir = directory
+        runs = [run_once(args.app, args.think_time, models_dir) for _ in range(args.runs)]
+
+    for run in runs:
+        if run['errors'] or not run['decided']:
+            print(f"warning: a run ended without a decision: {run['errors']}")
+    print(f"{args.app} ({'pickles only' if args.pickles_only else models_dir}), {args.runs} cold starts, "
+          f"click after {args.think_time:g} s")
+    for key, label in (('interactive_s', 'time to interactive'), ('first_click_s', 'first click rerun'),
+                       ('ready_s', 'launch to first result')):
+        values = np.array([run[key] for run in runs])
+        print(f"  {label:<24} median {np.median(values):6.2f} s  max {values.max():6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Per-call latency of the DataFrame input path versus the FeatureEncoder fast path.
+
+For 1- and 10-row inputs shaped like the app's, compares:
+  dataframe -- the app's original path: pd.DataFrame(...).astype(str) -> Pipeline.predict
+  encoder   -- dict of raw values -> FeatureEncoder -> bare estimator (EncodedPipeline)
+  arrays    -- dict of raw values -> FeatureEncoder -> CompiledForest (needs models/*.forest)
+and the encoding step alone (ColumnTransformer.transform vs FeatureEncoder.transform).
+
+Usage: python benchmarks/bench_encoder.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from feature_encoder import EncodedPipeline  # noqa: E402
+from forest_runtime import load_forest  # noqa: E402
+
+
+def regressor_inputs(n_rows):
+    return {'Year': list(range(1, n_rows + 1)), 'Risk_Rating': 'Medium', 'Project_Type': 'Retail',
+            'Market_Condition': 'Stable'}
+
+
+def classifier_inputs(n_rows):
+    rng = np.random.default_rng(0)
+    return {'Initial_Cost': list(-rng.uniform(30000, 120000, n_rows)),
+            'Discount_Rate_%': list(rng.uniform(7, 18, n_rows)), 'Risk_Rating': 'Medium',
+            'Project_Type': 'Retail', 'Market_Condition': 'Stable', 'Duration_Years': [5] * n_rows,
+            'Total_Cash_Inflows': [120000.0] * n_rows, 'Avg_Cash_Flow': [24000.0] * n_rows,
+            'CF_Volatility': [3700.0] * n_rows}
+
+
+def as_frame(inputs, n_rows):
+    return pd.DataFrame({k: v if isinstance(v, list) else [v] * n_rows for k, v in inputs.items()}).astype(str)
+
+
+def median_ms(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for name, make_inputs, method in [('cash_flow_regressor', regressor_inputs, 'predict'),
+                                      ('decision_classifier', classifier_inputs, 'predict_proba')]:
+        pipeline = joblib.load(os.path.join(ROOT, 'models', f'{name}.pkl'))
+        encoded = EncodedPipeline(pipeline)
+        forest_path = os.path.join(ROOT, 'models', f'{name}.forest')
+        forest = load_forest(forest_path) if os.path.isdir(forest_path) else None
+        preprocessor = pipeline.steps[0][1]
+        print(f"\n{name} ({method}), median ms per call")
+        for n_rows in (1, 10):
+            inputs = make_inputs(n_rows)
+            rows = {
+                'dataframe': median_ms(lambda: getattr(pipeline, method)(as_frame(inputs, n_rows)), args.repeat),
+                'encoder': median_ms(lambda: getattr(encoded, method)(inputs), args.repeat),
+            }
+            if forest is not None:
+                rows['arrays'] = median_ms(lambda: getattr(forest, method)(inputs), args.repeat)
+            encode_df = median_ms(lambda: preprocessor.transform(as_frame(inputs, n_rows)), args.repeat)
+            encode_fast = median_ms(lambda: encoded.encoder.transform(inputs), args.repeat)
+            print(f"  {n_rows:>2} rows: " + "  ".join(f"{k} {v:7.3f}" for k, v in rows.items())
+                  + f"  | encode only: DataFrame+ColumnTransformer {encode_df:6.3f}, FeatureEncoder {encode_fast:6.3f}")
+
+
+if __name__ == "__main__":
+    main()
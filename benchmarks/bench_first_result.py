@@ -0,0 +1,65 @@
+"""Time-to-first-result of an "Analyze Investment" click, measured headlessly.
+
+Runs the app with Streamlit's AppTest, clicks Analyze repeatedly and records, per
+click, the time from the start of the rerun to the first render of the decision box
+and to the end of the run. Models are loaded (and cached) by a warm-up run first.
+
+Usage: python benchmarks/bench_first_result.py [--app app.py] [--clicks 10]
+To measure an older revision: git show <rev>:app.py > app_before.py, then --app app_before.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--clicks", type=int, default=10)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    # Timestamp the first decision box, whether it is written via st.markdown,
+    # a container or a placeholder
+    first_result = {}
+
+    def timed(markdown):
+        def wrapper(*a, **kw):
+            if any("Investment Decision:" in str(arg) for arg in a) and "at" not in first_result:
+                first_result["at"] = time.perf_counter()
+            return markdown(*a, **kw)
+        return wrapper
+
+    DeltaGenerator.markdown = timed(DeltaGenerator.markdown)
+    st.markdown = timed(st.markdown)
+
+    app = AppTest.from_file(args.app, default_timeout=120)
+    app.run()
+    first, total = [], []
+    for _ in range(args.clicks + 1):
+        app.sidebar.button[0].click()
+        first_result.clear()
+        start = time.perf_counter()
+        app.run()
+        total.append(time.perf_counter() - start)
+        first.append(first_result.get("at", np.nan) - start)
+    # The first click also pays for one-off lazy work; report the steady state
+    first, total = np.array(first[1:]) * 1000, np.array(total[1:]) * 1000
+
+    print(f"{args.app}: {args.clicks} clicks")
+    print(f"time to first result ms: median {np.median(first):8.1f}  max {np.max(first):8.1f}")
+    print(f"full rerun ms:           median {np.median(total):8.1f}  max {np.max(total):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare the array-backed forest runtime with the pickled scikit-learn pipelines.
+
+Exports both models to a temporary directory, then reports cold load time, resident
+memory added by loading (measured in fresh subprocesses) and batch throughput.
+
+Usage: python benchmarks/bench_forest_runtime.py [--batches 1 100 10000 100000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from forest_runtime import export_pipeline, load_forest, sample_inputs  # noqa: E402
+
+MODELS = ["cash_flow_regressor", "decision_classifier"]
+
+LOAD_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+def rss_kb():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmRSS"))
+import numpy, joblib, forest_runtime
+before = rss_kb()
+start = time.perf_counter()
+model = {loader}
+print(time.perf_counter() - start, rss_kb() - before)
+"""
+
+
+def measure_load(loader):
+    """(seconds, RSS kB) to load one model in a fresh interpreter."""
+    output = subprocess.run([sys.executable, "-c", LOAD_SNIPPET.format(root=ROOT, loader=loader)],
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), int(output[1])
+
+
+def best_of(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 10_000, 100_000])
+    parser.add_argument("--float32", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in MODELS:
+            pickle_path = os.path.join(ROOT, "models", f"{name}.pkl")
+            forest_path = os.path.join(tmp, f"{name}.forest")
+            pipeline = joblib.load(pickle_path)
+            export_pipeline(pipeline, forest_path, "float32" if args.float32 else "float64")
+            forest = load_forest(forest_path)
+            method = "predict_proba" if forest.is_classifier else "predict"
+
+            pickle_load = measure_load(f"joblib.load({pickle_path!r})")
+            forest_load = measure_load(f"forest_runtime.load_forest({forest_path!r})")
+            print(f"\n{name}  ({forest.meta['n_trees']} trees, arrays {forest.nbytes / 1e6:.2f} MB, "
+                  f"pickle {os.path.getsize(pickle_path) / 1e6:.2f} MB)")
+            print(f"  load:     pickle {pickle_load[0] * 1000:7.1f} ms, +{pickle_load[1] / 1024:6.1f} MB RSS | "
+                  f"arrays {forest_load[0] * 1000:7.1f} ms, +{forest_load[1] / 1024:6.1f} MB RSS")
+
+            for batch in args.batches:
+                X = pd.DataFrame(sample_inputs(forest, batch)).astype(str)
+                repeat = 5 if batch <= 10_000 else 1
+                sklearn_seconds = best_of(lambda: getattr(pipeline, method)(X), repeat)
+                forest_seconds = best_of(lambda: getattr(forest, method)(X), repeat)
+                print(f"  batch {batch:>7,}: pipeline {sklearn_seconds * 1000:9.2f} ms | "
+                      f"arrays {forest_seconds * 1000:9.2f} ms ({sklearn_seconds / forest_seconds:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
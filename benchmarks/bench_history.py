@@ -0,0 +1,101 @@
+"""Write throughput and query latency of the analysis history at 10^6+ analyses.
+
+Fills a fresh database with synthetic analyses spread over --days days through
+HistoryStore.record (the app's path: a queue drained by the batching writer thread),
+then times the history view's queries, median over --repeats runs:
+  aggregate  -- counts/averages from the rollup table, overall and grouped, with filters
+  recent     -- latest 100 filtered analyses through the (column, created) indexes
+and, for comparison, the same overall aggregate computed by scanning the analyses table.
+
+Usage: python benchmarks/bench_history.py [--rows 1000000] [--days 365] [--db /tmp/history_bench.sqlite3]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from history import HistoryStore  # noqa: E402
+from pipeline import CATEGORY_OPTIONS  # noqa: E402
+
+
+def synthetic_analyses(n, days, seed=0):
+    """n analysis mappings with random inputs, timestamps spread over the last `days` days."""
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    created = np.sort(now - rng.uniform(0, days * 86400, n))
+    durations = rng.integers(1, 11, n)
+    npv = rng.normal(0, 50000, n)
+    choices = {column: rng.choice(options, n) for column, options in CATEGORY_OPTIONS.items()}
+    for i in range(n):
+        yield {'created': float(created[i]), 'initial_cost': -100000.0, 'discount_rate': 10.0,
+               'duration_years': int(durations[i]), 'risk_rating': choices['Risk_Rating'][i],
+               'project_type': choices['Project_Type'][i], 'market_condition': choices['Market_Condition'][i],
+               'cash_flows': [25000.0] * int(durations[i]), 'npv': npv[i], 'irr': 12.5, 'pi': 1.0 + npv[i] / 1e5,
+               'payback_period': 4.0, 'decision': 'accept' if npv[i] > 0 else 'reject', 'confidence': 75.0,
+               'model_version': 'bench', 'analysis_ms': 5.0, 'timings': {'financial_metrics': 0.5}}
+
+
+def time_query(query, repeats):
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = query()
+        seconds.append(time.perf_counter() - start)
+    return float(np.median(seconds)) * 1000, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--db", default="/tmp/history_bench.sqlite3")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    store = HistoryStore(args.db, batch_size=args.batch_size)
+
+    analyses = list(synthetic_analyses(args.rows, args.days))
+    start = time.perf_counter()
+    for analysis in analyses:
+        store.record(analysis)
+    enqueue_seconds = time.perf_counter() - start
+    store.flush()
+    total_seconds = time.perf_counter() - start
+    print(f"{args.rows:,} analyses over {args.days} days, batches of {args.batch_size:,}")
+    print(f"  record (caller side)   {enqueue_seconds / args.rows * 1e6:8.2f} us per analysis")
+    print(f"  written                {args.rows / total_seconds:10,.0f} analyses/s "
+          f"({store.write_seconds:.1f} s in the writer, {os.path.getsize(args.db) / 1e6:,.0f} MB)")
+
+    today = date.today()
+    last_month = {'start': today - timedelta(days=30), 'end': today}
+    queries = [
+        ("aggregate, all", lambda: store.aggregate()),
+        ("aggregate by decision", lambda: store.aggregate(None, ['decision'])),
+        ("aggregate Tech+High by day", lambda: store.aggregate(
+            {'project_types': ['Tech'], 'risk_ratings': ['High']}, ['day'])),
+        ("aggregate last 30 days by type", lambda: store.aggregate(last_month, ['project_type'])),
+        ("recent 100, all", lambda: store.recent()),
+        ("recent 100, Energy", lambda: store.recent({'project_types': ['Energy']})),
+        ("recent 100, High+accept", lambda: store.recent({'risk_ratings': ['High'], 'decisions': ['accept']})),
+        ("recent 100, Infra last 30 days", lambda: store.recent({'project_types': ['Infra'], **last_month})),
+        ("scan analyses (no rollup)", lambda: store._query(
+            "SELECT COUNT(*), AVG(npv), AVG(confidence) FROM analyses", [])),
+    ]
+    print(f"Query latency, median of {args.repeats}")
+    for label, query in queries:
+        ms, n = time_query(query, args.repeats)
+        print(f"  {label:<32} {ms:9.2f} ms  ({n} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Per-click cost of app.py's calculate_financial_metrics across horizons and period frequencies.
+
+Times NPV/IRR/PI/payback for 10 and 50 years of yearly flows and up to 600 monthly periods,
+median over --repeats calls, with a fresh discount rate per call (cold factor cache) and
+with the same rate (the cached discount vector, as on repeated clicks).
+
+Usage: python benchmarks/bench_horizons.py [--repeats 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_suite import app_function  # noqa: E402
+from portfolio import to_periods  # noqa: E402
+
+
+def median_us(function, repeats):
+    seconds = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        function(i)
+        seconds.append(time.perf_counter() - start)
+    return float(np.median(seconds)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    calculate_financial_metrics = app_function('calculate_financial_metrics')
+    rng = np.random.default_rng(0)
+    print(f"{'horizon':<22} {'periods':>7} {'new rate (us)':>14} {'same rate (us)':>15}")
+    for years, periods_per_year in ((10, 1), (50, 1), (10, 12), (50, 12)):
+        yearly = rng.uniform(10000, 40000, years)
+        flows = to_periods(yearly, periods_per_year)
+        fresh = median_us(lambda i: calculate_financial_metrics(-250000, 5 + i * 1e-4, flows, periods_per_year),
+                          args.repeats)
+        same = median_us(lambda i: calculate_financial_metrics(-250000, 10.0, flows, periods_per_year), args.repeats)
+        label = f"{years} years, {'monthly' if periods_per_year == 12 else 'yearly'}"
+        print(f"{label:<22} {len(flows):>7} {fresh:>14.1f} {same:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Dataset ingestion: notebook-style row-by-row parsing versus dataset.py, cold and cached.
+
+Builds a synthetic file with synthetic.py (fitted on Investment_Dataset.xlsx), then times
+  notebook   -- .apply(parse_cash_flow_stats) and .apply(parse_cash_flow_list) + explode,
+                on a --notebook-rows sample and scaled up to the full size
+  vectorized -- parse_cash_flows + classifier_frame + regressor_frame
+  cold/warm  -- load_dataset without and with a valid cache
+and the same cold/warm load for the real Excel file.
+
+Usage: python benchmarks/bench_ingest.py [--rows 1000000] [--format csv|parquet]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from dataset import (DEFAULT_DATASET_PATH, classifier_frame, load_dataset, parse_dataset,  # noqa: E402
+                     regressor_frame)
+from synthetic import fit_generator, generate  # noqa: E402
+
+
+def parse_cash_flow_stats(cf_str):
+    """The training notebook's classifier feature parser."""
+    try:
+        cash_flows = [float(x.strip()) for x in str(cf_str).strip('[]').split(',')]
+        return pd.Series({'Total_Cash_Inflows': sum(cash_flows), 'Avg_Cash_Flow': np.mean(cash_flows),
+                          'CF_Volatility': np.std(cash_flows)})
+    except Exception:
+        return pd.Series({'Total_Cash_Inflows': np.nan, 'Avg_Cash_Flow': np.nan, 'CF_Volatility': np.nan})
+
+
+def parse_cash_flow_list(cf_str):
+    """The training notebook's regressor parser."""
+    try:
+        cash_flows = [float(x.strip()) for x in str(cf_str).strip('[]').split(',')]
+        return [(cf, i + 1) for i, cf in enumerate(cash_flows)]
+    except Exception:
+        return []
+
+
+def notebook_parse(raw):
+    classifier = raw.join(raw['Uneven_Cash_Flows'].apply(parse_cash_flow_stats))
+    raw = raw.assign(Cash_Flows_List=raw['Uneven_Cash_Flows'].apply(parse_cash_flow_list))
+    regressor = raw[['Risk_Rating', 'Project_Type', 'Market_Condition', 'Cash_Flows_List']].explode('Cash_Flows_List')
+    regressor[['Cash_Flow_Amount', 'Year']] = pd.DataFrame(regressor['Cash_Flows_List'].tolist(),
+                                                           index=regressor.index)
+    return classifier, regressor
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--notebook-rows", type=int, default=20000)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    excel = os.path.join(ROOT, DEFAULT_DATASET_PATH)
+    params = fit_generator(load_dataset(excel, use_cache=False))
+    synthetic = pd.concat(generate(params, args.rows, seed=0), ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"synthetic.{args.format}")
+        if args.format == "csv":
+            synthetic.to_csv(path, index=False)
+        else:
+            synthetic.to_parquet(path, index=False)
+        print(f"{args.rows:,} rows, {os.path.getsize(path) / 1e6:.0f} MB {args.format}")
+
+        sample = synthetic.iloc[:args.notebook_rows]
+        _, seconds = timed(lambda: notebook_parse(sample))
+        print(f"  notebook parse     {seconds * args.rows / len(sample):8.2f} s "
+              f"(measured {seconds:.2f} s on {len(sample):,} rows)")
+
+        def vectorized():
+            dataset = parse_dataset(synthetic)
+            return classifier_frame(dataset), regressor_frame(dataset)
+        _, seconds = timed(vectorized)
+        print(f"  vectorized parse   {seconds:8.2f} s")
+
+        cache_dir = os.path.join(directory, "cache")
+        _, cold = timed(lambda: load_dataset(path, cache_dir))
+        _, warm = timed(lambda: load_dataset(path, cache_dir))
+        print(f"  load_dataset cold  {cold:8.2f} s (read + parse + write cache)")
+        print(f"  load_dataset warm  {warm:8.2f} s (hash check + cached Parquet/NPZ)")
+
+        _, cold = timed(lambda: load_dataset(excel, cache_dir))
+        _, warm = timed(lambda: load_dataset(excel, cache_dir))
+        print(f"\n{DEFAULT_DATASET_PATH}: cold {cold * 1000:.0f} ms, cached {warm * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
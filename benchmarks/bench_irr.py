@@ -0,0 +1,59 @@
+"""Benchmark the batched IRR solver against per-vector npf.irr.
+
+Usage: python benchmarks/bench_irr.py [--vectors 100000] [--years 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import numpy_financial as npf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from irr import solve_irr  # noqa: E402
+
+
+def make_cash_flows(n_vectors, n_years, seed=42):
+    """Mostly conventional projects, plus some with no root and some with sign flips."""
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(30000, 120000, n_vectors)
+    inflows = cost[:, None] / n_years * rng.uniform(0.3, 2.0, (n_vectors, n_years))
+    cash_flows = np.column_stack([-cost, inflows])
+    no_inflows = rng.random(n_vectors) < 0.05
+    cash_flows[no_inflows, 1:] = 0
+    mid_life_outlay = rng.random(n_vectors) < 0.05
+    cash_flows[mid_life_outlay, n_years // 2] = -cost[mid_life_outlay]
+    return cash_flows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    cash_flows = make_cash_flows(args.vectors, args.years)
+
+    start = time.perf_counter()
+    result = solve_irr(cash_flows)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = np.array([npf.irr(row) for row in cash_flows])
+    npf_seconds = time.perf_counter() - start
+
+    both = np.isfinite(reference) & result.converged
+    print(f"vectors: {args.vectors:,}  years: {args.years}")
+    print(f"solve_irr: {batch_seconds:8.3f} s  ({args.vectors / batch_seconds:12,.0f} vectors/s)")
+    print(f"npf.irr:   {npf_seconds:8.3f} s  ({args.vectors / npf_seconds:12,.0f} vectors/s)")
+    print(f"speedup:   {npf_seconds / batch_seconds:8.1f}x")
+    print(f"converged: {result.converged.sum():,}  no root: {result.no_root.sum():,}  "
+          f"npf.irr NaN: {np.isnan(reference).sum():,}")
+    difference = np.abs(result.rate[both] - reference[both])
+    print(f"difference where both solved: {np.median(difference):.2e} median, "
+          f"{np.sum(difference > 1e-6):,} vectors on a different root")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark the vectorized portfolio engine against the per-project metrics loop.
+
+Usage: python benchmarks/bench_portfolio.py [--projects 100000] [--years 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import numpy_financial as npf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from portfolio import calculate_portfolio_metrics  # noqa: E402
+
+
+def make_portfolio(n_projects, n_years, seed=42):
+    """Random portfolio shaped like the training data (costs, rates, ragged durations)."""
+    rng = np.random.default_rng(seed)
+    initial_costs = -rng.uniform(30000, 120000, n_projects)
+    discount_rates = rng.uniform(7, 18, n_projects)
+    durations = rng.integers(1, n_years + 1, n_projects)
+    cash_flows = np.abs(initial_costs)[:, None] / durations[:, None] * rng.uniform(0.6, 1.5, (n_projects, n_years))
+    return initial_costs, discount_rates, cash_flows, durations
+
+
+def reference_metrics(initial_cost, discount_rate, cash_flows):
+    """Per-project loop with the same rules as calculate_financial_metrics in app.py."""
+    npv = np.sum(cash_flows / (1 + discount_rate / 100) ** np.arange(1, len(cash_flows) + 1)) - abs(initial_cost)
+    irr = npf.irr(np.concatenate([[initial_cost], cash_flows])) * 100
+    pi = (npv + abs(initial_cost)) / abs(initial_cost)
+    cumulative_cf = 0
+    payback_period = len(cash_flows)
+    for i, cf in enumerate(cash_flows, 1):
+        cumulative_cf += cf
+        if cumulative_cf >= abs(initial_cost):
+            payback_period = i - 1 + (abs(initial_cost) - (cumulative_cf - cf)) / cf if i > 1 else i
+            break
+    return npv, irr, pi, payback_period
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=100_000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--loop-sample", type=int, default=2_000,
+                        help="projects scored with the per-project loop for timing and parity")
+    args = parser.parse_args()
+
+    initial_costs, discount_rates, cash_flows, durations = make_portfolio(args.projects, args.years)
+
+    start = time.perf_counter()
+    npv, irr, pi, payback = calculate_portfolio_metrics(initial_costs, discount_rates, cash_flows, durations)
+    batch_seconds = time.perf_counter() - start
+
+    sample = min(args.loop_sample, args.projects)
+    start = time.perf_counter()
+    reference = np.array([
+        reference_metrics(initial_costs[i], discount_rates[i], cash_flows[i, :durations[i]])
+        for i in range(sample)
+    ])
+    loop_seconds = (time.perf_counter() - start) * args.projects / sample
+
+    batch = np.column_stack([npv, irr, pi, payback])[:sample]
+    max_error = np.nanmax(np.abs(batch - reference), axis=0)
+
+    print(f"projects: {args.projects:,}  years: {args.years}")
+    print(f"batch engine:        {batch_seconds:8.3f} s")
+    print(f"per-project loop:    {loop_seconds:8.3f} s (extrapolated from {sample:,} projects)")
+    print(f"speedup:             {loop_seconds / batch_seconds:8.1f}x")
+    print("max abs difference (npv, irr, pi, payback): " + ", ".join(f"{e:.2e}" for e in max_error))
+
+
+if __name__ == "__main__":
+    main()
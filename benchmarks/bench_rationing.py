@@ -0,0 +1,69 @@
+"""Solve time and optimality gap of the capital rationing solvers on scored random portfolios.
+
+Scores random projects with the real models (pipeline.score_projects), then for each
+size runs the budget-only dp and milp solvers and a milp with Project_Type caps and
+a High-risk share limit. The budget is a fifth of the total cost of the
+positive-NPV projects.
+
+Usage: python benchmarks/bench_rationing.py [--sizes 1000 10000 50000]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from forest_runtime import load_model  # noqa: E402
+from pipeline import CATEGORY_OPTIONS, score_projects  # noqa: E402
+from prediction_table import load_prediction_table  # noqa: E402
+from rationing import optimize_portfolio  # noqa: E402
+
+
+def random_projects(n_projects, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Initial_Cost': -rng.uniform(30000, 120000, n_projects).round(),
+        'Discount_Rate_%': rng.uniform(7, 18, n_projects),
+        'Duration_Years': rng.integers(2, 7, n_projects),
+        **{column: rng.choice(options, n_projects) for column, options in CATEGORY_OPTIONS.items()},
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--resolution", type=int, default=10000)
+    args = parser.parse_args()
+
+    models_dir = os.path.join(ROOT, 'models')
+    regressor_model = load_model('cash_flow_regressor', models_dir)
+    classifier_model = load_model('decision_classifier', models_dir)
+    cash_flow_table = load_prediction_table(os.path.join(models_dir, 'cash_flow_table.npz'),
+                                            os.path.join(models_dir, 'cash_flow_regressor.pkl'))
+
+    for n_projects in args.sizes:
+        projects = random_projects(n_projects)
+        projects = pd.concat([projects, score_projects(projects, regressor_model, classifier_model,
+                                                       cash_flow_table)], axis=1)
+        positive = projects['NPV'] > 0
+        budget = projects.loc[positive, 'Initial_Cost'].abs().sum() / 5
+        print(f"\n{n_projects:,} projects ({positive.sum():,} with NPV > 0), budget ${budget:,.0f}")
+
+        type_caps = {'Project_Type': {project_type: budget / 4 for project_type in CATEGORY_OPTIONS['Project_Type']}}
+        runs = [
+            ("dp", dict(method="dp", resolution=args.resolution)),
+            ("milp", dict(method="milp")),
+            ("milp + type caps, High <= 20%", dict(method="milp", group_caps=type_caps,
+                                                  max_shares={'Risk_Rating': {'High': 0.2}})),
+        ]
+        for label, options in runs:
+            result = optimize_portfolio(projects, budget, **options)
+            print(f"  {label:<32} {result.solve_seconds:8.3f} s  NPV ${result.total_npv:>14,.0f}  "
+                  f"selected {result.selected.sum():>6,}  gap {result.gap:.4%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Per-process memory and startup time of N concurrent model-serving processes.
+
+Each worker imports the app's model stack, loads both models the way `load_models`
+does, runs one prediction (touching the model pages) and then idles while the parent
+reads its RSS and PSS from /proc. PSS splits shared pages between the processes that
+map them, so it shows how much of each worker is really its own.
+
+Usage: python benchmarks/bench_shared_models.py [--workers 4]
+Export the arrays first:
+    python forest_runtime.py export models/cash_flow_regressor.pkl models/cash_flow_regressor.forest
+    python forest_runtime.py export models/decision_classifier.pkl models/decision_classifier.forest
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import pandas as pd
+import forest_runtime
+{load}
+X = pd.DataFrame({{'Year': ['1'], 'Risk_Rating': ['Low'], 'Project_Type': ['Tech'], 'Market_Condition': ['Stable']}})
+regressor.predict(X)
+print(time.perf_counter() - start, flush=True)
+sys.stdin.readline()
+"""
+
+LOADERS = {
+    "pickle": "import joblib\n"
+              "regressor = joblib.load('models/cash_flow_regressor.pkl')\n"
+              "classifier = joblib.load('models/decision_classifier.pkl')",
+    "arrays (mmap)": "regressor = forest_runtime.load_forest('models/cash_flow_regressor.forest')\n"
+                     "classifier = forest_runtime.load_forest('models/decision_classifier.forest')",
+    "arrays (no mmap)": "regressor = forest_runtime.load_forest('models/cash_flow_regressor.forest', None)\n"
+                        "classifier = forest_runtime.load_forest('models/decision_classifier.forest', None)",
+}
+
+
+def memory_kb(pid):
+    """(RSS, PSS) in kB from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1])
+    return values["Rss:"], values["Pss:"]
+
+
+def run(load, n_workers):
+    workers = [subprocess.Popen([sys.executable, "-c", WORKER.format(root=ROOT, load=load)], cwd=ROOT,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+               for _ in range(n_workers)]
+    startup = [float(worker.stdout.readline()) for worker in workers]
+    time.sleep(0.2)
+    memory = [memory_kb(worker.pid) for worker in workers]
+    for worker in workers:
+        worker.communicate("\n")
+    return startup, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.workers} concurrent workers")
+    print(f"{'format':<18}{'startup s (mean)':>18}{'RSS MB/proc':>14}{'PSS MB/proc':>14}{'PSS MB total':>14}")
+    for name, load in LOADERS.items():
+        startup, memory = run(load, args.workers)
+        rss = sum(m[0] for m in memory) / len(memory) / 1024
+        pss = sum(m[1] for m in memory) / 1024
+        print(f"{name:<18}{sum(startup) / len(startup):>18.3f}{rss:>14.1f}{pss / len(memory):>14.1f}{pss:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
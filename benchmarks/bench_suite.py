@@ -0,0 +1,292 @@
+"""End-to-end benchmark suite for the analysis path, written as JSON for comparison across changes.
+
+Measures
+  startup   -- cold import of app.py's top-level imports and `load_models` (time and RSS
+               growth), each in a fresh interpreter, median of --repeat processes
+  stages    -- one analysis with the app's default inputs, stage by stage: building and
+               encoding the input mappings, regressor predict, cash flow table lookup,
+               app.py's calculate_financial_metrics and classifier predict_proba (model
+               calls are timed as the app makes them, so they include their encoding)
+  batch     -- pipeline.score_projects throughput at --sizes projects, scored in
+               --chunk-size chunks as score_batch.py does
+
+The JSON also records the commit, library versions, CPU count and model version. With
+--compare, the median and whole-run timings are checked against an earlier result file
+and the run exits with status 1 when one is more than --tolerance slower.
+
+Usage: python benchmarks/bench_suite.py [--output bench_results.json] [--sizes 1 100 10000 1000000]
+       python benchmarks/bench_suite.py --output new.json --compare baseline.json
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from forest_runtime import load_model  # noqa: E402
+from model_loader import flat_version  # noqa: E402
+from pipeline import CATEGORY_OPTIONS, score_projects  # noqa: E402
+from prediction_table import load_prediction_table  # noqa: E402
+
+MODEL_NAMES = ('cash_flow_regressor', 'decision_classifier')
+DEFAULT_INPUTS = {'Initial_Cost': -100000, 'Discount_Rate_%': 10.0, 'Duration_Years': 5,
+                  'Risk_Rating': 'Medium', 'Project_Type': 'Retail', 'Market_Condition': 'Stable'}
+
+STARTUP = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_mb():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * {page_size} / 1e6
+
+start = time.perf_counter()
+imports = {{}}
+for statement in {imports!r}:
+    begin = time.perf_counter()
+    exec(statement)
+    imports[statement] = time.perf_counter() - begin
+import_s = time.perf_counter() - start
+
+from forest_runtime import load_model
+rss_before = rss_mb()
+begin = time.perf_counter()
+models = [load_model(name, {models_dir!r}) for name in {names!r}]
+load_s = time.perf_counter() - begin
+print(json.dumps({{'import_s': import_s, 'imports': imports, 'load_models_s': load_s,
+                  'load_models_rss_mb': rss_mb() - rss_before, 'rss_mb': rss_mb()}}))
+"""
+
+
+# --- Helpers ---
+def app_imports():
+    """Source of app.py's top-level import statements, in order."""
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def app_function(name):
+    """A top-level function of app.py, defined with app.py's imports but without running the app."""
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    body = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+            or (isinstance(node, ast.FunctionDef) and node.name == name)]
+    namespace = {}
+    exec(compile(ast.Module(body=body, type_ignores=[]), "app.py", "exec"), namespace)
+    return namespace[name]
+
+
+def environment(models_dir):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import sklearn
+    return {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'sklearn': sklearn.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'models_dir': models_dir,
+            'model_version': flat_version(models_dir)}
+
+
+def timings(function, repeat):
+    """{'p50_ms', 'p95_ms', 'min_ms'} of `repeat` calls after one warm-up call."""
+    function()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1000
+    return {'p50_ms': float(np.median(samples)), 'p95_ms': float(np.percentile(samples, 95)),
+            'min_ms': float(samples.min())}
+
+
+def make_projects(n_projects, seed=0):
+    """Random projects within the app's input ranges."""
+    rng = np.random.default_rng(seed)
+    projects = {'Initial_Cost': -rng.uniform(30000, 120000, n_projects).round(),
+                'Discount_Rate_%': rng.uniform(7, 18, n_projects).round(2),
+                'Duration_Years': rng.integers(1, 11, n_projects)}
+    for column, options in CATEGORY_OPTIONS.items():
+        projects[column] = np.asarray(options)[rng.integers(len(options), size=n_projects)]
+    return pd.DataFrame(projects)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+# --- Benchmarks ---
+def bench_startup(models_dir, repeat):
+    script = STARTUP.format(root=ROOT, page_size=os.sysconf("SC_PAGE_SIZE"), imports=app_imports(),
+                            models_dir=models_dir, names=MODEL_NAMES)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+        run = json.loads(output.stdout.strip().splitlines()[-1])
+        run['process_s'] = time.perf_counter() - start
+        runs.append(run)
+    imports = {statement: float(np.median([run['imports'][statement] for run in runs]) * 1000)
+               for statement in runs[0]['imports']}
+    return {
+        'process_s': float(np.median([run['process_s'] for run in runs])),
+        'import_s': float(np.median([run['import_s'] for run in runs])),
+        'import_ms_by_statement': imports,
+        'load_models_s': float(np.median([run['load_models_s'] for run in runs])),
+        'load_models_rss_mb': float(np.median([run['load_models_rss_mb'] for run in runs])),
+        'rss_after_load_mb': float(np.median([run['rss_mb'] for run in runs])),
+    }
+
+
+def bench_stages(regressor_model, classifier_model, cash_flow_table, repeat):
+    """Per-stage latency of one analysis, following the Analyze flow in app.py."""
+    calculate_financial_metrics = app_function('calculate_financial_metrics')
+    inputs = DEFAULT_INPUTS
+    years = list(range(1, inputs['Duration_Years'] + 1))
+
+    def regressor_data():
+        return {'Year': years, 'Risk_Rating': inputs['Risk_Rating'], 'Project_Type': inputs['Project_Type'],
+                'Market_Condition': inputs['Market_Condition']}
+
+    def classifier_data(cash_flows):
+        return {'Initial_Cost': inputs['Initial_Cost'], 'Discount_Rate_%': inputs['Discount_Rate_%'],
+                'Risk_Rating': inputs['Risk_Rating'], 'Project_Type': inputs['Project_Type'],
+                'Market_Condition': inputs['Market_Condition'], 'Duration_Years': inputs['Duration_Years'],
+                'Total_Cash_Inflows': np.sum(cash_flows), 'Avg_Cash_Flow': np.mean(cash_flows),
+                'CF_Volatility': np.std(cash_flows)}
+
+    cash_flows = np.maximum(regressor_model.predict(regressor_data()), 0)
+
+    def frame_building():
+        features = [regressor_data(), classifier_data(cash_flows)]
+        for model, data in zip((regressor_model, classifier_model), features):
+            if hasattr(model, 'encoder'):
+                model.encoder.transform(data)
+            else:
+                pd.DataFrame({key: np.atleast_1d(value) for key, value in data.items()})
+
+    def analysis():
+        flows = np.maximum(regressor_model.predict(regressor_data()), 0)
+        proba = classifier_model.predict_proba(classifier_data(flows))[0]
+        calculate_financial_metrics(inputs['Initial_Cost'], inputs['Discount_Rate_%'], flows)
+        return classifier_model.classes_[np.argmax(proba)]
+
+    stages = {
+        'frame_building': timings(frame_building, repeat),
+        'regressor_predict': timings(lambda: regressor_model.predict(regressor_data()), repeat),
+    }
+    if cash_flow_table is not None and cash_flow_table.covers(inputs['Duration_Years']):
+        stages['cash_flow_table_lookup'] = timings(lambda: cash_flow_table.lookup(
+            inputs['Risk_Rating'], inputs['Project_Type'], inputs['Market_Condition'], inputs['Duration_Years']),
+            repeat)
+    stages['financial_metrics'] = timings(
+        lambda: calculate_financial_metrics(inputs['Initial_Cost'], inputs['Discount_Rate_%'], cash_flows), repeat)
+    stages['classifier_predict_proba'] = timings(
+        lambda: classifier_model.predict_proba(classifier_data(cash_flows)), repeat)
+    stages['analysis_total'] = timings(analysis, repeat)
+    return stages
+
+
+def bench_batch(regressor_model, classifier_model, cash_flow_table, sizes, chunk_size):
+    results = {}
+    for size in sizes:
+        projects = make_projects(size)
+        start = time.perf_counter()
+        for begin in range(0, size, chunk_size):
+            score_projects(projects.iloc[begin:begin + chunk_size], regressor_model, classifier_model,
+                           cash_flow_table)
+        seconds = time.perf_counter() - start
+        results[str(size)] = {'seconds_s': seconds, 'projects_per_s': size / seconds, 'peak_rss_mb': peak_rss_mb()}
+        print(f"  batch {size:>9,}: {seconds:8.3f} s  {size / seconds:>12,.0f} projects/s", flush=True)
+    return results
+
+
+# --- Comparison ---
+def flatten(results, prefix=""):
+    values = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = value
+    return values
+
+
+def compare(current, baseline, tolerance):
+    """Print timing changes against `baseline`; return the names that slowed down by more than tolerance.
+
+    Only medians and whole-run seconds are compared; p95/min of short runs are too noisy.
+    """
+    regressions = []
+    old = flatten(baseline['results'])
+    for name, value in flatten(current['results']).items():
+        if not name.endswith(('p50_ms', '_s')) or name.endswith('_per_s') or not old.get(name):
+            continue
+        slowdown = value / old[name] - 1
+        flag = "REGRESSION" if slowdown > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"  {name:<55} {old[name]:>12.4g} -> {value:>12.4g} ({slowdown:+.0%}) {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--models-dir", default=os.environ.get('MODELS_DIR', 'models'))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000, 1000000])
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200, help="calls per single-analysis stage")
+    parser.add_argument("--startup-repeat", type=int, default=5, help="fresh processes for startup timing")
+    parser.add_argument("--compare", help="earlier result file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown with --compare")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    os.chdir(ROOT)
+    startup = bench_startup(args.models_dir, args.startup_repeat)
+    print(f"startup: imports {startup['import_s']:.2f} s, load_models {startup['load_models_s']:.2f} s "
+          f"(+{startup['load_models_rss_mb']:.0f} MB RSS), process {startup['process_s']:.2f} s", flush=True)
+
+    regressor_model = load_model(MODEL_NAMES[0], args.models_dir)
+    classifier_model = load_model(MODEL_NAMES[1], args.models_dir)
+    cash_flow_table = load_prediction_table(os.path.join(args.models_dir, 'cash_flow_table.npz'),
+                                            os.path.join(args.models_dir, 'cash_flow_regressor.pkl'))
+    stages = bench_stages(regressor_model, classifier_model, cash_flow_table, args.repeat)
+    for stage, values in stages.items():
+        print(f"  {stage:<26} p50 {values['p50_ms']:8.3f} ms  p95 {values['p95_ms']:8.3f} ms")
+    batch = bench_batch(regressor_model, classifier_model, cash_flow_table, args.sizes, args.chunk_size)
+
+    report = {'environment': environment(args.models_dir),
+              'results': {'startup': startup, 'stages': stages, 'batch': batch}}
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {output}")
+
+    if baseline_path:
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+        print(f"\nAgainst {args.compare} (commit {baseline['environment'].get('commit')}, "
+              f"models {baseline['environment'].get('model_version')}):")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} timings regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
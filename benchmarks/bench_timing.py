@@ -0,0 +1,43 @@
+"""Per-span overhead of timing.Tracer, disabled and enabled, against an uninstrumented block.
+
+Usage: python benchmarks/bench_timing.py [--spans 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from timing import Tracer  # noqa: E402
+
+
+def per_call_ns(function, n):
+    start = time.perf_counter()
+    function(n)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spans", type=int, default=1000000)
+    args = parser.parse_args()
+
+    def bare(n):
+        for _ in range(n):
+            pass
+
+    def traced(tracer):
+        def run(n):
+            for _ in range(n):
+                with tracer.span("stage"):
+                    pass
+        return run
+
+    baseline = per_call_ns(bare, args.spans)
+    for label, tracer in (("disabled", Tracer(enabled=False)), ("enabled", Tracer(enabled=True))):
+        cost = per_call_ns(traced(tracer), args.spans) - baseline
+        print(f"{label:<9} {cost:8.0f} ns per span")
+
+
+if __name__ == "__main__":
+    main()
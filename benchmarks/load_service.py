@@ -0,0 +1,66 @@
+"""Load generator for service.py: concurrent clients posting single-project requests.
+
+Start the service first (python service.py), then:
+    python benchmarks/load_service.py --requests 5000 --concurrency 32
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pipeline import CATEGORY_OPTIONS  # noqa: E402
+
+
+def random_project(rng):
+    project = {
+        "Initial_Cost": -rng.randint(30000, 120000),
+        "Discount_Rate_%": round(rng.uniform(7, 18), 2),
+        "Duration_Years": rng.randint(2, 6),
+    }
+    project.update({column: rng.choice(options) for column, options in CATEGORY_OPTIONS.items()})
+    return project
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8502")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    local = threading.local()
+
+    def post(i):
+        if not hasattr(local, "rng"):
+            local.rng = random.Random(i)
+        request = urllib.request.Request(f"{args.url}/score", data=json.dumps(random_project(local.rng)).encode(),
+                                         headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        latencies = np.array(list(pool.map(post, range(args.requests)))) * 1000
+    seconds = time.perf_counter() - start
+
+    print(f"{args.requests:,} requests, {args.concurrency} concurrent clients, {seconds:.2f} s")
+    print(f"client throughput: {args.requests / seconds:,.0f} req/s")
+    print(f"client latency ms: p50 {np.percentile(latencies, 50):.2f}  p99 {np.percentile(latencies, 99):.2f}")
+    with urllib.request.urlopen(f"{args.url}/stats") as response:
+        print("server stats:", json.dumps(json.load(response), indent=2))
+
+
+if __name__ == "__main__":
+    main()
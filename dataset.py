@@ -0,0 +1,167 @@
+"""Load the investment dataset with its cash flows parsed into a padded matrix.
+
+`Uneven_Cash_Flows` holds each project's yearly inflows as a bracketed string such
+as "[41103, 40679]". `parse_cash_flows` turns a whole column of them into an
+(N x longest list) float matrix, zero past each list's end, plus a length vector,
+in one pass: the strings are joined into a single text buffer and read by NumPy's
+C parser instead of being split row by row.
+
+`load_dataset` caches the parsed result next to the source file (projects as
+Parquet, cash flows as NPZ) under the source's SHA-256, so re-runs skip the Excel
+reader entirely until the file changes.
+
+    python dataset.py Dataset/Investment_Dataset.xlsx
+"""
+import argparse
+import os
+import time
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from prediction_table import file_sha256
+
+
+DEFAULT_DATASET_PATH = "Dataset/Investment_Dataset.xlsx"
+CASH_FLOW_COLUMN = 'Uneven_Cash_Flows'
+
+Dataset = namedtuple("Dataset", ["projects", "cash_flows", "lengths", "source_sha256"])
+Dataset.__doc__ = """Projects table (without the cash-flow strings) and their parsed cash flows.
+
+`cash_flows` is (N x longest list) with zeros past each row's `lengths` entry.
+"""
+
+
+# --- Parsing ---
+def _parse_list(text):
+    """Floats of one bracketed list, or None if it does not parse (the notebook's rule)."""
+    try:
+        return [float(x.strip()) for x in str(text).strip('[]').split(',')]
+    except ValueError:
+        return None
+
+
+def parse_cash_flows(strings):
+    """(cash_flows, lengths) for a sequence of bracketed cash-flow lists.
+
+    Rows that do not parse (as in the notebook, any non-numeric item) get length 0.
+    """
+    strings = pd.Series(strings, dtype=object).astype(str).str.strip()
+    inner = strings.str.strip('[]')
+    lengths = np.where(inner.str.strip() == '', 0, inner.str.count(',').to_numpy() + 1)
+
+    try:
+        with warnings.catch_warnings():
+            # Older NumPy warns and stops early on a bad token (newer raises); the size check catches that
+            warnings.simplefilter('ignore', DeprecationWarning)
+            flat = np.fromstring(' '.join(inner.tolist()).replace(',', ' '), sep=' ')
+    except ValueError:
+        flat = None
+    if flat is None or flat.size != lengths.sum() or not np.isfinite(flat).all():
+        # Some row is malformed: fall back to parsing row by row so only that row is lost
+        parsed = [_parse_list(text) for text in inner]
+        lengths = np.array([len(values) if values is not None else 0 for values in parsed])
+        flat = np.array([value for values in parsed if values is not None for value in values], dtype=float)
+
+    n_years = int(lengths.max()) if lengths.size else 0
+    cash_flows = np.zeros((len(lengths), n_years))
+    cash_flows[np.arange(n_years) < lengths[:, None]] = flat
+    return cash_flows, lengths
+
+
+def cash_flow_stats(cash_flows, lengths):
+    """(total, mean, population std) of each row's first `lengths` values; NaN for empty rows."""
+    mask = np.arange(cash_flows.shape[1]) < lengths[:, None]
+    total = np.where(mask, cash_flows, 0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / lengths
+        std = np.sqrt(np.sum(np.where(mask, cash_flows - mean[:, None], 0) ** 2, axis=1) / lengths)
+    return np.where(lengths == 0, np.nan, total), mean, std
+
+
+# --- Model frames ---
+def regressor_frame(dataset):
+    """Long-format regressor data: one row per (project, year) with its cash flow amount."""
+    lengths = dataset.lengths
+    mask = np.arange(dataset.cash_flows.shape[1]) < lengths[:, None]
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    frame = dataset.projects[['Risk_Rating', 'Project_Type', 'Market_Condition']].iloc[rows].reset_index(drop=True)
+    frame['Year'] = np.nonzero(mask)[1] + 1
+    frame['Cash_Flow_Amount'] = dataset.cash_flows[mask]
+    return frame
+
+
+def select_projects(dataset, rows):
+    """The Dataset restricted to the given project rows (positions), renumbered from 0."""
+    return dataset._replace(projects=dataset.projects.iloc[rows].reset_index(drop=True),
+                            cash_flows=dataset.cash_flows[rows], lengths=dataset.lengths[rows])
+
+
+def classifier_frame(dataset):
+    """Projects with the Total_Cash_Inflows, Avg_Cash_Flow and CF_Volatility features added."""
+    total, mean, std = cash_flow_stats(dataset.cash_flows, dataset.lengths)
+    return dataset.projects.assign(Total_Cash_Inflows=total, Avg_Cash_Flow=mean, CF_Volatility=std)
+
+
+# --- Loading and cache ---
+def read_source(path):
+    """Raw DataFrame from an Excel, CSV or Parquet file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xls'):
+        return pd.read_excel(path)
+    if extension in ('.parquet', '.pq'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def cache_paths(path, cache_dir=None):
+    """(projects .parquet, cash flows .npz) cache files for a source file."""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), '.cache')
+    stem = os.path.join(cache_dir, os.path.basename(path))
+    return stem + '.parquet', stem + '.npz'
+
+
+def parse_dataset(raw, source_sha256=None):
+    """Dataset from a raw DataFrame with an Uneven_Cash_Flows column."""
+    cash_flows, lengths = parse_cash_flows(raw[CASH_FLOW_COLUMN])
+    return Dataset(raw.drop(columns=CASH_FLOW_COLUMN), cash_flows, lengths, source_sha256)
+
+
+def load_dataset(path=DEFAULT_DATASET_PATH, cache_dir=None, use_cache=True):
+    """Parsed dataset for `path`, from the cache when it was built from the same file contents."""
+    source_sha256 = file_sha256(path)
+    projects_path, arrays_path = cache_paths(path, cache_dir)
+    if use_cache and os.path.exists(projects_path) and os.path.exists(arrays_path):
+        with np.load(arrays_path) as arrays:
+            if str(arrays['source_sha256']) == source_sha256:
+                return Dataset(pd.read_parquet(projects_path), arrays['cash_flows'], arrays['lengths'],
+                               source_sha256)
+
+    dataset = parse_dataset(read_source(path), source_sha256)
+    if use_cache:
+        os.makedirs(os.path.dirname(projects_path), exist_ok=True)
+        dataset.projects.to_parquet(projects_path, index=False)
+        # Written last, so a cache interrupted mid-write never matches the hash
+        np.savez(arrays_path, cash_flows=dataset.cash_flows, lengths=dataset.lengths,
+                 source_sha256=np.array(source_sha256))
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse the dataset and refresh its cache.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--cache-dir")
+    args = parser.parse_args()
+
+    for label in ("first load", "second load"):
+        start = time.perf_counter()
+        dataset = load_dataset(args.path, args.cache_dir)
+        print(f"{label}: {time.perf_counter() - start:.3f} s")
+    print(f"{len(dataset.lengths):,} projects, up to {dataset.cash_flows.shape[1]} years, "
+          f"{int(np.sum(dataset.lengths == 0))} unparsed cash-flow lists")
+
+
+if __name__ == "__main__":
+    main()
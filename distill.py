@@ -0,0 +1,224 @@
+"""Find the smallest model that stays within a target of the current models' quality.
+
+The current pickles are the teachers. Candidates per model are smaller random
+forests (fewer trees, capped depth), gradient boosting and a linear surrogate,
+all as Pipeline(preprocessor -> estimator) so they load like the originals.
+
+- Regressor candidates are fitted on the training part of the real data; the target
+  is a holdout RMSE of at most (1 + --rmse-tolerance) x the teacher's.
+- Classifier candidates are distilled: fitted on the teacher's decisions over the
+  training part plus --transfer-rows synthetic projects (synthetic.py). The target is
+  a holdout accuracy of at least the teacher's minus --accuracy-tolerance.
+
+Candidates are ranked by pickled size and the smallest one meeting the target is
+written, with the cash flow table and a distill_report.json, to --output. Every
+candidate's holdout score, agreement with the teacher, pickled size, load time,
+memory allocated while loading and single-row/batch latency are reported. The app
+uses the distilled models with MODELS_DIR=models/distilled; its Monte Carlo mode
+needs a forest regressor (--kinds forest).
+
+    python distill.py --output models/distilled
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import (GradientBoostingClassifier, GradientBoostingRegressor, RandomForestClassifier,
+                              RandomForestRegressor)
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.pipeline import Pipeline
+
+from dataset import DEFAULT_DATASET_PATH, classifier_frame, load_dataset, parse_dataset
+from feature_encoder import encoded_pipeline
+from prediction_table import build_prediction_table, file_sha256
+from synthetic import fit_generator, generate
+from train import CATEGORICAL_FEATURES, MODELS, is_classifier, make_preprocessor, score, split_data
+
+
+CANDIDATES = {
+    'cash_flow_regressor': [
+        ('forest', RandomForestRegressor(random_state=42), {'n_estimators': [5, 10, 25, 50], 'max_depth': [4, 6, 8]}),
+        ('gradient boosting', GradientBoostingRegressor(random_state=42),
+         {'n_estimators': [25, 50, 100], 'max_depth': [2, 3]}),
+        ('linear', Ridge(), {'alpha': [1.0]}),
+    ],
+    'decision_classifier': [
+        ('forest', RandomForestClassifier(class_weight='balanced', random_state=42),
+         {'n_estimators': [10, 25, 50, 100], 'max_depth': [6, 8, 10, 14]}),
+        ('gradient boosting', GradientBoostingClassifier(random_state=42),
+         {'n_estimators': [50, 100, 200], 'max_depth': [2, 3]}),
+        ('linear', LogisticRegression(max_iter=2000), {'C': [0.1, 1.0, 10.0]}),
+    ],
+}
+
+
+def candidates(name, kinds=None):
+    """(kind, params, unfitted estimator) for every configuration of a model's candidate space."""
+    for kind, estimator, space in CANDIDATES[name]:
+        if kinds is not None and kind not in kinds:
+            continue
+        for values in itertools.product(*space.values()):
+            params = dict(zip(space, values))
+            yield kind, params, clone(estimator).set_params(**params)
+
+
+def make_pipeline(name, estimator):
+    spec = MODELS[name]
+    return Pipeline(steps=[('preprocessor', make_preprocessor(spec['numeric_features'])), (spec['step'], estimator)])
+
+
+def transfer_set(dataset, model_data, teacher, n_rows, seed=0):
+    """Training inputs plus n_rows synthetic projects, labelled by the teacher classifier."""
+    X = model_data['X_train']
+    if n_rows:
+        synthetic = pd.concat(generate(fit_generator(dataset), n_rows, seed=seed), ignore_index=True)
+        X = pd.concat([X, classifier_frame(parse_dataset(synthetic))[X.columns]], ignore_index=True)
+    return X, teacher.predict(X)
+
+
+# --- Measurements ---
+def measure(name, pipeline, X_sample, repeat=200):
+    """Pickled size, load time, memory allocated by loading and latency of a fitted pipeline.
+
+    Latency is through `encoded_pipeline` with a one-row mapping, as the app calls it.
+    """
+    buffer = io.BytesIO()
+    joblib.dump(pipeline, buffer)
+    payload = buffer.getvalue()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    loaded = joblib.load(io.BytesIO(payload))
+    load_ms = (time.perf_counter() - start) * 1000
+    _, load_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    model = encoded_pipeline(loaded)
+    method = model.predict_proba if is_classifier(name) else model.predict
+    row = {column: X_sample[column].iloc[0] for column in X_sample.columns}
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        method(row)
+        times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    method(X_sample)
+    batch_s = time.perf_counter() - start
+    return {'size_mb': len(payload) / 1e6, 'load_ms': load_ms, 'load_memory_mb': load_peak / 1e6,
+            'latency_ms': float(np.median(times) * 1000), 'rows_per_s': len(X_sample) / batch_s}
+
+
+def evaluate(name, pipeline, teacher, model_data, X_sample, teacher_sample):
+    """Holdout score, agreement/fidelity with the teacher and the measure() figures."""
+    result = {'holdout_score': score(name, model_data['y_test'], pipeline.predict(model_data['X_test']))}
+    predictions = pipeline.predict(X_sample)
+    if is_classifier(name):
+        result['teacher_agreement'] = float(np.mean(predictions == teacher_sample))
+    else:
+        result['teacher_rmse'] = float(np.sqrt(np.mean((predictions - teacher_sample) ** 2)))
+    result.update(measure(name, pipeline, X_sample))
+    return result
+
+
+def meets_target(name, result, teacher_result, rmse_tolerance, accuracy_tolerance):
+    if is_classifier(name):
+        return result['holdout_score'] >= teacher_result['holdout_score'] - accuracy_tolerance
+    return result['holdout_score'] <= teacher_result['holdout_score'] * (1 + rmse_tolerance)
+
+
+def distill(name, teacher, dataset, model_data, transfer_rows=20000, rmse_tolerance=0.01,
+            accuracy_tolerance=0.01, kinds=None):
+    """(chosen pipeline, report) for one model; `kinds` limits the candidate kinds."""
+    if is_classifier(name):
+        X_fit, y_fit = transfer_set(dataset, model_data, teacher, transfer_rows)
+        X_sample = X_fit.iloc[-10000:]
+    else:
+        X_fit, y_fit = model_data['X_train'], model_data['y_train']
+        # Every regressor input: categories x years 1-10
+        spec = MODELS[name]
+        encoder = teacher.named_steps['preprocessor'].named_transformers_['cat']
+        grid = np.meshgrid(*encoder.categories_, np.arange(1, 11), indexing='ij')
+        X_sample = pd.DataFrame({column: values.ravel() for column, values
+                                 in zip(CATEGORICAL_FEATURES + spec['numeric_features'], grid)})
+        X_sample = X_sample.astype({'Year': int})[X_fit.columns]
+    teacher_sample = teacher.predict(X_sample)
+
+    teacher_result = evaluate(name, teacher, teacher, model_data, X_sample, teacher_sample)
+    results = []
+    for kind, params, estimator in candidates(name, kinds):
+        pipeline = make_pipeline(name, estimator)
+        start = time.perf_counter()
+        pipeline.fit(X_fit, y_fit)
+        result = {'kind': kind, 'params': params, 'fit_s': time.perf_counter() - start}
+        result.update(evaluate(name, pipeline, teacher, model_data, X_sample, teacher_sample))
+        result['meets_target'] = meets_target(name, result, teacher_result, rmse_tolerance, accuracy_tolerance)
+        results.append((result, pipeline))
+
+    results.sort(key=lambda item: item[0]['size_mb'])
+    passing = [item for item in results if item[0]['meets_target']]
+    chosen, pipeline = passing[0] if passing else (None, teacher)
+    return pipeline, {'teacher': teacher_result, 'chosen': chosen, 'candidates': [r for r, _ in results]}
+
+
+def print_report(name, report):
+    metric = 'accuracy' if is_classifier(name) else 'RMSE'
+    fidelity = 'teacher_agreement' if is_classifier(name) else 'teacher_rmse'
+    print(f"\n{name} (holdout {metric}; + = meets target, > = chosen)")
+    print(f"   {'candidate':<56} {metric:>10} {'fidelity':>9} {'MB':>7} {'load ms':>8} "
+          f"{'load MB':>8} {'1-row ms':>8} {'rows/s':>10}")
+    rows = [('teacher', report['teacher'])] + [(f"{r['kind']} {r['params']}", r) for r in report['candidates']]
+    for label, r in rows:
+        mark = ('>' if r is report['chosen'] else ' ') + ('+' if r.get('meets_target') else ' ')
+        print(f"{mark} {label:<56} {r['holdout_score']:>10,.4f} {r[fidelity]:>9,.4f} {r['size_mb']:>7.3f} "
+              f"{r['load_ms']:>8.2f} {r['load_memory_mb']:>8.2f} {r['latency_ms']:>8.3f} {r['rows_per_s']:>10,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the models into the smallest ones meeting a quality target.")
+    parser.add_argument("--data", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--models-dir", default="models", help="directory with the teacher pickles")
+    parser.add_argument("--output", default="models/distilled")
+    parser.add_argument("--rmse-tolerance", type=float, default=0.01,
+                        help="allowed relative holdout RMSE increase over the teacher regressor")
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.01,
+                        help="allowed holdout accuracy drop from the teacher classifier")
+    parser.add_argument("--transfer-rows", type=int, default=20000,
+                        help="synthetic projects labelled by the teacher classifier")
+    parser.add_argument("--kinds", nargs="+", choices=["forest", "gradient boosting", "linear"],
+                        help="candidate kinds to try (default all); only forests keep Monte Carlo mode")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.data)
+    data = split_data(dataset)
+    os.makedirs(args.output, exist_ok=True)
+    report = {'dataset_sha256': dataset.source_sha256, 'rmse_tolerance': args.rmse_tolerance,
+              'accuracy_tolerance': args.accuracy_tolerance, 'transfer_rows': args.transfer_rows,
+              'kinds': args.kinds, 'models': {}}
+    for name in MODELS:
+        teacher = joblib.load(os.path.join(args.models_dir, f'{name}.pkl'))
+        pipeline, model_report = distill(name, teacher, dataset, data[name], args.transfer_rows,
+                                         args.rmse_tolerance, args.accuracy_tolerance, args.kinds)
+        print_report(name, model_report)
+        if model_report['chosen'] is None:
+            print("No candidate met the target; keeping the teacher")
+        joblib.dump(pipeline, os.path.join(args.output, f'{name}.pkl'))
+        report['models'][name] = model_report
+
+    regressor_path = os.path.join(args.output, 'cash_flow_regressor.pkl')
+    build_prediction_table(joblib.load(regressor_path), file_sha256(regressor_path)).save(
+        os.path.join(args.output, 'cash_flow_table.npz'))
+    with open(os.path.join(args.output, 'distill_report.json'), 'w') as file:
+        json.dump(report, file, indent=2, default=str)
+    print(f"\nWrote {args.output}; run the app on it with MODELS_DIR={args.output}")
+
+
+if __name__ == "__main__":
+    main()
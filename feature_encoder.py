@@ -0,0 +1,98 @@
+"""Encode raw model inputs straight into the forests' numeric feature matrix.
+
+The pickled pipelines encode with a ColumnTransformer(StandardScaler, OneHotEncoder)
+that expects a DataFrame. For the app's 1-10 row inputs, building that DataFrame
+costs more than the trees, so `FeatureEncoder` applies the fitted scaler and one-hot
+parameters to plain NumPy arrays instead.
+"""
+import numpy as np
+
+
+class FeatureEncoder:
+    """Scaled numeric columns followed by one-hot columns, like the fitted ColumnTransformer.
+
+    Unknown categories encode to all zeros (handle_unknown='ignore'). The output is
+    float32, the dtype the trees compare in, so the estimators skip their own cast.
+    """
+
+    def __init__(self, numeric_features, scale_mean, scale_scale, categorical_features, categories):
+        self.numeric_features = list(numeric_features)
+        self.scale_mean = np.asarray(scale_mean, dtype=float)
+        self.scale_scale = np.asarray(scale_scale, dtype=float)
+        self.categorical_features = list(categorical_features)
+        self.categories = [np.asarray(c, dtype=str) for c in categories]
+        self.n_features = len(self.numeric_features) + sum(len(c) for c in self.categories)
+        self._columns = []
+        column = len(self.numeric_features)
+        for categories in self.categories:
+            self._columns.append({category: column + code for code, category in enumerate(categories)})
+            column += len(categories)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Read the fitted parameters of a Pipeline(ColumnTransformer -> estimator)."""
+        preprocessor = pipeline.steps[0][1]
+        transformers = {name: (transformer, list(columns)) for name, transformer, columns in preprocessor.transformers_
+                        if name != "remainder"}
+        if set(transformers) != {"num", "cat"}:
+            raise ValueError(f"Expected 'num' and 'cat' transformers, got {sorted(transformers)}")
+        scaler, numeric_features = transformers["num"]
+        encoder, categorical_features = transformers["cat"]
+        if encoder.drop is not None or encoder.handle_unknown != "ignore":
+            raise ValueError("Only OneHotEncoder(handle_unknown='ignore') without drop is supported")
+        return cls(numeric_features,
+                   scaler.mean_ if scaler.with_mean else np.zeros(len(numeric_features)),
+                   scaler.scale_ if scaler.with_std else np.ones(len(numeric_features)),
+                   categorical_features,
+                   [[str(c) for c in categories] for categories in encoder.categories_])
+
+    def transform(self, X):
+        """Feature matrix for `X`, a DataFrame or a mapping of column name -> scalar or sequence.
+
+        Numeric columns may hold numeric strings, as the app used to pass them.
+        """
+        numeric = np.column_stack([np.atleast_1d(np.asarray(X[name], dtype=float)) for name in self.numeric_features])
+        n_rows = numeric.shape[0]
+        features = np.zeros((n_rows, self.n_features), dtype=np.float32)
+        features[:, :numeric.shape[1]] = (numeric - self.scale_mean) / self.scale_scale
+
+        for name, categories, columns in zip(self.categorical_features, self.categories, self._columns):
+            values = X[name]
+            if np.ndim(values) == 0:
+                values = [values] * n_rows
+            if n_rows <= 64:
+                # Dictionary lookups beat array searches for the app's handful of rows
+                for row, value in enumerate(values):
+                    column = columns.get(str(value))
+                    if column is not None:
+                        features[row, column] = 1
+            else:
+                values = np.asarray(values, dtype=str)
+                codes = np.clip(np.searchsorted(categories, values), 0, len(categories) - 1)
+                known = np.flatnonzero(categories[codes] == values)
+                features[known, columns[categories[0]] + codes[known]] = 1
+        return features
+
+
+class EncodedPipeline:
+    """A fitted pipeline whose predict/predict_proba encode with FeatureEncoder and call the bare estimator."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.encoder = FeatureEncoder.from_pipeline(pipeline)
+        self.estimator = pipeline.steps[-1][1]
+        self.classes_ = getattr(self.estimator, "classes_", None)
+
+    def predict(self, X):
+        return self.estimator.predict(self.encoder.transform(X))
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(self.encoder.transform(X))
+
+
+def encoded_pipeline(pipeline):
+    """Wrap `pipeline` in EncodedPipeline, or return it unchanged if its preprocessing is not supported."""
+    try:
+        return EncodedPipeline(pipeline)
+    except (AttributeError, ValueError):
+        return pipeline
@@ -0,0 +1,269 @@
+"""Array-backed runtime for the scikit-learn forest pipelines.
+
+`export_pipeline` flattens a fitted Pipeline(ColumnTransformer -> RandomForest*) into
+a directory of contiguous .npy arrays plus a small meta.json; `load_forest` reads it
+back as a `CompiledForest` that predicts with plain NumPy, without scikit-learn.
+The arrays are memory-mapped read-only by default, so every process on a host that
+loads the same directory shares one page-cache copy instead of its own unpickled
+forest.
+
+    python forest_runtime.py export models/cash_flow_regressor.pkl models/cash_flow_regressor.forest
+    python forest_runtime.py check models/cash_flow_regressor.pkl models/cash_flow_regressor.forest
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from feature_encoder import FeatureEncoder, encoded_pipeline
+
+
+ARRAY_NAMES = ["scale_mean", "scale_scale", "roots", "feature", "threshold", "children", "value"]
+
+
+class CompiledForest:
+    """Preprocessing parameters and flattened trees of one pipeline.
+
+    All trees are concatenated into single node arrays; `roots` holds each tree's
+    first node and `children[2 * node + go_right]` its successors. Leaves point to
+    themselves, so walking every tree `max_depth` steps lands each (tree, row) pair
+    on its leaf without per-tree Python loops.
+    """
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.numeric_features = meta["numeric_features"]
+        self.categorical_features = meta["categorical_features"]
+        self.categories = [np.asarray(c, dtype=str) for c in meta["categories"]]
+        self.max_depth = meta["max_depth"]
+        self.classes_ = np.asarray(meta["classes"], dtype=object) if meta["classes"] is not None else None
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.encoder = FeatureEncoder(self.numeric_features, self.scale_mean, self.scale_scale,
+                                      self.categorical_features, self.categories)
+
+    @property
+    def is_classifier(self):
+        return self.classes_ is not None
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def transform(self, X):
+        """Feature matrix for a DataFrame or a mapping of column name -> values (see FeatureEncoder)."""
+        return self.encoder.transform(X)
+
+    def leaves(self, features, chunk_size=2048):
+        """(n_trees x n_rows) leaf node index of every row in every tree.
+
+        Rows are walked in chunks with preallocated buffers; each step is four
+        gathers over all (tree, row) pairs of the chunk.
+        """
+        n_rows, n_features = features.shape
+        n_trees = self.roots.size
+        out = np.empty((n_trees, n_rows), dtype=np.intp)
+        for start in range(0, n_rows, chunk_size):
+            block = np.asarray(features[start:start + chunk_size], dtype=self.threshold.dtype)
+            flat = block.ravel()
+            size = block.shape[0]
+            row_offsets = np.tile(np.arange(size, dtype=np.intp) * n_features, n_trees)
+            node = np.repeat(self.roots, size)
+            index = np.empty_like(node)
+            x = np.empty(node.size, dtype=block.dtype)
+            threshold = np.empty(node.size, dtype=block.dtype)
+            go_right = np.empty(node.size, dtype=bool)
+            for _ in range(self.max_depth):
+                np.take(self.feature, node, out=index, mode="clip")
+                index += row_offsets
+                np.take(flat, index, out=x, mode="clip")
+                np.take(self.threshold, node, out=threshold, mode="clip")
+                np.greater(x, threshold, out=go_right)
+                node <<= 1
+                node += go_right
+                np.take(self.children, node, out=node, mode="clip")
+            out[:, start:start + size] = node.reshape(n_trees, size)
+        return out
+
+    def leaf_values(self, features):
+        """(n_trees x n_rows x n_outputs) leaf values for an already transformed matrix."""
+        return self.value[self.leaves(features)]
+
+    def predict(self, X):
+        if self.is_classifier:
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        return self.leaf_values(self.transform(X))[:, :, 0].mean(axis=0)
+
+    def predict_proba(self, X):
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifier forests")
+        return self.leaf_values(self.transform(X)).mean(axis=0)
+
+
+# --- Export ---
+def flatten_trees(forest, dtype="float64"):
+    """Concatenated node arrays of a fitted sklearn forest, in the CompiledForest layout.
+
+    Leaves point to themselves with an infinite threshold; classifier leaf values are
+    normalized to class probabilities.
+    """
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    sizes = np.array([tree.node_count for tree in trees])
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+
+    feature, threshold, children, value = [], [], [], []
+    for root, tree in zip(roots, trees):
+        own = np.arange(tree.node_count) + root
+        leaf = tree.children_left == -1
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        children.append(np.column_stack([np.where(leaf, own, tree.children_left + root),
+                                         np.where(leaf, own, tree.children_right + root)]))
+        node_value = tree.value[:, 0, :]
+        if hasattr(forest, "classes_"):
+            node_value = node_value / node_value.sum(axis=1, keepdims=True)
+        value.append(node_value)
+
+    return {
+        "roots": roots,
+        "feature": np.concatenate(feature).astype(np.intp),
+        "threshold": np.concatenate(threshold).astype(dtype),
+        "children": np.concatenate(children).astype(np.intp).ravel(),
+        "value": np.concatenate(value).astype(dtype),
+    }
+
+
+def pipeline_arrays(pipeline, dtype="float64", source_sha256=None):
+    """(meta, arrays) of a fitted Pipeline(ColumnTransformer -> RandomForest*), as `export_pipeline` writes them."""
+    encoder = FeatureEncoder.from_pipeline(pipeline)
+    forest = pipeline.steps[-1][1]
+
+    arrays = {
+        "scale_mean": encoder.scale_mean,
+        "scale_scale": encoder.scale_scale,
+        **flatten_trees(forest, dtype),
+    }
+    meta = {
+        "numeric_features": encoder.numeric_features,
+        "categorical_features": encoder.categorical_features,
+        "categories": [c.tolist() for c in encoder.categories],
+        "classes": [str(c) for c in forest.classes_] if hasattr(forest, "classes_") else None,
+        "max_depth": int(max(estimator.tree_.max_depth for estimator in forest.estimators_)),
+        "n_trees": len(forest.estimators_),
+        "dtype": str(np.dtype(dtype)),
+        "source_sha256": source_sha256,
+    }
+    return meta, arrays
+
+
+def compile_pipeline(pipeline, dtype="float64"):
+    """In-memory CompiledForest of a fitted forest pipeline, without writing it to disk."""
+    meta, arrays = pipeline_arrays(pipeline, dtype)
+    return CompiledForest(meta, arrays)
+
+
+def export_pipeline(pipeline, path, dtype="float64", source_sha256=None):
+    """Write the fitted pipeline's preprocessing and trees to `path` as .npy arrays.
+
+    `source_sha256` records which pickle the arrays came from, so `load_model` can
+    tell when they are stale.
+    """
+    meta, arrays = pipeline_arrays(pipeline, dtype, source_sha256)
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(path, "meta.json"), "w") as file:
+        json.dump(meta, file, indent=2)
+    return meta
+
+
+def load_forest(path, mmap_mode="r"):
+    """Load a directory written by `export_pipeline`, memory-mapping its arrays unless mmap_mode=None."""
+    with open(os.path.join(path, "meta.json")) as file:
+        meta = json.load(file)
+    # np.asarray drops the memmap subclass (no copy) so the hot loops see plain ndarrays
+    arrays = {name: np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode))
+              for name in ARRAY_NAMES}
+    return CompiledForest(meta, arrays)
+
+
+def load_model(name, models_dir="models", mmap_mode="r", use_forest=True):
+    """Load `<name>.forest` when it was exported from the current `<name>.pkl`, else the pickle.
+
+    The array directory is also used on its own when the pickle is absent; with
+    use_forest=False it is ignored. A pickled pipeline is wrapped in EncodedPipeline,
+    so both kinds take raw inputs as a DataFrame or a plain mapping.
+    """
+    from prediction_table import file_sha256
+
+    pickle_path = os.path.join(models_dir, f"{name}.pkl")
+    forest_path = os.path.join(models_dir, f"{name}.forest")
+    if use_forest and os.path.isdir(forest_path):
+        forest = load_forest(forest_path, mmap_mode)
+        if not os.path.exists(pickle_path) or forest.meta.get("source_sha256") == file_sha256(pickle_path):
+            return forest
+
+    import joblib
+
+    return encoded_pipeline(joblib.load(pickle_path))
+
+
+# --- Equivalence Check ---
+def sample_inputs(forest, n_rows=20000, seed=0):
+    """Random raw inputs around the training distribution recorded by the scaler."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for name, mean, scale in zip(forest.numeric_features, forest.scale_mean, forest.scale_scale):
+        data[name] = rng.normal(mean, 1.5 * scale, n_rows)
+    if forest.numeric_features == ["Year"]:
+        data["Year"] = rng.integers(1, 11, n_rows)
+    for name, categories in zip(forest.categorical_features, forest.categories):
+        data[name] = rng.choice(categories, n_rows)
+    return data
+
+
+def check_equivalence(pipeline, forest, n_rows=20000):
+    """Largest absolute difference between the pipeline and the compiled forest."""
+    import pandas as pd
+
+    X = pd.DataFrame(sample_inputs(forest, n_rows)).astype(str)
+    if forest.is_classifier:
+        return float(np.max(np.abs(pipeline.predict_proba(X) - forest.predict_proba(X))))
+    return float(np.max(np.abs(pipeline.predict(X) - forest.predict(X))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or check an array-backed forest.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="flatten a pickled pipeline into a .npy directory")
+    export.add_argument("model")
+    export.add_argument("output")
+    export.add_argument("--float32", action="store_true", help="store thresholds and leaf values as float32")
+    check = sub.add_parser("check", help="compare a .npy directory with its pickled pipeline")
+    check.add_argument("model")
+    check.add_argument("forest")
+    check.add_argument("--rows", type=int, default=20000)
+    check.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    import joblib
+
+    from prediction_table import file_sha256
+
+    pipeline = joblib.load(args.model)
+    if args.command == "export":
+        meta = export_pipeline(pipeline, args.output, "float32" if args.float32 else "float64",
+                               file_sha256(args.model))
+        print(f"Exported {meta['n_trees']} trees (max depth {meta['max_depth']}) to {args.output}")
+        return 0
+
+    forest = load_forest(args.forest)
+    difference = check_equivalence(pipeline, forest, args.rows)
+    print(f"max abs difference over {args.rows} rows: {difference:.3e}")
+    return 0 if difference <= args.tolerance else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
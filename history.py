@@ -0,0 +1,251 @@
+"""Persistent analysis history in SQLite, written in batches off the UI thread.
+
+`HistoryStore.record` only puts the analysis on a queue. A writer thread drains it and
+inserts up to `batch_size` analyses per transaction into two tables:
+
+- `analyses`: one row per analysis (inputs, cash flows as JSON, NPV/IRR/PI/payback,
+  decision, confidence, model version, stage timings), indexed on project type, risk
+  rating and decision (each with the time) and on the time, so filtered "latest N"
+  listings read only the rows they return;
+- `analysis_rollup`: counts and sums per (day, project type, risk rating, market
+  condition, decision), upserted in the same transaction, so aggregates over any
+  filter read a few hundred rows per day of history instead of every analysis.
+
+    python history.py --db analysis_history.sqlite3 --type Tech --decision accept
+"""
+import argparse
+import atexit
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    day TEXT NOT NULL,
+    initial_cost REAL, discount_rate REAL, duration_years INTEGER, periods_per_year INTEGER DEFAULT 1,
+    risk_rating TEXT, project_type TEXT, market_condition TEXT,
+    cash_flows TEXT,
+    npv REAL, irr REAL, pi REAL, payback_period REAL,
+    decision TEXT, confidence REAL,
+    model_version TEXT,
+    cached INTEGER,
+    analysis_ms REAL,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created);
+CREATE INDEX IF NOT EXISTS analyses_type ON analyses (project_type, created);
+CREATE INDEX IF NOT EXISTS analyses_risk ON analyses (risk_rating, created);
+CREATE INDEX IF NOT EXISTS analyses_decision ON analyses (decision, created);
+CREATE TABLE IF NOT EXISTS analysis_rollup (
+    day TEXT, project_type TEXT, risk_rating TEXT, market_condition TEXT, decision TEXT,
+    n INTEGER, npv_sum REAL, pi_sum REAL, confidence_sum REAL, irr_sum REAL, irr_n INTEGER, analysis_ms_sum REAL,
+    PRIMARY KEY (day, project_type, risk_rating, market_condition, decision)
+) WITHOUT ROWID;
+"""
+
+COLUMNS = ['created', 'day', 'initial_cost', 'discount_rate', 'duration_years', 'periods_per_year', 'risk_rating',
+           'project_type', 'market_condition', 'cash_flows', 'npv', 'irr', 'pi', 'payback_period', 'decision', 'confidence',
+           'model_version', 'cached', 'analysis_ms', 'timings']
+FILTERS = {'project_types': 'project_type', 'risk_ratings': 'risk_rating',
+           'market_conditions': 'market_condition', 'decisions': 'decision'}
+GROUPS = ['day', 'project_type', 'risk_rating', 'market_condition', 'decision']
+
+
+def _finite(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def to_row(analysis):
+    """Column values of one analysis mapping (the keys of COLUMNS; day is derived from created)."""
+    created = analysis.get('created') or time.time()
+    return (created, datetime.fromtimestamp(created).strftime('%Y-%m-%d'),
+            float(analysis['initial_cost']), float(analysis['discount_rate']), int(analysis['duration_years']),
+            int(analysis.get('periods_per_year', 1)),
+            analysis['risk_rating'], analysis['project_type'], analysis['market_condition'],
+            json.dumps([round(float(value), 2) for value in analysis['cash_flows']]),
+            _finite(analysis['npv']), _finite(analysis['irr']), _finite(analysis['pi']),
+            _finite(analysis['payback_period']), analysis['decision'], float(analysis['confidence']),
+            analysis.get('model_version'), int(bool(analysis.get('cached'))),
+            analysis.get('analysis_ms'), json.dumps(analysis.get('timings') or {}))
+
+
+def where_clause(filters, on_day=False):
+    """(SQL condition, parameters) for filters: FILTERS lists plus 'start'/'end' dates (inclusive).
+
+    On the rollup table dates compare against `day`; on analyses against `created`.
+    """
+    conditions, parameters = [], []
+    for key, column in FILTERS.items():
+        values = (filters or {}).get(key)
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            parameters += list(values)
+    for key, operator in (('start', '>='), ('end', '<=')):
+        value = (filters or {}).get(key)
+        if value is None:
+            continue
+        if on_day:
+            conditions.append(f"day {operator} ?")
+            parameters.append(value.strftime('%Y-%m-%d'))
+        else:
+            bound = datetime.combine(value, datetime.min.time()).timestamp() + (86400 if key == 'end' else 0)
+            conditions.append("created >= ?" if key == 'start' else "created < ?")
+            parameters.append(bound)
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", parameters
+
+
+class HistoryStore:
+    """Analysis history in the SQLite file at `path`, written by a background thread.
+
+    Queries open their own connection, so any thread can read while the writer runs
+    (the database is in WAL mode).
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.write_seconds = 0.0
+        self.last_error = None
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            # Databases created before monthly periods lack the column
+            if 'periods_per_year' not in {row[1] for row in connection.execute("PRAGMA table_info(analyses)")}:
+                connection.execute("ALTER TABLE analyses ADD COLUMN periods_per_year INTEGER DEFAULT 1")
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush, 5.0)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # --- Writing ---
+    def record(self, analysis):
+        """Queue one analysis mapping for writing; never blocks."""
+        self._queue.put(analysis)
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is written; False on timeout."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        connection = self._connect()
+        while True:
+            batch, markers = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                (markers if isinstance(item, threading.Event) else batch).append(item)
+                if markers or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.write(connection, batch)
+                except Exception as e:
+                    self.last_error = f"{type(e).__name__}: {e}"
+            for marker in markers:
+                marker.set()
+
+    def write(self, connection, analyses):
+        """Insert analyses and update the rollup in one transaction."""
+        start = time.perf_counter()
+        rows = [to_row(analysis) for analysis in analyses]
+        rollup = {}
+        for row in rows:
+            values = dict(zip(COLUMNS, row))
+            key = tuple(values[column] for column in GROUPS)
+            n, npv, pi, confidence, irr, irr_n, analysis_ms = rollup.get(key, (0, 0.0, 0.0, 0.0, 0.0, 0, 0.0))
+            rollup[key] = (n + 1, npv + (values['npv'] or 0.0), pi + (values['pi'] or 0.0),
+                           confidence + values['confidence'], irr + (values['irr'] or 0.0),
+                           irr_n + (values['irr'] is not None), analysis_ms + (values['analysis_ms'] or 0.0))
+        with connection:
+            connection.executemany(
+                f"INSERT INTO analyses ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+            connection.executemany(
+                "INSERT INTO analysis_rollup VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT DO UPDATE SET n = n + excluded.n, npv_sum = npv_sum + excluded.npv_sum, "
+                "pi_sum = pi_sum + excluded.pi_sum, confidence_sum = confidence_sum + excluded.confidence_sum, "
+                "irr_sum = irr_sum + excluded.irr_sum, irr_n = irr_n + excluded.irr_n, "
+                "analysis_ms_sum = analysis_ms_sum + excluded.analysis_ms_sum",
+                [key + values for key, values in rollup.items()])
+        self.written += len(rows)
+        self.write_seconds += time.perf_counter() - start
+
+    # --- Queries ---
+    def aggregate(self, filters=None, group_by=()):
+        """Count, accept share and averages of the filtered analyses, per group_by columns (from the rollup)."""
+        groups = [column for column in group_by if column in GROUPS]
+        where, parameters = where_clause(filters, on_day=True)
+        select = ", ".join(groups + [
+            "SUM(n) AS analyses",
+            "SUM(CASE WHEN decision = 'accept' THEN n ELSE 0 END) * 1.0 / SUM(n) AS accept_share",
+            "SUM(npv_sum) / SUM(n) AS avg_npv", "SUM(pi_sum) / SUM(n) AS avg_pi",
+            "SUM(irr_sum) / NULLIF(SUM(irr_n), 0) AS avg_irr", "SUM(confidence_sum) / SUM(n) AS avg_confidence",
+            "SUM(analysis_ms_sum) / SUM(n) AS avg_analysis_ms"])
+        group = f" GROUP BY {', '.join(groups)} ORDER BY {', '.join(groups)}" if groups else ""
+        return self._query(f"SELECT {select} FROM analysis_rollup{where}{group}", parameters)
+
+    def recent(self, filters=None, limit=100):
+        """The latest `limit` filtered analyses, newest first."""
+        where, parameters = where_clause(filters)
+        return self._query(f"SELECT id, {', '.join(COLUMNS)} FROM analyses{where} ORDER BY created DESC LIMIT ?",
+                           parameters + [limit])
+
+    def _query(self, sql, parameters):
+        """List of row dicts."""
+        connection = self._connect()
+        try:
+            cursor = connection.execute(sql, parameters)
+            names = [description[0] for description in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+        finally:
+            connection.close()
+
+
+def history_from_env():
+    """HistoryStore at HISTORY_DB (default analysis_history.sqlite3), or None when HISTORY_DB is empty."""
+    path = os.environ.get('HISTORY_DB', 'analysis_history.sqlite3')
+    return HistoryStore(path) if path else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the analysis history.")
+    parser.add_argument("--db", default=os.environ.get('HISTORY_DB', 'analysis_history.sqlite3'))
+    parser.add_argument("--type", nargs="+", dest="project_types")
+    parser.add_argument("--risk", nargs="+", dest="risk_ratings")
+    parser.add_argument("--decision", nargs="+", dest="decisions")
+    parser.add_argument("--group-by", nargs="+", default=["decision"], choices=GROUPS)
+    parser.add_argument("--limit", type=int, default=10, help="latest analyses to list")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    filters = {key: getattr(args, key) for key in ('project_types', 'risk_ratings', 'decisions')}
+    for row in store.aggregate(filters, args.group_by):
+        print(row)
+    for row in store.recent(filters, args.limit):
+        print(row['id'], datetime.fromtimestamp(row['created']).isoformat(timespec='seconds'), row['project_type'],
+              row['risk_rating'], row['decision'], f"NPV {row['npv']:,.0f}", row['model_version'])
+
+
+if __name__ == "__main__":
+    main()
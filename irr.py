@@ -0,0 +1,106 @@
+from collections import namedtuple
+
+import numpy as np
+
+
+IRRResult = namedtuple("IRRResult", ["rate", "converged", "no_root"])
+IRRResult.__doc__ = """Batched IRR solution.
+
+rate      -- solved IRR per vector as a fraction (NaN where unsolved)
+converged -- True where a root was found, by Newton or by bisection
+no_root   -- True where NPV does not change sign on the search bracket
+"""
+
+# Up to this many cash-flow cells, NPVs are evaluated from a matrix of powers rather than by Horner's rule
+POWERS_MAX_ELEMENTS = 1 << 16
+
+
+# --- Batched IRR Solver ---
+def solve_irr(cash_flows, guess=0.1, tol=1e-10, maxiter=50, bracket=(-0.99, 10.0), bisect_iter=100):
+    """Solve the IRR of many cash-flow vectors at once.
+
+    `cash_flows` is a 1-D vector or an (N x T+1) matrix whose first column is the
+    period-0 flow (the signed initial cost), as for `npf.irr`. Trailing zeros do
+    not change a vector's NPV, so ragged inputs can be zero-padded.
+
+    Every row first takes vectorized Newton steps from `guess`. Rows where Newton
+    diverges or stalls fall back to bisection on `bracket`; rows with no sign
+    change on the bracket are flagged `no_root` instead of being given a
+    made-up rate.
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    n_vectors = cash_flows.shape[0]
+    rate = np.full(n_vectors, np.nan)
+    converged = np.zeros(n_vectors, dtype=bool)
+    lower_limit = bracket[0]
+
+    # Newton iterations, shrinking to the rows still moving
+    active = np.arange(n_vectors)
+    r = np.full(n_vectors, float(guess))
+    for _ in range(maxiter):
+        if active.size == 0:
+            break
+        npv, slope = _npv_and_slope(cash_flows[active], r)
+        step = np.divide(npv, slope, out=np.full(active.size, np.nan), where=slope != 0)
+        new_r = r - step
+
+        ok = np.isfinite(new_r) & (new_r > lower_limit)
+        done = ok & (np.abs(new_r - r) <= tol * np.maximum(1.0, np.abs(new_r)))
+        rate[active[done]] = new_r[done]
+        converged[active[done]] = True
+
+        keep = ok & ~done
+        active, r = active[keep], new_r[keep]
+
+    # Bisection for rows Newton could not settle
+    pending = np.flatnonzero(~converged)
+    no_root = np.zeros(n_vectors, dtype=bool)
+    if pending.size:
+        flows = cash_flows[pending]
+        lo = np.full(pending.size, float(bracket[0]))
+        hi = np.full(pending.size, float(bracket[1]))
+        f_lo = _npv_and_slope(flows, lo)[0]
+        f_hi = _npv_and_slope(flows, hi)[0]
+        has_root = np.sign(f_lo) != np.sign(f_hi)
+        no_root[pending[~has_root]] = True
+
+        flows, lo, hi, f_lo = flows[has_root], lo[has_root], hi[has_root], f_lo[has_root]
+        for _ in range(bisect_iter):
+            mid = (lo + hi) / 2
+            f_mid = _npv_and_slope(flows, mid)[0]
+            left = np.sign(f_mid) == np.sign(f_lo)
+            lo = np.where(left, mid, lo)
+            f_lo = np.where(left, f_mid, f_lo)
+            hi = np.where(left, hi, mid)
+            if np.all(hi - lo <= tol):
+                break
+
+        solved = pending[has_root]
+        rate[solved] = (lo + hi) / 2
+        converged[solved] = True
+
+    return IRRResult(rate, converged, no_root)
+
+
+def _npv_and_slope(cash_flows, rate):
+    """NPV of each row at its rate and dNPV/drate.
+
+    Large batches use Horner's rule in v = 1 / (1 + rate), one pass per period over all
+    rows. Small ones (e.g. a single 600-month vector) take the powers of v in one NumPy
+    call instead, where a Python loop over the periods would dominate.
+    """
+    v = 1 / (1 + rate)
+    if cash_flows.size <= POWERS_MAX_ELEMENTS:
+        t = np.arange(cash_flows.shape[1])
+        with np.errstate(over='ignore', invalid='ignore'):
+            # Capped so that zero flows times an overflowing power stay 0 rather than NaN
+            powers = np.minimum(v[:, None] ** t, np.finfo(float).max)
+            npv = np.einsum('ij,ij->i', cash_flows, powers)
+            derivative = np.einsum('ij,ij->i', cash_flows * t, powers)
+        return npv, -derivative * v
+    npv = np.zeros(cash_flows.shape[0])
+    derivative = np.zeros(cash_flows.shape[0])
+    for column in range(cash_flows.shape[1] - 1, -1, -1):
+        derivative = derivative * v + npv
+        npv = npv * v + cash_flows[:, column]
+    return npv, -derivative * v ** 2
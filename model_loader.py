@@ -0,0 +1,177 @@
+"""Load the app's models in the background and hot-reload new registry versions.
+
+`ModelStore.start` returns at once; a daemon thread imports pandas (the app only needs
+it once results are drawn) and loads the served model set: the registry's CURRENT
+version when there is one (see registry.py), otherwise the flat models directory.
+Unpickling a pipeline imports all of scikit-learn, which dominates a cold start when no
+`.forest` export exists.
+
+The thread then checks the registry's CURRENT file every poll interval, or when
+`request_reload` is called. A new version is loaded and hash-checked next to the served one, scored on the canary
+projects and, if it passes, swapped in by a single assignment: a script run that
+already took the old set finishes with it, the next run gets the new one.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from contextlib import nullcontext
+
+from registry import ModelSet, canary, current_version, load_version
+
+
+LoadedModels = namedtuple("LoadedModels", ["version", "regressor_model", "classifier_model", "cash_flow_table",
+                                           "errors", "warnings", "seconds"])
+LoadedModels.__doc__ = """A served model set (models None on failure) with error/warning messages and load seconds."""
+
+
+def flat_version(models_dir):
+    """Content hashes of the model files in a flat models directory."""
+    from prediction_table import file_sha256
+
+    digests = []
+    for name in ('cash_flow_regressor', 'decision_classifier'):
+        for path in (f'{models_dir}/{name}.pkl', f'{models_dir}/{name}.forest/meta.json'):
+            if os.path.exists(path):
+                digests.append(file_sha256(path)[:12])
+                break
+    return '-'.join(digests)
+
+
+def load_models(models_dir="models", tracer=None):
+    """LoadedModels for a flat models directory; failures are reported as messages rather than raised."""
+    from forest_runtime import load_model
+    from prediction_table import load_prediction_table
+
+    span = tracer.span if tracer is not None else (lambda name: nullcontext())
+    start = time.perf_counter()
+    errors, warnings = [], []
+    regressor_model = classifier_model = cash_flow_table = None
+    try:
+        with span('load_models'):
+            regressor_model = load_model('cash_flow_regressor', models_dir)
+            classifier_model = load_model('decision_classifier', models_dir)
+    except FileNotFoundError as e:
+        regressor_model = classifier_model = None
+        errors += [f"Model file not found: {e}",
+                   "Please ensure 'cash_flow_regressor.pkl' and 'decision_classifier.pkl' are in the same directory."]
+    except Exception as e:
+        regressor_model = classifier_model = None
+        errors.append(f"Error loading models: {e}")
+    try:
+        with span('load_cash_flow_table'):
+            cash_flow_table = load_prediction_table(os.path.join(models_dir, 'cash_flow_table.npz'),
+                                                    os.path.join(models_dir, 'cash_flow_regressor.pkl'))
+    except Exception as e:
+        warnings.append(f"Ignoring cash flow table: {e}")
+    return LoadedModels(flat_version(models_dir), regressor_model, classifier_model, cash_flow_table, errors,
+                        warnings, time.perf_counter() - start)
+
+
+class ModelStore:
+    """The model set being served, loaded on a background thread and swapped atomically on reload."""
+
+    def __init__(self, models_dir="models", registry_dir=None, tracer=None, poll_interval=0, min_agreement=0.8):
+        self.models_dir = models_dir
+        self.registry_dir = registry_dir
+        self.tracer = tracer
+        self.poll_interval = poll_interval
+        self.min_agreement = min_agreement
+        self.current = None
+        self.events = []
+        self.last_check = None
+        self._ready = Future()
+        self._rejected = None
+        self._wake = threading.Event()
+
+    @property
+    def ready(self):
+        return self._ready.done()
+
+    def get(self):
+        """The served LoadedModels, waiting for the first load if it is still running."""
+        self._ready.result()
+        return self.current
+
+    def start(self):
+        threading.Thread(target=self._run, name="model-loader", daemon=True).start()
+        return self
+
+    def request_reload(self):
+        """Check the registry now instead of at the next poll."""
+        self._wake.set()
+
+    def _span(self, name):
+        return self.tracer.span(name) if self.tracer is not None else nullcontext()
+
+    def _event(self, message):
+        self.events = (self.events + [(time.strftime('%H:%M:%S'), message)])[-20:]
+
+    def _run(self):
+        self._ready.set_running_or_notify_cancel()
+        try:
+            with self._span('import_pandas'):
+                import pandas  # noqa: F401
+            self.current = self._initial_load()
+            self._ready.set_result(self.current)
+        except BaseException as e:
+            self._ready.set_exception(e)
+            return
+        # Without a poll interval, only request_reload wakes the thread
+        while self.registry_dir:
+            self._wake.wait(self.poll_interval or None)
+            self._wake.clear()
+            self.check_registry()
+
+    def _initial_load(self):
+        served = current_version(self.registry_dir) if self.registry_dir else None
+        if served is not None:
+            start = time.perf_counter()
+            try:
+                with self._span('load_models'):
+                    model_set = load_version(self.registry_dir, served)
+                self._event(f"serving registry version {served}")
+                return LoadedModels(served, model_set.regressor_model, model_set.classifier_model,
+                                    model_set.cash_flow_table, [], [], time.perf_counter() - start)
+            except Exception as e:
+                self._event(f"registry version {served} failed to load ({e}); serving {self.models_dir}")
+                self._rejected = served
+                loaded = load_models(self.models_dir, self.tracer)
+                return loaded._replace(warnings=loaded.warnings + [f"Registry version {served} not loaded: {e}"])
+        loaded = load_models(self.models_dir, self.tracer)
+        self._event(f"serving {self.models_dir} ({loaded.version})")
+        return loaded
+
+    def check_registry(self):
+        """Load, canary and swap in the registry's CURRENT version if it is new; returns the served version."""
+        self.last_check = time.strftime('%H:%M:%S')
+        served = self.current
+        version = current_version(self.registry_dir)
+        if version is None or version == served.version or version == self._rejected:
+            return served.version
+        start = time.perf_counter()
+        try:
+            with self._span('reload_models'):
+                candidate = load_version(self.registry_dir, version)
+                result = canary(candidate, _as_model_set(served), self.min_agreement)
+        except Exception as e:
+            self._rejected = version
+            self._event(f"version {version} rejected: {e}")
+            return served.version
+        if not result.passed:
+            self._rejected = version
+            self._event(f"version {version} rejected by canary: {'; '.join(result.problems)}")
+            return served.version
+        self.current = LoadedModels(version, candidate.regressor_model, candidate.classifier_model,
+                                    candidate.cash_flow_table, [], [], time.perf_counter() - start)
+        agreement = f", {result.agreement:.0%} decision agreement" if result.agreement is not None else ""
+        self._event(f"swapped in version {version} (canary passed{agreement}) replacing {served.version}")
+        return version
+
+
+def _as_model_set(loaded):
+    """The served LoadedModels as a ModelSet to canary against, or None if its models failed to load."""
+    if loaded.regressor_model is None or loaded.classifier_model is None:
+        return None
+    return ModelSet(loaded.version, loaded.regressor_model, loaded.classifier_model, loaded.cash_flow_table, None)
@@ -0,0 +1,134 @@
+"""Batch version of the app's analysis: regressor -> financial metrics -> classifier."""
+import numpy as np
+import pandas as pd
+
+from portfolio import MAX_YEARS, calculate_portfolio_metrics
+
+
+PROJECT_COLUMNS = ['Initial_Cost', 'Discount_Rate_%', 'Risk_Rating', 'Project_Type',
+                   'Market_Condition', 'Duration_Years']
+CATEGORY_OPTIONS = {
+    'Risk_Rating': ["Low", "Medium", "High"],
+    'Project_Type': ["Retail", "Tech", "Healthcare", "Energy", "Infra"],
+    'Market_Condition': ["Stable", "Unstable", "Volatile"],
+}
+CATEGORICAL_COLUMNS = ['Risk_Rating', 'Project_Type', 'Market_Condition']
+RESULT_COLUMNS = ['Total_Cash_Inflows', 'Avg_Cash_Flow', 'CF_Volatility', 'NPV', 'IRR_%', 'PI',
+                  'Payback_Yrs', 'Decision', 'Confidence_%']
+
+
+def is_parquet(path):
+    """Whether a project file path names Parquet (.parquet or .pq, any case) rather than CSV."""
+    return path.lower().endswith(('.parquet', '.pq'))
+
+
+def validate_projects(projects):
+    missing = [column for column in PROJECT_COLUMNS if column not in projects.columns]
+    if missing:
+        raise ValueError(f"Missing project columns: {missing}")
+
+
+def normalize_project(record):
+    """Validate one project given as a mapping and return it with typed values.
+
+    Applies the same ranges as the app's sidebar inputs; raises ValueError on bad input.
+    """
+    missing = [column for column in PROJECT_COLUMNS if column not in record]
+    if missing:
+        raise ValueError(f"Missing project fields: {missing}")
+    try:
+        project = {
+            'Initial_Cost': float(record['Initial_Cost']),
+            'Discount_Rate_%': float(record['Discount_Rate_%']),
+            'Duration_Years': int(record['Duration_Years']),
+        }
+    except (TypeError, ValueError):
+        raise ValueError("Initial_Cost, Discount_Rate_% and Duration_Years must be numbers")
+    if not -1000000 <= project['Initial_Cost'] <= 0:
+        raise ValueError("Initial_Cost must be between -1,000,000 and 0")
+    if not 0 <= project['Discount_Rate_%'] <= 50:
+        raise ValueError("Discount_Rate_% must be between 0 and 50")
+    if not 1 <= project['Duration_Years'] <= MAX_YEARS:
+        raise ValueError(f"Duration_Years must be between 1 and {MAX_YEARS}")
+    for column, options in CATEGORY_OPTIONS.items():
+        if record[column] not in options:
+            raise ValueError(f"{column} must be one of {options}")
+        project[column] = record[column]
+    return project
+
+
+def predict_cash_flows(regressor_model, projects, cash_flow_table=None):
+    """(N x longest duration) predicted yearly cash flows, clipped at 0 and zeroed past each duration.
+
+    Uses the precomputed table when it covers every duration, otherwise one
+    regressor call over all (project, year) rows.
+    """
+    durations = projects['Duration_Years'].to_numpy(dtype=int)
+    n_years = int(durations.max()) if len(durations) else 0
+    categories = [projects[column].astype(str).to_numpy() for column in CATEGORICAL_COLUMNS]
+
+    if cash_flow_table is not None and cash_flow_table.covers(n_years):
+        cash_flows = cash_flow_table.lookup_many(*categories)[:, :n_years]
+    else:
+        prediction_data = pd.DataFrame({
+            'Year': np.tile(np.arange(1, n_years + 1), len(projects)),
+            **{column: np.repeat(values, n_years) for column, values in zip(CATEGORICAL_COLUMNS, categories)},
+        })
+        cash_flows = np.asarray(regressor_model.predict(prediction_data)).reshape(len(projects), n_years)
+
+    mask = np.arange(1, n_years + 1) <= durations[:, None]
+    return np.where(mask, np.maximum(cash_flows, 0), 0.0)
+
+
+def classifier_features(projects, cash_flows):
+    """The classifier's input frame: project columns plus statistics of the predicted cash flows."""
+    durations = projects['Duration_Years'].to_numpy(dtype=int)
+
+    # Cash flow statistics over each project's own years (cells past the duration are 0)
+    total_inflows = cash_flows.sum(axis=1)
+    avg_cash_flow = total_inflows / np.maximum(durations, 1)
+    mask = np.arange(1, cash_flows.shape[1] + 1) <= durations[:, None]
+    cf_volatility = np.sqrt(np.sum(np.where(mask, cash_flows - avg_cash_flow[:, None], 0) ** 2, axis=1)
+                            / np.maximum(durations, 1))
+
+    return pd.DataFrame({
+        'Initial_Cost': projects['Initial_Cost'].to_numpy(dtype=float),
+        'Discount_Rate_%': projects['Discount_Rate_%'].to_numpy(dtype=float),
+        'Risk_Rating': projects['Risk_Rating'].astype(str).to_numpy(),
+        'Project_Type': projects['Project_Type'].astype(str).to_numpy(),
+        'Market_Condition': projects['Market_Condition'].astype(str).to_numpy(),
+        'Duration_Years': durations,
+        'Total_Cash_Inflows': total_inflows,
+        'Avg_Cash_Flow': avg_cash_flow,
+        'CF_Volatility': cf_volatility,
+    })
+
+
+def score_projects(projects, regressor_model, classifier_model, cash_flow_table=None):
+    """Score a DataFrame of projects (PROJECT_COLUMNS) and return the RESULT_COLUMNS frame."""
+    validate_projects(projects)
+    initial_costs = projects['Initial_Cost'].to_numpy(dtype=float)
+    discount_rates = projects['Discount_Rate_%'].to_numpy(dtype=float)
+    durations = projects['Duration_Years'].to_numpy(dtype=int)
+
+    cash_flows = predict_cash_flows(regressor_model, projects, cash_flow_table)
+    npv, irr, pi, payback_period = calculate_portfolio_metrics(initial_costs, discount_rates, cash_flows, durations)
+
+    classifier_data = classifier_features(projects, cash_flows)
+    total_inflows = classifier_data['Total_Cash_Inflows'].to_numpy()
+    avg_cash_flow = classifier_data['Avg_Cash_Flow'].to_numpy()
+    cf_volatility = classifier_data['CF_Volatility'].to_numpy()
+    decision_proba = classifier_model.predict_proba(classifier_data)
+    decision = np.asarray(classifier_model.classes_)[np.argmax(decision_proba, axis=1)]
+
+    return pd.DataFrame({
+        'Total_Cash_Inflows': total_inflows,
+        'Avg_Cash_Flow': avg_cash_flow,
+        'CF_Volatility': cf_volatility,
+        'NPV': npv,
+        'IRR_%': irr,
+        'PI': pi,
+        'Payback_Yrs': payback_period,
+        'Decision': decision,
+        'Confidence_%': decision_proba.max(axis=1) * 100,
+    }, index=projects.index)
@@ -0,0 +1,115 @@
+from functools import lru_cache
+
+import numpy as np
+
+from irr import solve_irr
+
+
+MAX_YEARS = 50
+PERIODS_PER_YEAR = {'Annual': 1, 'Monthly': 12}
+
+
+# --- Periods ---
+@lru_cache(maxsize=1024)
+def _discount_factors(rate, n_periods, periods_per_year):
+    factors = (1 + rate) ** (-np.arange(1, n_periods + 1) / periods_per_year)
+    factors.flags.writeable = False
+    return factors
+
+
+def discount_factors(discount_rate, n_periods, periods_per_year=1):
+    """Read-only factors (1 + r) ** -(t / periods_per_year) for t = 1..n_periods, r the annual rate in %.
+
+    Cached per (rate, periods, frequency), so repeated analyses reuse the vector.
+    """
+    return _discount_factors(round(float(discount_rate) / 100, 12), int(n_periods), int(periods_per_year))
+
+
+def to_periods(cash_flows, periods_per_year=1):
+    """Spread yearly cash flows (last axis) evenly over `periods_per_year` periods each."""
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    if periods_per_year == 1:
+        return cash_flows
+    return np.repeat(cash_flows / periods_per_year, periods_per_year, axis=-1)
+
+
+def period_rate(annual_rate, periods_per_year=1):
+    """Per-period rate (fraction) that compounds to `annual_rate` over a year."""
+    if periods_per_year == 1:
+        return annual_rate
+    return (1 + annual_rate) ** (1 / periods_per_year) - 1
+
+
+def annualize_rate(rate, periods_per_year=1):
+    """Annual rate (fraction) equivalent to a per-period rate compounded periods_per_year times."""
+    if periods_per_year == 1:
+        return rate
+    return (1 + rate) ** periods_per_year - 1
+
+
+def payback_periods(flows, costs, durations):
+    """Periods until the cumulative inflow covers each cost, interpolated within the period.
+
+    `flows` is (N x T), zero past each of the N `durations`. A first-period payback counts
+    as a full period (as in app.py); projects that never pay back get their duration.
+    One cumulative sum and an argmax over the matrix, no per-period Python loop.
+    """
+    n_projects = flows.shape[0]
+    mask = np.arange(1, flows.shape[1] + 1) <= durations[:, None]
+    cumulative = np.cumsum(flows, axis=1)
+    reached = (cumulative >= costs[:, None]) & mask
+    has_payback = reached.any(axis=1)
+    first = reached.argmax(axis=1)
+    rows = np.arange(n_projects)
+    cf_at = flows[rows, first]
+    remaining = costs - (cumulative[rows, first] - cf_at)
+    fraction = np.divide(remaining, cf_at, out=np.zeros(n_projects), where=cf_at != 0)
+    payback_period = np.where(first == 0, 1.0, first + fraction)
+    return np.where(has_payback, payback_period, durations.astype(float))
+
+
+# --- Batch Financial Metrics ---
+def calculate_portfolio_metrics(initial_costs, discount_rates, cash_flows, durations=None, periods_per_year=1):
+    """Calculate NPV, IRR, PI, and Payback Period for many projects in one NumPy pass.
+
+    `cash_flows` is an (N projects x T periods) matrix of inflows, `periods_per_year`
+    periods to a year (1 = yearly, 12 = monthly). `initial_costs` and `discount_rates`
+    (annual, in %) are scalars or length-N arrays. `durations` optionally gives the
+    number of valid periods per project; cells past a project's duration are masked
+    out, so ragged portfolios need no per-row Python work.
+
+    Returns (npv, irr, pi, payback_period) as length-N arrays, following the same
+    conventions as `calculate_financial_metrics` in app.py: IRR is annual, in %, and
+    NaN where no rate could be solved; payback is in years.
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    n_projects, n_periods = cash_flows.shape
+    costs = np.abs(np.broadcast_to(np.asarray(initial_costs, dtype=float), (n_projects,)))
+
+    if durations is None:
+        durations = np.full(n_projects, n_periods)
+    else:
+        durations = np.clip(np.broadcast_to(np.asarray(durations, dtype=int), (n_projects,)), 0, n_periods)
+
+    periods = np.arange(1, n_periods + 1)
+    mask = periods <= durations[:, None]
+    flows = np.where(mask, cash_flows, 0.0)
+
+    # NPV and PI; one shared (cached) discount vector when every project has the same rate
+    if np.ndim(discount_rates) == 0:
+        factors = discount_factors(discount_rates, n_periods, periods_per_year)
+    else:
+        rates = np.broadcast_to(np.asarray(discount_rates, dtype=float), (n_projects,)) / 100
+        factors = (1 + rates[:, None]) ** (-periods / periods_per_year)
+    npv = np.sum(flows * factors, axis=1) - costs
+    pi = np.divide(npv + costs, costs, out=np.zeros(n_projects), where=costs != 0)
+
+    # IRR (masked periods are zero, which leaves each vector's NPV unchanged)
+    irr = solve_irr(np.column_stack([-costs, flows]), guess=period_rate(0.1, periods_per_year)).rate
+    irr = annualize_rate(irr, periods_per_year) * 100
+
+    # Payback period: first period the cumulative inflow covers the cost, in years
+    payback_period = payback_periods(flows, costs, durations) / periods_per_year
+
+    return npv, irr, pi, payback_period
+
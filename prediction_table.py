@@ -0,0 +1,123 @@
+"""Precomputed cash-flow predictions over the regressor's whole (discrete) input space.
+
+Build once after (re)training the regressor:
+
+    python prediction_table.py --model models/cash_flow_regressor.pkl --output models/cash_flow_table.npz
+"""
+import argparse
+import hashlib
+import os
+
+import numpy as np
+
+from portfolio import MAX_YEARS
+
+
+CATEGORICAL_FEATURES = ["Risk_Rating", "Project_Type", "Market_Condition"]
+DEFAULT_TABLE_PATH = "models/cash_flow_table.npz"
+
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PredictionTable:
+    """Dense (risk x type x market x year) array of regressor outputs."""
+
+    def __init__(self, categories, values, model_sha256):
+        self.categories = [np.asarray(c, dtype=str) for c in categories]
+        self.values = np.asarray(values, dtype=float)
+        self.model_sha256 = str(model_sha256)
+        self.max_year = self.values.shape[-1]
+        self._codes = [{name: code for code, name in enumerate(c)} for c in self.categories]
+
+    def covers(self, duration_years):
+        return 1 <= duration_years <= self.max_year
+
+    def lookup(self, risk_rating, project_type, market_condition, duration_years):
+        """Predicted cash flows for years 1..duration_years of one project (before clipping)."""
+        r, p, m = (codes[value] for codes, value in zip(self._codes, (risk_rating, project_type, market_condition)))
+        return self.values[r, p, m, :duration_years].copy()
+
+    def lookup_many(self, risk_ratings, project_types, market_conditions):
+        """(N x max_year) matrix of predictions for N projects given as category arrays."""
+        codes = [_encode(values, c) for values, c in zip((risk_ratings, project_types, market_conditions), self.categories)]
+        return self.values[codes[0], codes[1], codes[2]]
+
+    def save(self, path):
+        np.savez(path, values=self.values, model_sha256=np.array(self.model_sha256),
+                 **{name: c for name, c in zip(CATEGORICAL_FEATURES, self.categories)})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls([data[name] for name in CATEGORICAL_FEATURES], data["values"], data["model_sha256"].item())
+
+
+def _encode(values, categories):
+    """Integer codes of `values` within sorted `categories`; raises KeyError on unknown values."""
+    values = np.asarray(values, dtype=str)
+    codes = np.clip(np.searchsorted(categories, values), 0, len(categories) - 1)
+    unknown = categories[codes] != values
+    if unknown.any():
+        raise KeyError(f"Unknown categories: {sorted(set(values[unknown]))}")
+    return codes
+
+
+# --- Build ---
+def build_prediction_table(regressor_model, model_sha256, max_year=MAX_YEARS):
+    """Evaluate the regressor pipeline once over every (category, year) combination.
+
+    Years past the training data's 10 are the regressor's extrapolation, as for a
+    direct predict call.
+    """
+    import pandas as pd
+
+    encoder = regressor_model.named_steps["preprocessor"].named_transformers_["cat"]
+    categories = [np.asarray(c, dtype=str) for c in encoder.categories_]
+    years = np.arange(1, max_year + 1)
+
+    grid = np.meshgrid(*categories, years, indexing="ij")
+    prediction_data = pd.DataFrame({
+        name: column.ravel() for name, column in zip(CATEGORICAL_FEATURES + ["Year"], grid)
+    }).astype(str)
+    values = regressor_model.predict(prediction_data).reshape(grid[0].shape)
+    return PredictionTable(categories, values, model_sha256)
+
+
+def load_prediction_table(path=DEFAULT_TABLE_PATH, model_path="models/cash_flow_regressor.pkl"):
+    """Load the table, or None when it is missing or was built from a different model file.
+
+    The table is trusted on its own when the model file is absent, so predictions
+    keep working without scikit-learn or the pickle.
+    """
+    if not os.path.exists(path):
+        return None
+    table = PredictionTable.load(path)
+    if os.path.exists(model_path) and file_sha256(model_path) != table.model_sha256:
+        return None
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cash-flow prediction table.")
+    parser.add_argument("--model", default="models/cash_flow_regressor.pkl")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    parser.add_argument("--max-year", type=int, default=MAX_YEARS)
+    args = parser.parse_args()
+
+    import joblib
+
+    regressor_model = joblib.load(args.model)
+    table = build_prediction_table(regressor_model, file_sha256(args.model), args.max_year)
+    table.save(args.output)
+    print(f"Saved {table.values.size} predictions {table.values.shape} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Versioned model registry: one directory per version plus a pointer to the served one.
+
+    models/versions/<version>/cash_flow_regressor.pkl
+                              decision_classifier.pkl
+                              <name>.forest/          (optional array exports)
+                              cash_flow_table.npz
+                              manifest.json
+    models/versions/CURRENT   -> name of the version the app serves
+
+manifest.json records the version, creation time, scikit-learn version and, per file,
+its SHA-256; per model also the estimator, the feature schema (numeric features,
+categorical features and their categories), the classes and, when the version has a
+`.forest` export of the pickle, the SHA-256 of each of its files. It is written last,
+so a directory without one is an incomplete upload. CURRENT is replaced atomically, so a
+reader sees either the old or the new name.
+
+`load_version` re-hashes every file against the manifest before loading; a `.forest`
+directory the manifest does not list is ignored and the verified pickle is loaded.
+`canary` scores a fixed grid of projects covering every sidebar category and checks
+the outputs, and how often the decisions agree with the version being served.
+
+    python registry.py register models/distilled --version distilled-1
+    python registry.py publish distilled-1
+    python registry.py list
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from prediction_table import file_sha256
+
+
+REGISTRY_DIR = "models/versions"
+MODEL_NAMES = ('cash_flow_regressor', 'decision_classifier')
+TABLE_FILE = 'cash_flow_table.npz'
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+ModelSet = namedtuple("ModelSet", ["version", "regressor_model", "classifier_model", "cash_flow_table", "manifest"])
+CanaryResult = namedtuple("CanaryResult", ["passed", "problems", "agreement", "n_projects", "seconds"])
+
+
+# --- Manifest ---
+def feature_schema(pipeline):
+    """Estimator, input features, categories and classes of a fitted Pipeline(preprocessor -> estimator)."""
+    from feature_encoder import FeatureEncoder
+
+    encoder = FeatureEncoder.from_pipeline(pipeline)
+    estimator = pipeline.steps[-1][1]
+    classes = getattr(estimator, 'classes_', None)
+    return {'estimator': type(estimator).__name__,
+            'numeric_features': encoder.numeric_features,
+            'categorical_features': encoder.categorical_features,
+            'categories': [c.tolist() for c in encoder.categories],
+            'classes': [str(c) for c in classes] if classes is not None else None}
+
+
+def build_manifest(version_dir, version):
+    import joblib
+    import sklearn
+
+    manifest = {'version': version, 'created': datetime.now().isoformat(timespec='seconds'),
+                'sklearn_version': sklearn.__version__, 'models': {}}
+    for name in MODEL_NAMES:
+        path = os.path.join(version_dir, f'{name}.pkl')
+        manifest['models'][name] = {'file': f'{name}.pkl', 'sha256': file_sha256(path),
+                                    **feature_schema(joblib.load(path))}
+        forest_files = export_files(version_dir, name)
+        if forest_files:
+            manifest['models'][name]['forest'] = forest_files
+    manifest['cash_flow_table'] = {'file': TABLE_FILE, 'sha256': file_sha256(os.path.join(version_dir, TABLE_FILE))}
+    return manifest
+
+
+def export_files(version_dir, name):
+    """{relative path: SHA-256} of the files of `<name>.forest` when it was exported from `<name>.pkl`, else None."""
+    forest_dir = os.path.join(version_dir, f'{name}.forest')
+    meta_path = os.path.join(forest_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding='utf-8') as file:
+        if json.load(file).get('source_sha256') != file_sha256(os.path.join(version_dir, f'{name}.pkl')):
+            return None
+    return {f'{name}.forest/{file}': file_sha256(os.path.join(forest_dir, file))
+            for file in sorted(os.listdir(forest_dir))}
+
+
+def _write_atomic(path, text):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(temporary, path)
+
+
+def read_manifest(version_dir):
+    with open(os.path.join(version_dir, MANIFEST_FILE), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def verify_files(version_dir, manifest):
+    """Raise ValueError if any file listed in the manifest is missing or has another hash."""
+    entries = list(manifest['models'].values()) + [manifest['cash_flow_table']]
+    files = {entry['file']: entry['sha256'] for entry in entries}
+    for entry in manifest['models'].values():
+        files.update(entry.get('forest') or {})
+    bad = [file for file, sha256 in files.items()
+           if not os.path.exists(os.path.join(version_dir, file))
+           or file_sha256(os.path.join(version_dir, file)) != sha256]
+    if bad:
+        raise ValueError(f"Version {manifest['version']}: files missing or changed since registration: {bad}")
+
+
+# --- Registry ---
+def version_path(registry_dir, version):
+    return os.path.join(registry_dir, version)
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    """Registered versions (directories with a manifest), oldest first."""
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(name for name in os.listdir(registry_dir)
+                  if os.path.exists(os.path.join(registry_dir, name, MANIFEST_FILE)))
+
+
+def current_version(registry_dir=REGISTRY_DIR):
+    """Version named by CURRENT, or None when the registry has no served version."""
+    try:
+        with open(os.path.join(registry_dir, CURRENT_FILE), encoding='utf-8') as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current(registry_dir, version):
+    if not os.path.exists(os.path.join(registry_dir, version, MANIFEST_FILE)):
+        raise ValueError(f"Version {version} is not registered in {registry_dir}")
+    _write_atomic(os.path.join(registry_dir, CURRENT_FILE), version + "\n")
+
+
+def register(source_dir, registry_dir=REGISTRY_DIR, version=None):
+    """Add the model pickles of source_dir as a registry version and return its directory.
+
+    The pickles, and any `.forest` exports made from them, are copied unless source_dir
+    already is the version's directory (as train.py writes it). The cash flow table is
+    rebuilt from the regressor.
+    """
+    import joblib
+    from prediction_table import build_prediction_table
+
+    version = version or datetime.now().strftime('%Y%m%d-%H%M%S')
+    version_dir = version_path(registry_dir, version)
+    if os.path.abspath(source_dir) != os.path.abspath(version_dir):
+        if os.path.exists(version_dir):
+            raise FileExistsError(f"Version {version} already exists in {registry_dir}")
+        os.makedirs(version_dir)
+        for name in MODEL_NAMES:
+            shutil.copyfile(os.path.join(source_dir, f'{name}.pkl'), os.path.join(version_dir, f'{name}.pkl'))
+            if export_files(source_dir, name):
+                shutil.copytree(os.path.join(source_dir, f'{name}.forest'),
+                                os.path.join(version_dir, f'{name}.forest'))
+    regressor_path = os.path.join(version_dir, 'cash_flow_regressor.pkl')
+    build_prediction_table(joblib.load(regressor_path), file_sha256(regressor_path)).save(
+        os.path.join(version_dir, TABLE_FILE))
+    _write_atomic(os.path.join(version_dir, MANIFEST_FILE), json.dumps(build_manifest(version_dir, version), indent=2))
+    return version_dir
+
+
+def load_version(registry_dir, version):
+    """ModelSet of a registered version, after checking every file against its manifest.
+
+    A model's `.forest` export is used only when the manifest lists it (and so was just verified).
+    """
+    from forest_runtime import load_model
+    from prediction_table import load_prediction_table
+
+    version_dir = version_path(registry_dir, version)
+    manifest = read_manifest(version_dir)
+    verify_files(version_dir, manifest)
+    models = {name: load_model(name, version_dir, use_forest=bool(manifest['models'][name].get('forest')))
+              for name in MODEL_NAMES}
+    return ModelSet(version, models['cash_flow_regressor'], models['decision_classifier'],
+                    load_prediction_table(os.path.join(version_dir, TABLE_FILE),
+                                          os.path.join(version_dir, 'cash_flow_regressor.pkl')),
+                    manifest)
+
+
+# --- Canary ---
+def canary_projects():
+    """Every sidebar category combination x 4 durations x 3 cost/rate levels (540 projects)."""
+    import pandas as pd
+    from pipeline import CATEGORY_OPTIONS
+
+    rows = []
+    for risk in CATEGORY_OPTIONS['Risk_Rating']:
+        for project_type in CATEGORY_OPTIONS['Project_Type']:
+            for market in CATEGORY_OPTIONS['Market_Condition']:
+                for duration in (1, 3, 5, 10):
+                    for cost, rate in ((-50000, 8.0), (-100000, 12.0), (-500000, 20.0)):
+                        rows.append({'Initial_Cost': cost, 'Discount_Rate_%': rate, 'Risk_Rating': risk,
+                                     'Project_Type': project_type, 'Market_Condition': market,
+                                     'Duration_Years': duration})
+    return pd.DataFrame(rows)
+
+
+def schema_problems(manifest):
+    """Ways a manifest's schema does not fit the app's inputs."""
+    from pipeline import CATEGORY_OPTIONS
+
+    problems = []
+    for name, entry in manifest['models'].items():
+        for feature, categories in zip(entry['categorical_features'], entry['categories']):
+            missing = sorted(set(CATEGORY_OPTIONS.get(feature, [])) - set(categories))
+            if missing:
+                problems.append(f"{name}: no {feature} categories {missing}")
+    classes = manifest['models']['decision_classifier']['classes'] or []
+    if not {'accept', 'reject'} <= set(classes):
+        problems.append(f"decision_classifier: classes {classes} lack accept/reject")
+    return problems
+
+
+def canary(model_set, reference=None, min_agreement=0.8):
+    """CanaryResult of scoring canary_projects() with model_set.
+
+    Fails on schema problems, errors, non-finite cash flows/NPV/PI, confidences outside
+    50-100% or, given a reference ModelSet, decision agreement below min_agreement.
+    """
+    from pipeline import score_projects
+
+    start = time.perf_counter()
+    projects = canary_projects()
+    problems = schema_problems(model_set.manifest) if model_set.manifest else []
+    agreement = None
+    try:
+        scored = score_projects(projects, model_set.regressor_model, model_set.classifier_model,
+                                model_set.cash_flow_table)
+    except Exception as e:
+        problems.append(f"scoring failed: {e}")
+    else:
+        for column in ('Total_Cash_Inflows', 'NPV', 'PI'):
+            if not np.isfinite(scored[column]).all():
+                problems.append(f"non-finite {column}")
+        if not scored['Confidence_%'].between(50, 100).all():
+            problems.append("confidence outside 50-100%")
+        if reference is not None:
+            expected = score_projects(projects, reference.regressor_model, reference.classifier_model,
+                                      reference.cash_flow_table)
+            agreement = float(np.mean(scored['Decision'].to_numpy() == expected['Decision'].to_numpy()))
+            if agreement < min_agreement:
+                problems.append(f"decisions agree with version {reference.version} on {agreement:.0%} "
+                                f"of canary projects (minimum {min_agreement:.0%})")
+    return CanaryResult(not problems, problems, agreement, len(projects), time.perf_counter() - start)
+
+
+def publish(registry_dir, version, min_agreement=0.8, force=False):
+    """Canary `version` against the current one and point CURRENT at it; returns the CanaryResult.
+
+    CURRENT is left unchanged when the canary fails, unless force is set.
+    """
+    candidate = load_version(registry_dir, version)
+    served = current_version(registry_dir)
+    reference = load_version(registry_dir, served) if served and served != version else None
+    result = canary(candidate, reference, min_agreement)
+    if result.passed or force:
+        set_current(registry_dir, version)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry.")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("register", help="add a directory's model pickles as a version")
+    command.add_argument("source_dir")
+    command.add_argument("--version")
+    command = commands.add_parser("publish", help="canary a version and make it the served one")
+    command.add_argument("version")
+    command.add_argument("--min-agreement", type=float, default=0.8)
+    command.add_argument("--force", action="store_true", help="publish even if the canary fails")
+    command = commands.add_parser("verify", help="check a version's files and run its canary")
+    command.add_argument("version")
+    commands.add_parser("list", help="list the registered versions")
+    args = parser.parse_args()
+
+    if args.command == "register":
+        version_dir = register(args.source_dir, args.registry, args.version)
+        print(f"Registered {version_dir}")
+    elif args.command in ("publish", "verify"):
+        if args.command == "publish":
+            result = publish(args.registry, args.version, args.min_agreement, args.force)
+        else:
+            result = canary(load_version(args.registry, args.version))
+        agreement = f", decision agreement {result.agreement:.1%}" if result.agreement is not None else ""
+        print(f"Canary on {result.n_projects} projects in {result.seconds:.2f} s: "
+              f"{'passed' if result.passed else 'FAILED'}{agreement}")
+        for problem in result.problems:
+            print(f"  - {problem}")
+        if args.command == "publish":
+            print(f"CURRENT = {current_version(args.registry)}")
+        if not result.passed:
+            raise SystemExit(1)
+    else:
+        served = current_version(args.registry)
+        for version in list_versions(args.registry):
+            manifest = read_manifest(version_path(args.registry, version))
+            models = ", ".join(f"{entry['estimator']} {entry['sha256'][:12]}" for entry in manifest['models'].values())
+            print(f"{'*' if version == served else ' '} {version:<24} {manifest['created']}  "
+                  f"sklearn {manifest['sklearn_version']}  {models}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# --- Analysis Result Cache ---
+class AnalysisCache:
+    """Bounded, thread-safe LRU cache with an optional TTL and hit/miss/eviction counters.
+
+    One instance is shared by every session of the app process, so a scenario
+    analysed by anyone is served from memory until it is evicted or expires.
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value for key, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() >= entry[1]:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_s': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def cache_from_env():
+    """AnalysisCache sized by ANALYSIS_CACHE_SIZE (default 256) and ANALYSIS_CACHE_TTL seconds (default 3600, 0 = none)."""
+    return AnalysisCache(int(os.environ.get('ANALYSIS_CACHE_SIZE', 256)),
+                         float(os.environ.get('ANALYSIS_CACHE_TTL', 3600)))
+
+
+def analysis_key(model_version, initial_cost, discount_rate, duration_years, risk_rating, project_type,
+                 market_condition, periods_per_year=1):
+    """Normalized input tuple, so equal scenarios hit the same entry regardless of input types."""
+    return (str(model_version), float(initial_cost), round(float(discount_rate), 6), int(duration_years),
+            str(risk_rating), str(project_type), str(market_condition), int(periods_per_year))
@@ -0,0 +1,135 @@
+"""Score a CSV or Parquet file of projects without the Streamlit UI.
+
+Reads the input in fixed-size chunks, runs regressor -> metrics -> classifier on each
+chunk as one batch and appends the results to the output file as chunks finish, so
+memory stays flat however many rows the input has.
+
+    python score_batch.py projects.csv scored.csv --chunk-size 50000 --workers 4
+
+The input needs the PROJECT_COLUMNS of pipeline.py (the app's sidebar fields); any
+other columns, such as a project id, are passed through to the output. Input columns
+named like a scored one (RESULT_COLUMNS, e.g. the realized NPV and Decision of a
+dataset or synthetic.py file) are replaced by the scored values.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from forest_runtime import load_model
+from pipeline import RESULT_COLUMNS, is_parquet, score_projects, validate_projects
+from prediction_table import load_prediction_table
+
+
+_models = None
+
+
+def _load_models(models_dir):
+    global _models
+    _models = (load_model('cash_flow_regressor', models_dir), load_model('decision_classifier', models_dir),
+               load_prediction_table(os.path.join(models_dir, 'cash_flow_table.npz'),
+                                     os.path.join(models_dir, 'cash_flow_regressor.pkl')))
+
+
+def _score_chunk(chunk):
+    regressor_model, classifier_model, cash_flow_table = _models
+    scored = score_projects(chunk, regressor_model, classifier_model, cash_flow_table)
+    return pd.concat([chunk.drop(columns=RESULT_COLUMNS, errors='ignore'), scored], axis=1)
+
+
+def read_chunks(path, chunk_size):
+    """Yield DataFrames of at most chunk_size rows from a CSV or Parquet file."""
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._header_written = False
+
+    def write(self, frame):
+        if is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        else:
+            frame.to_csv(self.path, mode='a' if self._header_written else 'w', header=not self._header_written,
+                         index=False)
+            self._header_written = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_file(input_path, output_path, chunk_size=50000, workers=1, models_dir='models'):
+    """Stream input_path through the pipeline into output_path; returns the number of rows scored.
+
+    With workers > 1 chunks are scored in a process pool (models load once per
+    worker). At most 2 * workers chunks are in flight and results are written in
+    input order.
+    """
+    writer = ChunkWriter(output_path)
+    n_rows = 0
+    try:
+        if workers <= 1:
+            _load_models(models_dir)
+            for chunk in read_chunks(input_path, chunk_size):
+                validate_projects(chunk)
+                writer.write(_score_chunk(chunk))
+                n_rows += len(chunk)
+            return n_rows
+
+        with ProcessPoolExecutor(workers, initializer=_load_models, initargs=(models_dir,)) as pool:
+            pending = deque()
+            for chunk in read_chunks(input_path, chunk_size):
+                validate_projects(chunk)
+                pending.append(pool.submit(_score_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    scored = pending.popleft().result()
+                    writer.write(scored)
+                    n_rows += len(scored)
+            while pending:
+                scored = pending.popleft().result()
+                writer.write(scored)
+                n_rows += len(scored)
+        return n_rows
+    finally:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of projects.")
+    parser.add_argument("input", help="CSV or Parquet file of project parameters")
+    parser.add_argument("output", help="CSV or Parquet file to write (format follows the extension)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per batch (default: 50000)")
+    parser.add_argument("--workers", type=int, default=1, help="processes scoring chunks in parallel (default: 1)")
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_rows = score_file(args.input, args.output, args.chunk_size, args.workers, args.models_dir)
+    seconds = time.perf_counter() - start
+    print(f"Scored {n_rows:,} projects in {seconds:.1f} s ({n_rows / max(seconds, 1e-9):,.0f} rows/s) -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""Sensitivity sweep of the investment decision over discount rate x initial cost x duration.
+
+For one project profile (risk, type and market) the regressor's cash flows depend only
+on the year, so they are predicted once up to the longest duration and every duration
+uses a prefix of them. NPV and PI then split into a per-rate present value minus a
+per-cost term, and IRR and payback depend only on (cost, duration), so the financial
+metrics of the whole grid cost a few small NumPy calls.
+
+The classifier is the expensive part: a 200 x 200 x 10 grid is 400,000 rows. For
+forest classifiers `sweep` walks every tree once per duration with index ranges over
+the sorted rate and cost axes instead of rows: a split on the discount rate or the
+initial cost cuts the current range at one `searchsorted` position, any other split
+sends the whole range one way, and each leaf adds its class probabilities to a
+rectangle of the grid. This gives exactly the forest's predict_proba for every grid
+point. Other classifiers are scored with predict_proba in batches of `batch_size` rows.
+
+    python sensitivity.py --risk Medium --type Tech --market Stable --rates 200 --costs 200
+"""
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from forest_runtime import flatten_trees, load_model
+from portfolio import calculate_portfolio_metrics
+from prediction_table import load_prediction_table
+
+
+SweepResult = namedtuple("SweepResult", ["discount_rates", "initial_costs", "durations", "cash_flows",
+                                         "npv", "irr", "pi", "payback_period", "proba", "classes"])
+SweepResult.__doc__ = """Metrics and decision probabilities over the grid.
+
+npv, pi and proba are indexed [duration, rate, cost] (proba has a trailing class axis),
+irr and payback_period [duration, cost]; cash_flows holds the predicted yearly inflows
+up to the longest duration.
+"""
+
+
+def predict_profile_cash_flows(regressor_model, risk_rating, project_type, market_condition, n_years,
+                               cash_flow_table=None):
+    """Predicted yearly cash flows (years 1..n_years) of one profile, clipped at 0."""
+    if cash_flow_table is not None and cash_flow_table.covers(n_years):
+        cash_flows = cash_flow_table.lookup(risk_rating, project_type, market_condition, n_years)
+    else:
+        cash_flows = regressor_model.predict({
+            'Year': np.arange(1, n_years + 1),
+            'Risk_Rating': [risk_rating] * n_years,
+            'Project_Type': [project_type] * n_years,
+            'Market_Condition': [market_condition] * n_years,
+        })
+    return np.maximum(np.asarray(cash_flows, dtype=float), 0)
+
+
+def classifier_rows(initial_costs, discount_rates, duration, cash_flows, risk_rating, project_type,
+                    market_condition):
+    """Classifier input mapping for the given costs and rates (equal length) at one duration."""
+    flows = cash_flows[:duration]
+    n_rows = len(initial_costs)
+    return {
+        'Initial_Cost': initial_costs,
+        'Discount_Rate_%': discount_rates,
+        'Risk_Rating': [risk_rating] * n_rows,
+        'Project_Type': [project_type] * n_rows,
+        'Market_Condition': [market_condition] * n_rows,
+        'Duration_Years': np.full(n_rows, duration),
+        'Total_Cash_Inflows': np.full(n_rows, flows.sum()),
+        'Avg_Cash_Flow': np.full(n_rows, flows.mean()),
+        'CF_Volatility': np.full(n_rows, flows.std()),
+    }
+
+
+# --- Grid-aware forest evaluation ---
+def _forest_parts(classifier_model):
+    """(encoder, node arrays) of a forest classifier, or None if it has to be scored row by row."""
+    if hasattr(classifier_model, "leaf_values"):
+        return classifier_model.encoder, {name: getattr(classifier_model, name)
+                                          for name in ["roots", "feature", "threshold", "children", "value"]}
+    estimator = getattr(classifier_model, "estimator", None)
+    if hasattr(classifier_model, "encoder") and estimator is not None:
+        from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+        if isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier)):
+            return classifier_model.encoder, flatten_trees(estimator)
+    return None
+
+
+class _GridForest:
+    """A forest's nodes prepared for walking index ranges of two sorted numeric inputs."""
+
+    def __init__(self, encoder, trees, rate_values, cost_values):
+        self.encoder = encoder
+        self.roots = trees["roots"].tolist()
+        self.feature = np.asarray(trees["feature"])
+        self.threshold = np.asarray(trees["threshold"])
+        self.value = np.asarray(trees["value"])
+        children = np.asarray(trees["children"]).reshape(-1, 2)
+        self.is_leaf = (children[:, 0] == np.arange(len(children))).tolist()
+        self.left = children[:, 0].tolist()
+        self.right = children[:, 1].tolist()
+        self.feature_list = self.feature.tolist()
+
+        self.rate_column = encoder.numeric_features.index('Discount_Rate_%')
+        self.cost_column = encoder.numeric_features.index('Initial_Cost')
+        # Split position of every node on each axis: grid points [0, k) go left (x <= threshold)
+        self.rate_split = self._splits(rate_values, self.rate_column)
+        self.cost_split = self._splits(cost_values, self.cost_column)
+
+    def _splits(self, values, column):
+        scaled = ((np.asarray(values, dtype=float) - self.encoder.scale_mean[column])
+                  / self.encoder.scale_scale[column]).astype(np.float32).astype(self.threshold.dtype)
+        return np.searchsorted(scaled, self.threshold, side="right").tolist()
+
+    def proba(self, fixed_row, n_rates, n_costs):
+        """(n_rates x n_costs x n_outputs) mean leaf value with every other feature taken from fixed_row."""
+        rate_column, cost_column = self.rate_column, self.cost_column
+        go_right = (fixed_row.astype(self.threshold.dtype)[self.feature] > self.threshold).tolist()
+        feature, left, right, is_leaf = self.feature_list, self.left, self.right, self.is_leaf
+        rate_split, cost_split = self.rate_split, self.cost_split
+
+        leaves = []
+        for root in self.roots:
+            stack = [(root, 0, n_rates, 0, n_costs)]
+            while stack:
+                node, r0, r1, c0, c1 = stack.pop()
+                if is_leaf[node]:
+                    leaves.append((node, r0, r1, c0, c1))
+                elif feature[node] == rate_column:
+                    k = rate_split[node]
+                    if k > r0:
+                        stack.append((left[node], r0, min(k, r1), c0, c1))
+                    if k < r1:
+                        stack.append((right[node], max(k, r0), r1, c0, c1))
+                elif feature[node] == cost_column:
+                    k = cost_split[node]
+                    if k > c0:
+                        stack.append((left[node], r0, r1, c0, min(k, c1)))
+                    if k < c1:
+                        stack.append((right[node], r0, r1, max(k, c0), c1))
+                else:
+                    stack.append((right[node] if go_right[node] else left[node], r0, r1, c0, c1))
+
+        # Add each leaf's value to its rectangle through a 2-D difference array
+        node, r0, r1, c0, c1 = np.array(leaves, dtype=np.intp).T
+        value = self.value[node]
+        diff = np.zeros((n_rates + 1, n_costs + 1, value.shape[1]))
+        np.add.at(diff, (r0, c0), value)
+        np.add.at(diff, (r0, c1), -value)
+        np.add.at(diff, (r1, c0), -value)
+        np.add.at(diff, (r1, c1), value)
+        return np.cumsum(np.cumsum(diff, axis=0), axis=1)[:n_rates, :n_costs] / len(self.roots)
+
+
+# --- Sweep ---
+def sweep(regressor_model, classifier_model, risk_rating, project_type, market_condition, discount_rates,
+          initial_costs, durations, cash_flow_table=None, batch_size=100000, method="auto"):
+    """Score every (duration, discount rate, initial cost) combination of one project profile.
+
+    Axis values are sorted and de-duplicated. `method` is "grid" (forest classifiers
+    only), "batch" (predict_proba in chunks of `batch_size` rows) or "auto" (grid when
+    possible). Returns a SweepResult.
+    """
+    discount_rates = np.unique(np.asarray(discount_rates, dtype=float))
+    initial_costs = np.unique(np.asarray(initial_costs, dtype=float))
+    durations = np.unique(np.asarray(durations, dtype=int))
+    n_rates, n_costs = len(discount_rates), len(initial_costs)
+    if durations.size == 0 or durations[0] < 1:
+        raise ValueError("Durations must be at least 1 year")
+
+    cash_flows = predict_profile_cash_flows(regressor_model, risk_rating, project_type, market_condition,
+                                            int(durations[-1]), cash_flow_table)
+
+    # NPV = PV(rate, duration) - |cost| and PI = PV / |cost|
+    costs = np.abs(initial_costs)
+    years = np.arange(1, len(cash_flows) + 1)
+    present_values = np.cumsum(cash_flows * (1 + discount_rates[:, None] / 100) ** -years, axis=1)
+    present_values = present_values[:, durations - 1].T
+    npv = present_values[:, :, None] - costs
+    pi = np.divide(present_values[:, :, None], costs, out=np.zeros(npv.shape), where=costs != 0)
+
+    # IRR and payback do not depend on the discount rate
+    irr = np.empty((len(durations), n_costs))
+    payback_period = np.empty((len(durations), n_costs))
+    for i, duration in enumerate(durations):
+        _, irr[i], _, payback_period[i] = calculate_portfolio_metrics(
+            initial_costs, 0.0, np.broadcast_to(cash_flows[:duration], (n_costs, duration)))
+
+    parts = _forest_parts(classifier_model) if method in ("auto", "grid") else None
+    if method == "grid" and parts is None:
+        raise ValueError("Grid evaluation needs a forest classifier (CompiledForest or EncodedPipeline)")
+
+    if parts is not None:
+        grid_forest = _GridForest(*parts, discount_rates, initial_costs)
+        proba = np.stack([
+            grid_forest.proba(grid_forest.encoder.transform(classifier_rows(
+                [0.0], [0.0], duration, cash_flows, risk_rating, project_type, market_condition))[0],
+                n_rates, n_costs)
+            for duration in durations])
+    else:
+        rates_flat = np.repeat(discount_rates, n_costs)
+        costs_flat = np.tile(initial_costs, n_rates)
+        chunks = []
+        for duration in durations:
+            for start in range(0, rates_flat.size, batch_size):
+                stop = start + batch_size
+                chunks.append(classifier_model.predict_proba(classifier_rows(
+                    costs_flat[start:stop], rates_flat[start:stop], duration, cash_flows,
+                    risk_rating, project_type, market_condition)))
+        proba = np.concatenate(chunks).reshape(len(durations), n_rates, n_costs, -1)
+
+    return SweepResult(discount_rates, initial_costs, durations, cash_flows, npv, irr, pi, payback_period,
+                       proba, np.asarray(classifier_model.classes_))
+
+
+def decision_frame(result, duration, positive_class='accept'):
+    """Long-format DataFrame of one duration's grid for plotting, one row per (rate, cost)."""
+    import pandas as pd
+
+    i = int(np.searchsorted(result.durations, duration))
+    if i == len(result.durations) or result.durations[i] != duration:
+        raise ValueError(f"Duration {duration} is not in the sweep")
+    column = list(result.classes).index(positive_class)
+    proba = result.proba[i, :, :, column]
+    n_rates, n_costs = proba.shape
+    return pd.DataFrame({
+        'Discount_Rate_%': np.repeat(result.discount_rates, n_costs),
+        'Initial_Cost': np.tile(result.initial_costs, n_rates),
+        'Accept_Probability': proba.ravel(),
+        'Decision': np.asarray(result.classes)[np.argmax(result.proba[i], axis=2)].ravel(),
+        'NPV': result.npv[i].ravel(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the decision over discount rate x initial cost x duration.")
+    parser.add_argument("--risk", default="Medium")
+    parser.add_argument("--type", default="Tech")
+    parser.add_argument("--market", default="Stable")
+    parser.add_argument("--rates", type=int, default=200, help="number of discount rates in [0, 50] %%")
+    parser.add_argument("--costs", type=int, default=200, help="number of initial costs in [-1,000,000, 0]")
+    parser.add_argument("--durations", type=int, nargs="+", default=list(range(1, 11)))
+    parser.add_argument("--method", choices=["auto", "grid", "batch"], default="auto")
+    parser.add_argument("--check", action="store_true", help="compare against batched predict_proba")
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+
+    regressor_model = load_model("cash_flow_regressor", args.models_dir)
+    classifier_model = load_model("decision_classifier", args.models_dir)
+    cash_flow_table = load_prediction_table(f"{args.models_dir}/cash_flow_table.npz",
+                                            f"{args.models_dir}/cash_flow_regressor.pkl")
+    grid = dict(risk_rating=args.risk, project_type=args.type, market_condition=args.market,
+                discount_rates=np.linspace(0, 50, args.rates), initial_costs=np.linspace(-1000000, 0, args.costs),
+                durations=args.durations, cash_flow_table=cash_flow_table)
+
+    start = time.perf_counter()
+    result = sweep(regressor_model, classifier_model, method=args.method, **grid)
+    seconds = time.perf_counter() - start
+    points = result.proba.shape[0] * result.proba.shape[1] * result.proba.shape[2]
+    accept = result.proba[..., list(result.classes).index('accept')] >= 0.5
+    print(f"{points:,} grid points in {seconds:.2f} s ({points / seconds:,.0f} points/s), "
+          f"{accept.mean():.1%} accepted")
+
+    if args.check:
+        start = time.perf_counter()
+        reference = sweep(regressor_model, classifier_model, method="batch", **grid)
+        print(f"batched predict_proba: {time.perf_counter() - start:.2f} s, "
+              f"max abs probability difference {np.max(np.abs(reference.proba - result.proba)):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Local HTTP API for the investment decision, with request micro-batching.
+
+    python service.py --port 8502 --max-batch-size 64 --max-wait-ms 5
+
+POST /score   one project object, or a list of them, with the PROJECT_COLUMNS of
+              pipeline.py; returns the matching result object(s)
+GET  /stats   latency percentiles, throughput and batching counters
+GET  /health  "ok" once the models are loaded
+
+Concurrent requests are queued and scored together: the batcher takes the first
+waiting project, then keeps collecting until it has `max_batch_size` projects or
+`max_wait_ms` has passed, and runs the whole batch through one regressor,
+metrics and classifier call.
+"""
+import argparse
+import json
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from forest_runtime import load_model
+from pipeline import normalize_project, score_projects
+from prediction_table import load_prediction_table
+
+
+class MicroBatcher:
+    """Collects single-project requests into batches scored on one background thread."""
+
+    def __init__(self, score_batch, max_batch_size=64, max_wait_ms=5.0):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.batched_items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, project):
+        """Queue one normalized project; the returned Future resolves to its result dict."""
+        future = Future()
+        self._queue.put((project, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            projects, futures = zip(*batch)
+            try:
+                results = self.score_batch(pd.DataFrame(list(projects))).to_dict(orient="records")
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            self.batches += 1
+            self.batched_items += len(batch)
+
+
+class ServiceStats:
+    """Request counters and a window of recent latencies."""
+
+    def __init__(self, window=10000):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)
+        self._finished = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self.requests += 1
+            self.errors += not ok
+            self._latencies.append(seconds)
+            self._finished.append(time.time())
+
+    def snapshot(self, batcher):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            finished = np.array(self._finished)
+            requests, errors = self.requests, self.errors
+        uptime = time.time() - self.started
+        recent = finished[finished >= time.time() - 10]
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": requests,
+            "errors": errors,
+            "throughput_rps": round(requests / uptime, 2) if uptime else 0.0,
+            "recent_throughput_rps": round(len(recent) / 10, 2),
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3) if latencies.size else None,
+            "latency_ms_p99": round(float(np.percentile(latencies, 99)), 3) if latencies.size else None,
+            "batches": batcher.batches,
+            "mean_batch_size": round(batcher.batched_items / batcher.batches, 2) if batcher.batches else None,
+        }
+
+
+def _json_safe(result):
+    """Result dict with NaN/inf (e.g. an undefined IRR) as null and NumPy scalars as Python values."""
+    safe = {}
+    for key, value in result.items():
+        value = value.item() if isinstance(value, np.generic) else value
+        safe[key] = None if isinstance(value, float) and not math.isfinite(value) else value
+    return safe
+
+
+class ScoringServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 resets connections under concurrent load
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def make_handler(batcher, stats):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, "ok")
+            elif self.path == "/stats":
+                self._send(200, stats.snapshot(batcher))
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send(404, {"error": "not found"})
+                return
+            start = time.perf_counter()
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+                records = body if isinstance(body, list) else [body]
+                if not records or not all(isinstance(record, dict) for record in records):
+                    raise ValueError("Expected a project object or a list of project objects")
+                futures = [batcher.submit(normalize_project(record)) for record in records]
+            except ValueError as e:
+                stats.record(time.perf_counter() - start, ok=False)
+                self._send(400, {"error": str(e)})
+                return
+            try:
+                results = [_json_safe(future.result()) for future in futures]
+            except Exception as e:
+                stats.record(time.perf_counter() - start, ok=False)
+                self._send(500, {"error": f"Scoring failed: {e}"})
+                return
+            stats.record(time.perf_counter() - start)
+            self._send(200, results if isinstance(body, list) else results[0])
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve investment decisions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+
+    regressor_model = load_model("cash_flow_regressor", args.models_dir)
+    classifier_model = load_model("decision_classifier", args.models_dir)
+    cash_flow_table = load_prediction_table(f"{args.models_dir}/cash_flow_table.npz",
+                                            f"{args.models_dir}/cash_flow_regressor.pkl")
+
+    batcher = MicroBatcher(lambda projects: score_projects(projects, regressor_model, classifier_model,
+                                                           cash_flow_table),
+                           args.max_batch_size, args.max_wait_ms)
+    stats = ServiceStats()
+    server = ScoringServer((args.host, args.port), make_handler(batcher, stats))
+    print(f"Serving on http://{args.host}:{args.port} "
+          f"(max batch {args.max_batch_size}, max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
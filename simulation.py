@@ -0,0 +1,97 @@
+"""Monte Carlo NPV/IRR/PI/payback distributions from the regressor forest's individual trees.
+
+The forest's point prediction is the mean of its trees; the spread of the trees is a
+predictive distribution. Each simulated path draws every year's cash flow from a
+randomly chosen tree (and optionally the discount rate from a normal distribution),
+and whole batches of paths are scored at once by the portfolio engine.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from portfolio import calculate_portfolio_metrics, to_periods
+
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+SimulationResult = namedtuple("SimulationResult", ["npv", "irr", "pi", "payback_period", "cash_flows",
+                                                   "n_paths", "converged"])
+
+
+def has_tree_predictions(regressor_model):
+    """Whether the model is a forest averaging its trees, so `tree_predictions` applies.
+
+    Boosted trees predict residual steps, not cash flows, and linear models have no trees.
+    """
+    if hasattr(regressor_model, "leaf_values"):
+        return True
+    from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+    return isinstance(getattr(regressor_model, "estimator", None), (RandomForestRegressor, ExtraTreesRegressor))
+
+
+def tree_predictions(regressor_model, X):
+    """(n_trees x n_rows) prediction of every tree for raw inputs X (mapping or DataFrame)."""
+    if hasattr(regressor_model, "leaf_values"):
+        return regressor_model.leaf_values(regressor_model.transform(X))[:, :, 0]
+    if hasattr(regressor_model, "encoder") and has_tree_predictions(regressor_model):
+        features = regressor_model.encoder.transform(X)
+        return np.array([tree.predict(features) for tree in regressor_model.estimator.estimators_])
+    raise TypeError("Per-tree predictions need a CompiledForest or an EncodedPipeline of a random forest")
+
+
+def simulate(tree_cash_flows, initial_cost, discount_rate, max_paths=20000, rate_std=0.0, batch_size=2000,
+             tolerance=0.005, seed=None, periods_per_year=1):
+    """Simulate cash-flow paths until the NPV percentiles settle or max_paths is reached.
+
+    `tree_cash_flows` is (n_trees x n_years), e.g. from `tree_predictions`. After each
+    batch the NPV percentiles are compared with those before it; sampling stops early
+    once every percentile moved by less than `tolerance` times the interquartile
+    range. Rates are in %, with `rate_std` the standard deviation of the discount rate.
+    With `periods_per_year` > 1 the metrics use each sampled year spread evenly over its
+    periods; the returned cash flows stay yearly.
+    """
+    tree_cash_flows = np.maximum(np.asarray(tree_cash_flows, dtype=float), 0)
+    n_trees, n_years = tree_cash_flows.shape
+    rng = np.random.default_rng(seed)
+    year_index = np.arange(n_years)
+
+    batches = []
+    previous = None
+    converged = False
+    n_paths = 0
+    while n_paths < max_paths:
+        size = min(batch_size, max_paths - n_paths)
+        cash_flows = tree_cash_flows[rng.integers(n_trees, size=(size, n_years)), year_index]
+        rates = discount_rate if rate_std <= 0 else np.maximum(rng.normal(discount_rate, rate_std, size), 0)
+        metrics = calculate_portfolio_metrics(initial_cost, rates, to_periods(cash_flows, periods_per_year),
+                                              periods_per_year=periods_per_year)
+        batches.append((cash_flows, *metrics))
+        n_paths += size
+
+        npv = np.concatenate([batch[1] for batch in batches])
+        current = np.percentile(npv, PERCENTILES)
+        if previous is not None:
+            scale = max(current[3] - current[1], 1e-9)
+            if np.max(np.abs(current - previous)) < tolerance * scale:
+                converged = True
+                break
+        previous = current
+
+    columns = [np.concatenate([batch[i] for batch in batches]) for i in range(5)]
+    return SimulationResult(columns[1], columns[2], columns[3], columns[4], columns[0], n_paths, converged)
+
+
+def percentile_summary(result):
+    """{metric: [P5, P25, P50, P75, P95]} with NaN IRRs (no root) left out."""
+    summary = {}
+    for name, values in [("NPV", result.npv), ("IRR (%)", result.irr), ("PI", result.pi),
+                         ("Payback (years)", result.payback_period)]:
+        values = values[np.isfinite(values)]
+        summary[name] = np.percentile(values, PERCENTILES) if values.size else np.full(len(PERCENTILES), np.nan)
+    return summary
+
+
+def cash_flow_bands(result):
+    """(len(PERCENTILES) x n_years) percentiles of the yearly and cumulative simulated cash flows."""
+    return (np.percentile(result.cash_flows, PERCENTILES, axis=0),
+            np.percentile(np.cumsum(result.cash_flows, axis=1), PERCENTILES, axis=0))
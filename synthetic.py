@@ -0,0 +1,196 @@
+"""Generate synthetic project records shaped like Investment_Dataset.xlsx.
+
+`fit_generator` reads the observed distributions from the real dataset:
+
+- the joint frequency of (Risk_Rating, Project_Type, Market_Condition),
+- Duration_Years frequencies and the Initial_Cost distribution per Project_Type,
+- the Discount_Rate_% distribution per Risk_Rating,
+- total inflows / |Initial_Cost| per (Market_Condition, Duration_Years), tied to the
+  discount rate by a Gaussian copula with the observed rank correlation, and
+- the within-project coefficient of variation of the yearly flows per Market_Condition.
+
+Continuous values are drawn from the empirical quantile functions (linear
+interpolation between the sorted observations). NPV, IRR_%, PI and Payback_Yrs are
+computed from the generated flows with the dataset's rounding, and Decision is
+"accept" exactly when NPV > 0, as in the real data.
+
+`generate` yields chunks, so any number of rows is written with constant memory:
+
+    python synthetic.py synthetic.parquet --rows 5000000 --chunk-size 500000 --seed 0
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from dataset import DEFAULT_DATASET_PATH, classifier_frame, load_dataset
+from portfolio import calculate_portfolio_metrics
+from score_batch import ChunkWriter
+
+
+COLUMNS = ['Project', 'Initial_Cost', 'Discount_Rate_%', 'Risk_Rating', 'Project_Type', 'Market_Condition',
+           'Duration_Years', 'Uneven_Cash_Flows', 'NPV', 'IRR_%', 'PI', 'Payback_Yrs', 'Decision']
+
+
+# --- Fitting ---
+def _quantiles(values):
+    return np.sort(np.asarray(values, dtype=float))
+
+
+def _sample_quantiles(quantiles, u):
+    """Values at probabilities u of the empirical quantile function."""
+    return np.interp(u * (len(quantiles) - 1), np.arange(len(quantiles)), quantiles)
+
+
+def fit_generator(dataset):
+    """Distribution parameters (a dict of arrays and per-category tables) fitted on a Dataset."""
+    projects = classifier_frame(dataset)
+    profiles = projects.groupby(['Risk_Rating', 'Project_Type', 'Market_Condition']).size()
+    cost = projects['Initial_Cost'].abs()
+    ratio = projects['Total_Cash_Inflows'] / cost
+    rate = projects['Discount_Rate_%']
+
+    # Copula correlation from the normal scores of the ranks
+    scores = [ndtri((values.rank(method='average') - 0.5) / len(values)) for values in (rate, ratio)]
+    return {
+        'profiles': list(profiles.index),
+        'profile_probabilities': (profiles / profiles.sum()).to_numpy(),
+        'durations': {project_type: group.value_counts(normalize=True).sort_index()
+                      for project_type, group in projects.groupby('Project_Type')['Duration_Years']},
+        'cost': {project_type: _quantiles(group) for project_type, group in cost.groupby(projects['Project_Type'])},
+        'rate': {risk: _quantiles(group) for risk, group in rate.groupby(projects['Risk_Rating'])},
+        'ratio': {key: _quantiles(group)
+                  for key, group in ratio.groupby([projects['Market_Condition'], projects['Duration_Years']])},
+        'market_ratio': {market: _quantiles(group) for market, group in ratio.groupby(projects['Market_Condition'])},
+        'cv': {market: _quantiles(group) for market, group in
+               (projects['CF_Volatility'] / projects['Avg_Cash_Flow']).groupby(projects['Market_Condition'])},
+        'rate_ratio_correlation': float(np.corrcoef(*scores)[0, 1]),
+    }
+
+
+# --- Generation ---
+def format_cash_flows(cash_flows, lengths):
+    """Bracketed "[a, b, c]" strings of each row's first `lengths` integer flows."""
+    text = cash_flows.astype(np.int64).astype(str)
+    strings = np.empty(len(lengths), dtype=object)
+    for n_years in np.unique(lengths):
+        rows = np.flatnonzero(lengths == n_years)
+        columns = pd.DataFrame(text[rows, :n_years])
+        joined = columns[0].str.cat([columns[i] for i in range(1, n_years)], sep=', ') if n_years > 1 else columns[0]
+        strings[rows] = ('[' + joined + ']').to_numpy()
+    return strings
+
+
+def payback_years(initial_costs, cash_flows, lengths):
+    """Interpolated year the cumulative flows cover the cost (dataset convention), NaN if never."""
+    costs = np.abs(initial_costs)
+    cumulative = np.cumsum(cash_flows, axis=1)
+    reached = (cumulative >= costs[:, None]) & (np.arange(cash_flows.shape[1]) < lengths[:, None])
+    first = reached.argmax(axis=1)
+    rows = np.arange(len(costs))
+    at = cash_flows[rows, first]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        years = first + (costs - cumulative[rows, first] + at) / at
+    return np.where(reached.any(axis=1), years, np.nan)
+
+
+def generate_chunk(params, n_rows, rng, first_id=1):
+    """DataFrame of n_rows synthetic projects with the dataset's COLUMNS."""
+    profiles = np.array(params['profiles'], dtype=object)
+    profiles = profiles[rng.choice(len(profiles), size=n_rows, p=params['profile_probabilities'])]
+    risk, project_type, market = profiles[:, 0], profiles[:, 1], profiles[:, 2]
+
+    initial_cost = np.empty(n_rows)
+    durations = np.empty(n_rows, dtype=int)
+    for value in np.unique(project_type):
+        rows = np.flatnonzero(project_type == value)
+        initial_cost[rows] = -np.round(_sample_quantiles(params['cost'][value], rng.random(rows.size)))
+        options = params['durations'][value]
+        durations[rows] = rng.choice(options.index.to_numpy(), size=rows.size, p=options.to_numpy())
+
+    # Rate and inflow ratio share a Gaussian copula
+    correlation = params['rate_ratio_correlation']
+    z_rate = rng.standard_normal(n_rows)
+    z_ratio = correlation * z_rate + np.sqrt(1 - correlation ** 2) * rng.standard_normal(n_rows)
+    u_rate, u_ratio = ndtr(z_rate), ndtr(z_ratio)
+    discount_rate = np.empty(n_rows)
+    for value in np.unique(risk):
+        rows = np.flatnonzero(risk == value)
+        discount_rate[rows] = np.round(_sample_quantiles(params['rate'][value], u_rate[rows]), 2)
+
+    ratio = np.empty(n_rows)
+    cv = np.empty(n_rows)
+    for value in np.unique(market):
+        rows = np.flatnonzero(market == value)
+        cv[rows] = _sample_quantiles(params['cv'][value], rng.random(rows.size))
+        for duration in np.unique(durations[rows]):
+            group = rows[durations[rows] == duration]
+            quantiles = params['ratio'].get((value, duration), params['market_ratio'][value])
+            ratio[group] = _sample_quantiles(quantiles, u_ratio[group])
+
+    # Yearly flows: the row's average times (1 + cv * z), z standardized within the row
+    n_years = int(durations.max())
+    mask = np.arange(n_years) < durations[:, None]
+    z = np.where(mask, rng.standard_normal((n_rows, n_years)), 0)
+    z -= np.where(mask, z.sum(axis=1, keepdims=True) / durations[:, None], 0)
+    spread = np.sqrt(np.sum(z ** 2, axis=1, keepdims=True) / durations[:, None])
+    z = np.divide(z, spread, out=np.zeros_like(z), where=spread > 0)
+    average = ratio * np.abs(initial_cost) / durations
+    cash_flows = np.where(mask, np.round(np.maximum(average[:, None] * (1 + cv[:, None] * z), 1)), 0)
+
+    npv, irr, pi, _ = calculate_portfolio_metrics(initial_cost, discount_rate, cash_flows, durations)
+    npv = np.round(npv, 2)
+    return pd.DataFrame({
+        'Project': [f"P{i}" for i in range(first_id, first_id + n_rows)],
+        'Initial_Cost': initial_cost.astype(np.int64),
+        'Discount_Rate_%': discount_rate,
+        'Risk_Rating': risk,
+        'Project_Type': project_type,
+        'Market_Condition': market,
+        'Duration_Years': durations,
+        'Uneven_Cash_Flows': format_cash_flows(cash_flows, durations),
+        'NPV': npv,
+        'IRR_%': np.round(irr, 2),
+        'PI': np.round(pi, 3),
+        'Payback_Yrs': np.round(payback_years(initial_cost, cash_flows, durations), 2),
+        'Decision': np.where(npv > 0, 'accept', 'reject'),
+    }, columns=COLUMNS)
+
+
+def generate(params, n_rows, chunk_size=500000, seed=None):
+    """Yield DataFrames of at most chunk_size rows, n_rows in total.
+
+    Each chunk has its own random stream spawned from `seed`, so a seed and chunk
+    size always reproduce the same file.
+    """
+    streams = np.random.SeedSequence(seed).spawn(-(-n_rows // chunk_size))
+    for index, stream in enumerate(streams):
+        start = index * chunk_size
+        yield generate_chunk(params, min(chunk_size, n_rows - start), np.random.default_rng(stream), start + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic projects with the dataset's schema.")
+    parser.add_argument("output", help="CSV or Parquet file")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default=DEFAULT_DATASET_PATH, help="dataset to fit the distributions on")
+    args = parser.parse_args()
+
+    params = fit_generator(load_dataset(args.source))
+    writer = ChunkWriter(args.output)
+    start = time.perf_counter()
+    try:
+        for chunk in generate(params, args.rows, args.chunk_size, args.seed):
+            writer.write(chunk)
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - start
+    print(f"Wrote {args.rows:,} rows to {args.output} in {seconds:.1f} s ({args.rows / seconds:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
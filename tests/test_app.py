@@ -0,0 +1,30 @@
+"""Headless runs of the Streamlit app with AppTest."""
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv("HISTORY_DB", str(tmp_path / "history.sqlite3"))
+    return AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120).run()
+
+
+def widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def test_sweep_shows_durations_past_ten_years(app):
+    widget(app.sidebar.slider, "Project Duration (Years)").set_value(20)
+    widget(app.button, "Run Sweep").click()
+    app.run()
+
+    assert not app.exception
+    assert widget(app.slider, "Duration Shown (Years)").value == 20
+    assert any("accepted at 20 years" in caption.value for caption in app.caption)
+    # The sections after the sweep still render
+    assert widget(app.checkbox, "Show past analyses")
@@ -0,0 +1,75 @@
+"""parse_cash_flows and the model frames against the notebook's row-by-row parsers."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import (CASH_FLOW_COLUMN, DEFAULT_DATASET_PATH, cash_flow_stats, parse_cash_flows, parse_dataset,
+                     read_source, regressor_frame)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MALFORMED = [
+    "[1, abc, 3]",      # non-numeric item
+    "[1,,2]",           # empty item
+    "[1, 2,]",          # trailing comma
+    "[]",
+    "",
+    None,
+    "1 2",              # no commas
+    "[nan, 5]",         # parses, as float('nan') does
+    "[inf]",
+    "[ -1e3 ,2.5 ]",
+    "[41103, 40679]",
+]
+
+
+def notebook_list(cf_str):
+    """The notebook's parse_cash_flow_list, without the year tuples."""
+    try:
+        return [float(x.strip()) for x in str(cf_str).strip('[]').split(',')]
+    except:  # noqa: E722 (as in the notebook)
+        return []
+
+
+def notebook_stats(cf_str):
+    """The notebook's parse_cash_flow_stats."""
+    try:
+        cash_flows = [float(x.strip()) for x in str(cf_str).strip('[]').split(',')]
+        return [sum(cash_flows), np.mean(cash_flows), np.std(cash_flows)]
+    except:  # noqa: E722
+        return [np.nan, np.nan, np.nan]
+
+
+@pytest.fixture(scope="module")
+def dataset_strings():
+    return read_source(os.path.join(ROOT, DEFAULT_DATASET_PATH))[CASH_FLOW_COLUMN].tolist()
+
+
+@pytest.mark.parametrize("source", ["dataset", "malformed", "mixed"])
+def test_parse_matches_notebook(dataset_strings, source):
+    strings = {'dataset': dataset_strings, 'malformed': MALFORMED,
+               'mixed': dataset_strings[:200] + MALFORMED + dataset_strings[200:400]}[source]
+    cash_flows, lengths = parse_cash_flows(strings)
+    assert cash_flows.shape == (len(strings), max(len(notebook_list(s)) for s in strings))
+    for row, text in enumerate(strings):
+        expected = notebook_list(text)
+        assert lengths[row] == len(expected), text
+        np.testing.assert_array_equal(cash_flows[row, :lengths[row]], expected)
+        assert not cash_flows[row, lengths[row]:].any()
+
+    total, mean, std = cash_flow_stats(cash_flows, lengths)
+    with np.errstate(invalid='ignore'):
+        expected = np.array([notebook_stats(text) for text in strings])
+    np.testing.assert_allclose(np.column_stack([total, mean, std]), expected, rtol=1e-12, equal_nan=True)
+
+
+def test_regressor_frame_matches_notebook_explode(dataset_strings):
+    strings = dataset_strings[:300] + MALFORMED
+    raw = pd.DataFrame({'Risk_Rating': 'Low', 'Project_Type': 'Tech', 'Market_Condition': 'Stable',
+                        CASH_FLOW_COLUMN: strings})
+    frame = regressor_frame(parse_dataset(raw))
+    expected = [(value, year) for text in strings for year, value in enumerate(notebook_list(text), 1)]
+    np.testing.assert_array_equal(frame['Cash_Flow_Amount'], [value for value, _ in expected])
+    np.testing.assert_array_equal(frame['Year'], [year for _, year in expected])
@@ -0,0 +1,96 @@
+"""The compiled forests must predict exactly what the shipped sklearn pipelines predict."""
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from forest_runtime import compile_pipeline, export_pipeline, load_forest, load_model, sample_inputs
+from prediction_table import file_sha256
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+MODEL_NAMES = ["cash_flow_regressor", "decision_classifier"]
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope="module", params=MODEL_NAMES)
+def model(request, tmp_path_factory):
+    """(name, sklearn pipeline, pickle path, exported .forest directory) of one shipped model."""
+    pickle_path = os.path.join(MODELS_DIR, f"{request.param}.pkl")
+    pipeline = joblib.load(pickle_path)
+    models_dir = tmp_path_factory.mktemp(request.param)
+    forest_path = os.path.join(models_dir, f"{request.param}.forest")
+    export_pipeline(pipeline, str(forest_path), source_sha256=file_sha256(pickle_path))
+    return request.param, pipeline, pickle_path, str(forest_path)
+
+
+def random_inputs(forest, n_rows=5000):
+    return pd.DataFrame(sample_inputs(forest, n_rows, seed=1))
+
+
+def edge_inputs(forest):
+    """Rows on and around every split threshold, extreme values, and every (and an unknown) category."""
+    n_numeric = len(forest.numeric_features)
+    numeric = forest.feature < n_numeric
+    split = np.isfinite(forest.threshold) & numeric
+    columns = {}
+    for index, name in enumerate(forest.numeric_features):
+        thresholds = forest.threshold[split & (forest.feature == index)]
+        raw = thresholds * forest.scale_scale[index] + forest.scale_mean[index]
+        columns[name] = np.concatenate([raw, np.nextafter(raw, -np.inf), np.nextafter(raw, np.inf),
+                                        [0.0, -1e12, 1e12, forest.scale_mean[index]]])
+    n_rows = max(len(values) for values in columns.values())
+    rng = np.random.default_rng(2)
+    data = {name: rng.permutation(np.resize(values, n_rows)) for name, values in columns.items()}
+    for name, categories in zip(forest.categorical_features, forest.categories):
+        data[name] = np.resize(np.append(categories, "Unknown"), n_rows)
+    return pd.DataFrame(data)
+
+
+def expected(pipeline, X):
+    if hasattr(pipeline, "predict_proba"):
+        return pipeline.predict_proba(X)
+    return pipeline.predict(X)
+
+
+def compiled(forest, X):
+    return forest.predict_proba(X) if forest.is_classifier else forest.predict(X)
+
+
+@pytest.mark.parametrize("inputs", [random_inputs, edge_inputs])
+@pytest.mark.parametrize("mmap_mode", ["r", None])
+def test_loaded_forest_matches_pipeline(model, inputs, mmap_mode):
+    _, pipeline, _, forest_path = model
+    forest = load_forest(forest_path, mmap_mode)
+    X = inputs(forest)
+    assert np.max(np.abs(compiled(forest, X) - expected(pipeline, X))) <= TOLERANCE
+
+
+@pytest.mark.parametrize("inputs", [random_inputs, edge_inputs])
+def test_compiled_pipeline_matches_pipeline(model, inputs):
+    _, pipeline, _, _ = model
+    forest = compile_pipeline(pipeline)
+    X = inputs(forest)
+    assert np.max(np.abs(compiled(forest, X) - expected(pipeline, X))) <= TOLERANCE
+
+
+def test_predict_matches_pipeline(model):
+    _, pipeline, _, forest_path = model
+    forest = load_forest(forest_path)
+    X = edge_inputs(forest)
+    if forest.is_classifier:
+        assert list(forest.predict(X)) == list(pipeline.predict(X))
+    else:
+        assert np.max(np.abs(forest.predict(X) - pipeline.predict(X))) <= TOLERANCE
+
+
+def test_load_model_uses_current_export(model):
+    name, pipeline, pickle_path, forest_path = model
+    models_dir = os.path.dirname(forest_path)
+    shutil.copyfile(pickle_path, os.path.join(models_dir, f"{name}.pkl"))
+    forest = load_model(name, models_dir)
+    assert hasattr(forest, "leaf_values")
+    X = edge_inputs(forest)
+    assert np.max(np.abs(compiled(forest, X) - expected(pipeline, X))) <= TOLERANCE
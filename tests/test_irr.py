@@ -0,0 +1,61 @@
+"""solve_irr against numpy-financial's npf.irr."""
+import numpy as np
+import numpy_financial as npf
+import pytest
+
+from irr import POWERS_MAX_ELEMENTS, solve_irr
+
+BRACKET = (-0.99, 10.0)
+
+
+def conventional_flows(n_vectors, n_periods, seed=0):
+    """Signed cost then non-negative inflows, with some zero-padded (ragged) rows."""
+    rng = np.random.default_rng(seed)
+    costs = rng.uniform(1e4, 1e6, n_vectors)
+    flows = rng.uniform(0, 1, (n_vectors, n_periods)) * costs[:, None] * rng.uniform(0.05, 0.6, (n_vectors, 1))
+    durations = rng.integers(1, n_periods + 1, n_vectors)
+    flows[np.arange(n_periods) >= durations[:, None]] = 0
+    return np.column_stack([-costs, flows])
+
+
+def reference(cash_flows):
+    return np.array([npf.irr(row) for row in cash_flows])
+
+
+@pytest.mark.parametrize("n_vectors, n_periods", [(500, 10), (40, 600), (8000, 10)])
+def test_matches_npf_irr(n_vectors, n_periods):
+    cash_flows = conventional_flows(n_vectors, n_periods)
+    if n_vectors == 8000:
+        assert cash_flows.size > POWERS_MAX_ELEMENTS  # the Horner path
+    result = solve_irr(cash_flows)
+    rate, converged, no_root = (values[:500] for values in result)
+    expected = reference(cash_flows[:500])
+    # One sign change, so one root; rows whose root is below the bracket's -99% have none on it
+    inside = expected > BRACKET[0]
+    assert inside.sum() > 0.9 * inside.size
+    assert converged[inside].all() and not no_root[inside].any()
+    np.testing.assert_allclose(rate[inside], expected[inside], rtol=1e-7, atol=1e-9)
+    assert no_root[~inside].all() and np.isnan(rate[~inside]).all()
+
+
+def test_padding_does_not_change_the_rate():
+    cash_flows = conventional_flows(100, 10)
+    padded = np.column_stack([cash_flows, np.zeros((100, 40))])
+    np.testing.assert_allclose(solve_irr(padded).rate, solve_irr(cash_flows).rate, rtol=1e-9)
+
+
+def test_no_root_rows():
+    cash_flows = np.array([
+        [-100.0, 0, 0, 0],           # never any inflow
+        [100.0, 10, 10, 0],          # no outflow
+        [-100.0, -10, -10, 0],       # no inflow
+        [-1e6, 1, 1, 1],             # root near -99%, just inside the bracket
+        [-1e6, 1, 0, 0],             # root at -99.9999%, below the bracket
+        [-100.0, 60, 60, 0],         # an ordinary project
+    ])
+    result = solve_irr(cash_flows)
+    expected = reference(cash_flows)
+    assert list(result.no_root) == [True, True, True, False, True, False]
+    assert np.isnan(expected[:3]).all() and expected[4] < BRACKET[0]
+    assert np.isnan(result.rate[result.no_root]).all() and not result.converged[result.no_root].any()
+    np.testing.assert_allclose(result.rate[~result.no_root], expected[~result.no_root], rtol=1e-7)
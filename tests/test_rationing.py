@@ -0,0 +1,92 @@
+"""The rationing solvers against brute force on small instances."""
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rationing import optimize_portfolio
+
+N_PROJECTS = 14
+TYPES = ["Retail", "Tech", "Energy"]
+RISKS = ["Low", "Medium", "High"]
+
+
+def instance(seed, cost_unit=None):
+    rng = np.random.default_rng(seed)
+    costs = rng.uniform(2e4, 3e5, N_PROJECTS)
+    if cost_unit:
+        costs = np.ceil(costs / cost_unit) * cost_unit
+    return pd.DataFrame({
+        'Initial_Cost': -costs,
+        'NPV': rng.normal(4e4, 6e4, N_PROJECTS),  # some projects with NPV <= 0
+        'Accept_Probability': rng.uniform(0, 1, N_PROJECTS),
+        'Project_Type': rng.choice(TYPES, N_PROJECTS),
+        'Risk_Rating': rng.choice(RISKS, N_PROJECTS),
+    })
+
+
+def brute_force(projects, budget, min_accept=0.0, type_caps=None, type_counts=None, risk_shares=None):
+    """Best total NPV over every subset of eligible projects satisfying all the limits."""
+    npv = projects['NPV'].to_numpy()
+    costs = -projects['Initial_Cost'].to_numpy()
+    eligible = (npv > 0) & (projects['Accept_Probability'].to_numpy() >= min_accept)
+    subsets = np.array(list(itertools.product([False, True], repeat=len(projects))))
+    subsets = subsets[~(subsets & ~eligible).any(axis=1)]
+    spend = subsets @ costs
+    feasible = spend <= budget
+    for group, cap in (type_caps or {}).items():
+        feasible &= subsets @ (costs * (projects['Project_Type'] == group).to_numpy()) <= cap
+    for group, count in (type_counts or {}).items():
+        feasible &= subsets @ (projects['Project_Type'] == group).to_numpy(dtype=float) <= count
+    for group, share in (risk_shares or {}).items():
+        feasible &= subsets @ (costs * (projects['Risk_Rating'] == group).to_numpy()) <= share * spend + 1e-6
+    return (subsets[feasible] @ npv).max()
+
+
+def check_feasible(projects, result, budget, min_accept=0.0):
+    chosen = projects[result.selected]
+    assert -chosen['Initial_Cost'].sum() <= budget + 1e-6
+    assert (chosen['NPV'] > 0).all() and (chosen['Accept_Probability'] >= min_accept).all()
+    assert result.total_npv == pytest.approx(chosen['NPV'].sum())
+    assert result.bound >= result.total_npv - 1e-6
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_dp_is_optimal_when_costs_are_whole_units(seed):
+    budget, resolution = 6e5, 10000
+    projects = instance(seed, cost_unit=budget / resolution)
+    result = optimize_portfolio(projects, budget, min_accept_probability=0.3, method="dp", resolution=resolution)
+    check_feasible(projects, result, budget, 0.3)
+    assert result.total_npv == pytest.approx(brute_force(projects, budget, 0.3), rel=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_dp_stays_within_its_gap(seed):
+    budget = 6e5
+    projects = instance(seed)
+    result = optimize_portfolio(projects, budget, method="dp")
+    check_feasible(projects, result, budget)
+    best = brute_force(projects, budget)
+    assert result.total_npv <= best + 1e-6
+    assert result.bound >= best - 1e-6
+    # Costs rounded up to budget / resolution units can leave a sliver of the budget unused
+    assert result.total_npv >= best * 0.99
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_milp_is_optimal_with_group_limits(seed):
+    budget = 8e5
+    type_caps, type_counts, risk_shares = {'Tech': 3e5}, {'Retail': 2}, {'High': 0.3}
+    projects = instance(seed)
+    result = optimize_portfolio(projects, budget, min_accept_probability=0.2, group_caps={'Project_Type': type_caps},
+                                group_counts={'Project_Type': type_counts}, max_shares={'Risk_Rating': risk_shares},
+                                method="milp", gap=0.0)
+    check_feasible(projects, result, budget, 0.2)
+    chosen = projects[result.selected]
+    spend = -chosen['Initial_Cost']
+    assert spend[chosen['Project_Type'] == 'Tech'].sum() <= type_caps['Tech'] + 1e-6
+    assert (chosen['Project_Type'] == 'Retail').sum() <= type_counts['Retail']
+    assert spend[chosen['Risk_Rating'] == 'High'].sum() <= risk_shares['High'] * spend.sum() + 1e-6
+    best = brute_force(projects, budget, 0.2, type_caps, type_counts, risk_shares)
+    assert result.total_npv == pytest.approx(best, rel=1e-9)
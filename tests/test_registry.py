@@ -0,0 +1,55 @@
+"""Registry versions load only files their manifest lists and verifies."""
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+from forest_runtime import export_pipeline
+from prediction_table import file_sha256
+from registry import MODEL_NAMES, load_version, read_manifest, register
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """A flat models directory with the shipped pickles and their .forest exports."""
+    source = tmp_path / "source"
+    source.mkdir()
+    for name in MODEL_NAMES:
+        pickle_path = str(source / f"{name}.pkl")
+        shutil.copyfile(os.path.join(MODELS_DIR, f"{name}.pkl"), pickle_path)
+        export_pipeline(joblib.load(pickle_path), str(source / f"{name}.forest"),
+                        source_sha256=file_sha256(pickle_path))
+    return source
+
+
+def test_registered_exports_are_verified_and_used(source_dir, tmp_path):
+    registry_dir = str(tmp_path / "versions")
+    version_dir = register(str(source_dir), registry_dir, "v1")
+    manifest = read_manifest(version_dir)
+    for name in MODEL_NAMES:
+        assert f"{name}.forest/meta.json" in manifest['models'][name]['forest']
+    model_set = load_version(registry_dir, "v1")
+    assert hasattr(model_set.regressor_model, "leaf_values")
+    assert hasattr(model_set.classifier_model, "leaf_values")
+
+    values = np.load(os.path.join(version_dir, "decision_classifier.forest", "value.npy"))
+    np.save(os.path.join(version_dir, "decision_classifier.forest", "value.npy"), values * 0.5)
+    with pytest.raises(ValueError, match="decision_classifier.forest/value.npy"):
+        load_version(registry_dir, "v1")
+
+
+def test_unlisted_exports_are_ignored(source_dir, tmp_path):
+    registry_dir = str(tmp_path / "versions")
+    for name in MODEL_NAMES:
+        shutil.rmtree(source_dir / f"{name}.forest")
+    version_dir = register(str(source_dir), registry_dir, "v1")
+    # An export added after registration is not in the manifest, so the verified pickle is loaded
+    pickle_path = os.path.join(version_dir, "decision_classifier.pkl")
+    export_pipeline(joblib.load(pickle_path), os.path.join(version_dir, "decision_classifier.forest"),
+                    source_sha256=file_sha256(pickle_path))
+    model_set = load_version(registry_dir, "v1")
+    assert not hasattr(model_set.classifier_model, "leaf_values")
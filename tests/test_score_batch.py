@@ -0,0 +1,53 @@
+"""A synthetic.py file (dataset schema, with realized NPV and Decision) through score_batch into rationing."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import DEFAULT_DATASET_PATH, load_dataset
+from forest_runtime import load_model
+from pipeline import RESULT_COLUMNS, score_projects
+from prediction_table import load_prediction_table
+from rationing import optimize_portfolio
+from score_batch import ChunkWriter, score_file
+from synthetic import fit_generator, generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(ROOT, "models")
+
+
+@pytest.fixture(scope="module")
+def synthetic_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("synthetic") / "projects.parquet")
+    writer = ChunkWriter(path)
+    try:
+        for chunk in generate(fit_generator(load_dataset(os.path.join(ROOT, DEFAULT_DATASET_PATH))), 3000, 1000,
+                              seed=0):
+            writer.write(chunk)
+    finally:
+        writer.close()
+    return path
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_scored_columns_replace_realized_ones(synthetic_path, tmp_path, suffix):
+    projects = pd.read_parquet(synthetic_path)
+    assert {'NPV', 'Decision'} <= set(projects.columns)
+
+    output = str(tmp_path / f"scored{suffix}")
+    assert score_file(synthetic_path, output, chunk_size=1000, models_dir=MODELS_DIR) == len(projects)
+    scored = pd.read_parquet(output) if suffix == ".parquet" else pd.read_csv(output)
+    assert scored.columns.is_unique
+    assert list(scored.columns[-len(RESULT_COLUMNS):]) == RESULT_COLUMNS
+
+    expected = score_projects(projects, load_model('cash_flow_regressor', MODELS_DIR),
+                              load_model('decision_classifier', MODELS_DIR),
+                              load_prediction_table(os.path.join(MODELS_DIR, 'cash_flow_table.npz'),
+                                                    os.path.join(MODELS_DIR, 'cash_flow_regressor.pkl')))
+    np.testing.assert_allclose(scored['NPV'], expected['NPV'], rtol=1e-9)
+    assert (scored['Decision'] == expected['Decision']).all()
+
+    result = optimize_portfolio(scored, 2_000_000, min_accept_probability=0.5)
+    assert result.total_npv > 0
+    assert result.total_npv == pytest.approx(expected['NPV'][result.selected].sum())
@@ -0,0 +1,101 @@
+"""Timing spans for the app's stages, kept in an in-process ring buffer.
+
+    with tracer.span("analyze.classifier"):
+        classifier_model.predict_proba(classifier_data)
+
+Each finished span is appended to a bounded deque, so memory stays fixed and the
+oldest spans drop out. `summary` gives per-stage count and p50/p95 over the buffer,
+and `to_jsonl` exports it, one span per line. A disabled tracer hands out one shared
+no-op context manager, so instrumented code costs a method call and an attribute
+check per span.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import nullcontext
+
+import numpy as np
+
+
+Span = namedtuple("Span", ["name", "start", "seconds", "thread"])
+Span.__doc__ = "One timed stage: wall-clock start (epoch seconds), duration and the recording thread's name."
+
+_DISABLED = nullcontext()
+
+
+class _SpanTimer:
+    __slots__ = ("tracer", "name", "into", "start", "wall")
+
+    def __init__(self, tracer, name, into=None):
+        self.tracer = tracer
+        self.name = name
+        self.into = into
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        if self.into is not None:
+            self.into[self.name] = seconds
+        if self.tracer.enabled:
+            self.tracer.spans.append(Span(self.name, self.wall, seconds, threading.current_thread().name))
+        return False
+
+
+class Tracer:
+    """Ring buffer of the last `capacity` spans, shared by every session of the process.
+
+    deque.append is atomic, so spans from concurrent sessions need no lock.
+    """
+
+    def __init__(self, capacity=2048, enabled=False):
+        self.enabled = enabled
+        self.spans = deque(maxlen=capacity)
+
+    def span(self, name, into=None):
+        """Context manager timing its block as `name`; a shared no-op while disabled.
+
+        Given a dict `into`, the block is timed even while disabled and its seconds are
+        stored there under `name` (the app keeps each analysis's stage timings this way).
+        """
+        if not self.enabled and into is None:
+            return _DISABLED
+        return _SpanTimer(self, name, into)
+
+    def record(self, name, seconds):
+        """Add a span measured elsewhere, ending now; ignored while disabled."""
+        if self.enabled:
+            self.spans.append(Span(name, time.time() - seconds, seconds, threading.current_thread().name))
+
+    def clear(self):
+        self.spans.clear()
+
+    def summary(self):
+        """{name: {'count', 'p50_ms', 'p95_ms', 'last_ms'}} over the spans in the buffer."""
+        durations = {}
+        for span in list(self.spans):
+            durations.setdefault(span.name, []).append(span.seconds)
+        return {name: {'count': len(values),
+                       'p50_ms': float(np.percentile(values, 50) * 1000),
+                       'p95_ms': float(np.percentile(values, 95) * 1000),
+                       'last_ms': values[-1] * 1000}
+                for name, values in durations.items()}
+
+    def to_jsonl(self):
+        """The buffered spans as JSON lines, oldest first."""
+        return "".join(json.dumps(span._asdict()) + "\n" for span in list(self.spans))
+
+    def export_jsonl(self, path):
+        """Append the buffered spans to a JSON lines file."""
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(self.to_jsonl())
+
+
+def tracer_from_env():
+    """Tracer enabled by TIMING_SPANS=1 (default off), holding TIMING_BUFFER_SIZE spans (default 2048)."""
+    return Tracer(int(os.environ.get('TIMING_BUFFER_SIZE', 2048)), os.environ.get('TIMING_SPANS', '0') == '1')
@@ -0,0 +1,312 @@
+"""Train both models from the dataset with a cross-validated hyperparameter search.
+
+Replaces the notebook's two hand-run sections. The dataset is loaded and parsed
+once (dataset.py, cached), both models' frames are built from it, and the
+notebook's 70/30 holdout split is kept for the final evaluation, over whole projects
+so the regressor is never scored on years of a project it was trained on. On the
+training part, each cross-validation fold's ColumnTransformer is fitted once and its
+transformed arrays are reused by every trial, so a trial only fits trees. All
+trials of both models run on one process pool.
+
+Every trial reports its CV score, fit time, single-row and batch inference
+latency and pickled size. The best trial per model (lowest RMSE / highest
+accuracy, optionally under a latency budget) is refitted on the whole training
+part and written, with a JSON report, to models/versions/<version>/, which is
+registered in the model registry (registry.py). --publish makes it the version the
+app serves once it passes the canary; the shipped models/*.pkl are never overwritten.
+
+    python train.py --workers 4 --publish
+"""
+import argparse
+import itertools
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, classification_report, mean_squared_error
+from sklearn.model_selection import GroupKFold, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from dataset import DEFAULT_DATASET_PATH, classifier_frame, load_dataset, regressor_frame, select_projects
+from registry import current_version, publish, register
+
+
+CATEGORICAL_FEATURES = ['Risk_Rating', 'Project_Type', 'Market_Condition']
+MODELS = {
+    'cash_flow_regressor': {
+        'numeric_features': ['Year'],
+        'target': 'Cash_Flow_Amount',
+        'step': 'regressor',
+        'estimator': RandomForestRegressor(random_state=42),
+    },
+    'decision_classifier': {
+        'numeric_features': ['Initial_Cost', 'Discount_Rate_%', 'Duration_Years',
+                             'Total_Cash_Inflows', 'Avg_Cash_Flow', 'CF_Volatility'],
+        'target': 'Decision',
+        'step': 'classifier',
+        'estimator': RandomForestClassifier(class_weight='balanced', random_state=42),
+    },
+}
+SEARCH_SPACE = {
+    'n_estimators': [50, 100, 200, 300],
+    'max_depth': [None, 6, 10, 14],
+    'min_samples_leaf': [1, 2, 5],
+}
+
+
+def make_preprocessor(numeric_features):
+    return ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), numeric_features),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_FEATURES)
+        ],
+        remainder='drop'
+    )
+
+
+def is_classifier(name):
+    return MODELS[name]['step'] == 'classifier'
+
+
+# --- Data ---
+def split_data(dataset, test_size=0.3, seed=42):
+    """The notebook's 70/30 holdout split for both models, over whole projects.
+
+    Project rows are split once, stratified on the decision when every class has at
+    least two projects, and both models' frames are built from each side, so no year
+    of a holdout project is among the regressor's training rows. Returns
+    {name: {'X_train', 'X_test', 'y_train', 'y_test', 'groups_train', 'groups_test'}},
+    where groups_* hold the project of each row.
+    """
+    decisions = dataset.projects[MODELS['decision_classifier']['target']]
+    stratify = decisions if decisions.value_counts().min() >= 2 else None
+    train_rows, test_rows = train_test_split(np.arange(len(dataset.lengths)), test_size=test_size,
+                                             random_state=seed, stratify=stratify)
+    data = {name: {} for name in MODELS}
+    for part, rows in (('train', train_rows), ('test', test_rows)):
+        subset = select_projects(dataset, rows)
+        frames = {'cash_flow_regressor': regressor_frame(subset), 'decision_classifier': classifier_frame(subset)}
+        groups = {'cash_flow_regressor': np.repeat(rows, subset.lengths), 'decision_classifier': rows}
+        for name, spec in MODELS.items():
+            data[name][f'X_{part}'] = frames[name][spec['numeric_features'] + CATEGORICAL_FEATURES]
+            data[name][f'y_{part}'] = frames[name][spec['target']]
+            data[name][f'groups_{part}'] = groups[name]
+    return data
+
+
+def prepare_data(dataset, folds=5):
+    """Holdout split plus CV folds with per-fold transformed arrays for both models.
+
+    Each model's entry of `split_data` gains 'folds': (X_fit, y_fit, X_val, y_val)
+    tuples already transformed by a preprocessor fitted on X_fit. Regressor folds keep
+    each project's years together.
+    """
+    data = split_data(dataset)
+    for name, spec in MODELS.items():
+        X_train, y_train = data[name]['X_train'], data[name]['y_train']
+        splitter = (StratifiedKFold if is_classifier(name) else GroupKFold)(folds, shuffle=True, random_state=42)
+        groups = None if is_classifier(name) else data[name]['groups_train']
+        fold_arrays = []
+        for fit_index, val_index in splitter.split(X_train, y_train, groups):
+            preprocessor = make_preprocessor(spec['numeric_features'])
+            X_fit = preprocessor.fit_transform(X_train.iloc[fit_index])
+            X_val = preprocessor.transform(X_train.iloc[val_index])
+            fold_arrays.append((np.asarray(X_fit, dtype=np.float32), y_train.iloc[fit_index].to_numpy(),
+                                np.asarray(X_val, dtype=np.float32), y_train.iloc[val_index].to_numpy()))
+        data[name]['folds'] = fold_arrays
+    return data
+
+
+def score(name, y_true, y_pred):
+    """Accuracy for the classifier, RMSE for the regressor."""
+    if is_classifier(name):
+        return accuracy_score(y_true, y_pred)
+    return float(np.sqrt(mean_squared_error(y_true, y_pred)))
+
+
+def inference_latency(estimator, X, repeat=50):
+    """(median ms for one row, rows per second on X) of estimator.predict."""
+    row = X[:1]
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        estimator.predict(row)
+        times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    estimator.predict(X)
+    return float(np.median(times) * 1000), len(X) / (time.perf_counter() - start)
+
+
+# --- Trials (run in worker processes) ---
+_folds = None
+
+
+def _init_worker(folds):
+    global _folds
+    _folds = folds
+
+
+def _run_trial(name, params, fold):
+    """Fit one fold; the first fold also measures latency and size."""
+    X_fit, y_fit, X_val, y_val = _folds[name][fold]
+    estimator = clone(MODELS[name]['estimator']).set_params(n_jobs=1, **params)
+    start = time.perf_counter()
+    estimator.fit(X_fit, y_fit)
+    result = {'fit_s': time.perf_counter() - start, 'score': score(name, y_val, estimator.predict(X_val))}
+    if fold == 0:
+        result['latency_ms'], result['rows_per_s'] = inference_latency(estimator, X_val)
+        result['size_mb'] = len(pickle.dumps(estimator, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6
+    return result
+
+
+def search(data, space, workers=None):
+    """{name: [trial dict, ...]} with the fold results of every parameter combination aggregated."""
+    combinations = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    folds = {name: model_data['folds'] for name, model_data in data.items()}
+    tasks = [(name, params, fold) for name in data for params in combinations for fold in range(len(folds[name]))]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folds,)) as pool:
+        results = list(pool.map(_run_trial, *zip(*tasks), chunksize=4))
+
+    trials = {name: {} for name in data}
+    for (name, params, fold), result in zip(tasks, results):
+        trial = trials[name].setdefault(tuple(params.items()), {'params': params, 'scores': [], 'fit_s': []})
+        trial['scores'].append(result['score'])
+        trial['fit_s'].append(result['fit_s'])
+        if fold == 0:
+            trial.update(latency_ms=result['latency_ms'], rows_per_s=result['rows_per_s'], size_mb=result['size_mb'])
+
+    summary = {}
+    for name, by_params in trials.items():
+        summary[name] = []
+        for trial in by_params.values():
+            summary[name].append({
+                'params': trial['params'],
+                'cv_mean': float(np.mean(trial['scores'])),
+                'cv_std': float(np.std(trial['scores'])),
+                'fit_s': float(np.mean(trial['fit_s'])),
+                'latency_ms': trial['latency_ms'],
+                'rows_per_s': trial['rows_per_s'],
+                'size_mb': trial['size_mb'],
+            })
+    return summary
+
+
+def pareto_front(name, trials):
+    """Trials not beaten on score, latency and size at once by any other trial."""
+    sign = -1 if is_classifier(name) else 1  # lower is better after applying the sign
+
+    def dominates(a, b):
+        keys = [(sign * a['cv_mean'], sign * b['cv_mean']), (a['latency_ms'], b['latency_ms']),
+                (a['size_mb'], b['size_mb'])]
+        return all(x <= y for x, y in keys) and any(x < y for x, y in keys)
+
+    return [trial for trial in trials if not any(dominates(other, trial) for other in trials)]
+
+
+def select(name, trials, max_latency_ms=None):
+    """Best CV score (ties broken by latency), among trials within the latency budget if given."""
+    allowed = [t for t in trials if max_latency_ms is None or t['latency_ms'] <= max_latency_ms] or trials
+    sign = -1 if is_classifier(name) else 1
+    return min(allowed, key=lambda t: (round(sign * t['cv_mean'], 6), t['latency_ms']))
+
+
+# --- Final models ---
+def fit_final(name, model_data, params):
+    """Pipeline refitted on the whole training part, plus its holdout metrics."""
+    spec = MODELS[name]
+    estimator = clone(spec['estimator']).set_params(n_jobs=-1, **params)
+    pipeline = Pipeline(steps=[('preprocessor', make_preprocessor(spec['numeric_features'])),
+                               (spec['step'], estimator)])
+    pipeline.fit(model_data['X_train'], model_data['y_train'])
+    # Single-row predictions (the app) are slower with a thread pool
+    estimator.set_params(n_jobs=None)
+
+    y_pred = pipeline.predict(model_data['X_test'])
+    metrics = {'holdout_score': score(name, model_data['y_test'], y_pred)}
+    if is_classifier(name):
+        metrics['classification_report'] = classification_report(model_data['y_test'], y_pred, output_dict=True)
+    else:
+        metrics['holdout_target_mean'] = float(model_data['y_test'].mean())
+    return pipeline, metrics
+
+
+def print_trials(name, trials, chosen):
+    metric = 'accuracy' if is_classifier(name) else 'RMSE'
+    front = pareto_front(name, trials)
+    print(f"\n{name}: {len(trials)} trials ({metric}; * = Pareto front, > = chosen)")
+    print(f"   {'trees':>5} {'depth':>5} {'leaf':>4}  {metric:>10} {'± std':>8}  {'1-row ms':>8} {'rows/s':>9} {'MB':>7}")
+    for trial in sorted(trials, key=lambda t: -t['cv_mean'] if is_classifier(name) else t['cv_mean']):
+        params = trial['params']
+        mark = ('>' if trial is chosen else ' ') + ('*' if trial in front else ' ')
+        print(f"{mark} {params['n_estimators']:>5} {str(params['max_depth']):>5} {params['min_samples_leaf']:>4}  "
+              f"{trial['cv_mean']:>10,.4f} {trial['cv_std']:>8,.4f}  {trial['latency_ms']:>8.2f} "
+              f"{trial['rows_per_s']:>9,.0f} {trial['size_mb']:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train both models with a cross-validated hyperparameter search.")
+    parser.add_argument("--data", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=SEARCH_SPACE['n_estimators'])
+    parser.add_argument("--max-depth", type=lambda v: None if v == "none" else int(v), nargs="+",
+                        default=SEARCH_SPACE['max_depth'], help="depths to try; 'none' for unlimited")
+    parser.add_argument("--min-samples-leaf", type=int, nargs="+", default=SEARCH_SPACE['min_samples_leaf'])
+    parser.add_argument("--max-latency-ms", type=float, help="only choose trials this fast on a single row")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--version", help="version name (default: a timestamp)")
+    parser.add_argument("--publish", action="store_true", help="serve the new version from the registry")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = load_dataset(args.data)
+    data = prepare_data(dataset, args.folds)
+    print(f"Prepared {len(dataset.lengths):,} projects and {args.folds} folds in {time.perf_counter() - start:.1f} s")
+
+    space = {'n_estimators': args.n_estimators, 'max_depth': args.max_depth,
+             'min_samples_leaf': args.min_samples_leaf}
+    start = time.perf_counter()
+    trials = search(data, space, args.workers)
+    search_s = time.perf_counter() - start
+    print(f"Searched {sum(len(t) for t in trials.values())} configurations x {args.folds} folds in {search_s:.1f} s")
+
+    version = args.version or datetime.now().strftime('%Y%m%d-%H%M%S')
+    registry_dir = os.path.join(args.models_dir, 'versions')
+    version_dir = os.path.join(registry_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    report = {'version': version, 'dataset': args.data, 'dataset_sha256': dataset.source_sha256,
+              'sklearn_version': sklearn.__version__, 'search_space': space, 'folds': args.folds,
+              'search_s': search_s, 'models': {}}
+    for name, model_trials in trials.items():
+        chosen = select(name, model_trials, args.max_latency_ms)
+        print_trials(name, model_trials, chosen)
+        pipeline, metrics = fit_final(name, data[name], chosen['params'])
+        joblib.dump(pipeline, os.path.join(version_dir, f'{name}.pkl'))
+        label = 'accuracy' if is_classifier(name) else 'RMSE'
+        print(f"Chosen {chosen['params']}: holdout {label} {metrics['holdout_score']:,.4f}")
+        report['models'][name] = {'chosen': chosen, 'holdout': metrics, 'trials': model_trials,
+                                  'pareto_front': [t['params'] for t in pareto_front(name, model_trials)]}
+
+    with open(os.path.join(version_dir, 'training_report.json'), 'w') as file:
+        json.dump(report, file, indent=2, default=str)
+    register(version_dir, registry_dir, version)
+    print(f"\nWrote and registered {version_dir}")
+    if args.publish:
+        result = publish(registry_dir, version)
+        print(f"Canary {'passed' if result.passed else 'failed: ' + '; '.join(result.problems)}; "
+              f"serving version {current_version(registry_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Incremental model update: extend the served forests with trees fitted on new outcomes.
+
+Instead of retraining on the whole history, each model keeps its fitted trees and its
+fitted preprocessor; `--trees` new trees are grown with scikit-learn's warm_start on
+the newly realized projects only, so an update costs time in proportion to the new
+data. With `--window N` only the newest N trees are kept (a sliding-window ensemble:
+the oldest trees, fitted on the oldest data, drop out).
+
+The new outcomes (same columns as the dataset, see dataset.py) are split by project
+into an update part and a holdout part. Both the base and the updated models are scored on
+the holdout, and their single-row latency and batch throughput are measured. The
+updated pickles are registered as a new version (registry.py) with the figures in
+update_report.json, and `--publish` serves it once it passes the canary.
+
+    python update.py new_outcomes.xlsx --trees 20 --window 300 --publish
+"""
+import argparse
+import copy
+import json
+import os
+import pickle
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, ExtraTreesRegressor, RandomForestClassifier, RandomForestRegressor
+from sklearn.utils.class_weight import compute_class_weight
+
+from dataset import load_dataset
+from feature_encoder import encoded_pipeline
+from registry import REGISTRY_DIR, current_version, publish, register, version_path
+from train import MODELS, inference_latency, is_classifier, score, split_data
+
+
+FORESTS = (RandomForestClassifier, RandomForestRegressor, ExtraTreesClassifier, ExtraTreesRegressor)
+
+UpdateResult = namedtuple("UpdateResult", ["pipeline", "trees_before", "trees_added", "trees_dropped", "fit_s"])
+
+
+# --- Data ---
+def outcome_data(dataset, holdout=0.2, seed=42):
+    """{name: {'X_train', 'X_test', 'y_train', 'y_test'}} of the new outcomes, split into update and holdout parts.
+
+    Whole projects are split, once for both models (train.split_data), so no year of a
+    holdout project is in the regressor's update rows.
+    """
+    return split_data(dataset, holdout, seed)
+
+
+def base_models(registry_dir=REGISTRY_DIR, models_dir="models", version=None):
+    """(label, {name: fitted Pipeline}) of the given registry version, else the served one, else models_dir."""
+    version = version or current_version(registry_dir)
+    directory = version_path(registry_dir, version) if version else models_dir
+    return (version or directory), {name: joblib.load(os.path.join(directory, f'{name}.pkl')) for name in MODELS}
+
+
+# --- Update ---
+def extend_forest(pipeline, X, y, n_trees, window=None):
+    """UpdateResult with a copy of `pipeline` grown by n_trees trees fitted on (X, y).
+
+    The new rows go through the pipeline's fitted preprocessor unchanged (unknown
+    categories encode to zeros), so old and new trees see the same features. With
+    `window`, only the newest `window` trees are kept.
+    """
+    pipeline = copy.deepcopy(pipeline)
+    preprocessor, estimator = pipeline.steps[0][1], pipeline.steps[-1][1]
+    if not isinstance(estimator, FORESTS):
+        raise ValueError(f"Incremental updates need a random forest, not {type(estimator).__name__}")
+    if hasattr(estimator, 'classes_') and set(np.unique(y)) != set(estimator.classes_):
+        raise ValueError(f"New outcomes have classes {sorted(set(np.unique(y)))}, "
+                         f"the model {list(estimator.classes_)}; every class is needed to add trees")
+
+    features = np.asarray(preprocessor.transform(X), dtype=np.float32)
+    y = np.asarray(y)
+    trees_before = len(estimator.estimators_)
+    class_weight = getattr(estimator, 'class_weight', None)
+    if class_weight == 'balanced':
+        # The preset would be recomputed from the new rows anyway; explicit weights say so
+        estimator.set_params(class_weight=dict(zip(estimator.classes_, compute_class_weight(
+            'balanced', classes=estimator.classes_, y=y))))
+    start = time.perf_counter()
+    estimator.set_params(warm_start=True, n_estimators=trees_before + n_trees, n_jobs=-1)
+    estimator.fit(features, y)
+    fit_s = time.perf_counter() - start
+    # Single-row predictions (the app) are slower with a thread pool
+    estimator.set_params(warm_start=False, n_jobs=None)
+    if class_weight == 'balanced':
+        estimator.set_params(class_weight=class_weight)
+
+    dropped = 0
+    if window and len(estimator.estimators_) > window:
+        dropped = len(estimator.estimators_) - window
+        estimator.estimators_ = estimator.estimators_[dropped:]
+        estimator.set_params(n_estimators=window)
+    return UpdateResult(pipeline, trees_before, n_trees, dropped, fit_s)
+
+
+def evaluate(name, pipeline, X, y):
+    """Holdout score, single-row latency, batch throughput and pickled size of a pipeline."""
+    model = encoded_pipeline(pipeline)
+    latency_ms, rows_per_s = inference_latency(model, X)
+    return {'score': score(name, y, model.predict(X)), 'latency_ms': latency_ms, 'rows_per_s': rows_per_s,
+            'size_mb': len(pickle.dumps(pipeline)) / 1e6, 'trees': len(pipeline.steps[-1][1].estimators_)}
+
+
+def print_report(report):
+    print(f"\n{'model':<22} {'':<7} {'trees':>6} {'score':>12} {'1-row ms':>9} {'rows/s':>10} {'MB':>7}")
+    for name, entry in report['models'].items():
+        label = 'accuracy' if is_classifier(name) else 'RMSE'
+        for when in ('before', 'after'):
+            figures = entry[when]
+            print(f"{name if when == 'before' else '':<22} {when:<7} {figures['trees']:>6} "
+                  f"{figures['score']:>12,.4f} {figures['latency_ms']:>9.2f} {figures['rows_per_s']:>10,.0f} "
+                  f"{figures['size_mb']:>7.2f}")
+        if 'error' in entry:
+            print(f"{'':<22} kept unchanged: {entry['error']}")
+        else:
+            print(f"{'':<22} +{entry['trees_added']} trees, -{entry['trees_dropped']} oldest, fitted on "
+                  f"{entry['rows']:,} rows in {entry['fit_s']:.2f} s ({label} on {entry['holdout_rows']:,} holdout rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extend the served forests with trees fitted on new outcomes.")
+    parser.add_argument("outcomes", help="newly realized projects, in the dataset's format (xlsx/csv/parquet)")
+    parser.add_argument("--trees", type=int, default=20, help="trees to add per model")
+    parser.add_argument("--window", type=int, help="keep only the newest N trees per model")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of the new outcomes kept for scoring")
+    parser.add_argument("--base", help="registry version to update (default: the served one, else --models-dir)")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--registry", default=None, help="registry directory (default: MODELS_DIR/versions)")
+    parser.add_argument("--version", help="name of the new version (default: a timestamp)")
+    parser.add_argument("--publish", action="store_true", help="serve the new version once its canary passes")
+    args = parser.parse_args()
+
+    registry_dir = args.registry or os.path.join(args.models_dir, 'versions')
+    start = time.perf_counter()
+    dataset = load_dataset(args.outcomes)
+    data = outcome_data(dataset, args.holdout)
+    base_version, pipelines = base_models(registry_dir, args.models_dir, args.base)
+    print(f"Loaded {len(dataset.lengths):,} new outcomes and base {base_version} in "
+          f"{time.perf_counter() - start:.1f} s")
+
+    version = args.version or datetime.now().strftime('%Y%m%d-%H%M%S')
+    version_dir = version_path(registry_dir, version)
+    os.makedirs(version_dir)
+    report = {'version': version, 'base_version': base_version, 'outcomes': args.outcomes,
+              'outcomes_sha256': dataset.source_sha256, 'trees': args.trees, 'window': args.window,
+              'holdout': args.holdout, 'models': {}}
+    for name, pipeline in pipelines.items():
+        model_data = data[name]
+        entry = {'rows': len(model_data['X_train']), 'holdout_rows': len(model_data['X_test']),
+                 'before': evaluate(name, pipeline, model_data['X_test'], model_data['y_test'])}
+        try:
+            result = extend_forest(pipeline, model_data['X_train'], model_data['y_train'], args.trees, args.window)
+            pipeline = result.pipeline
+            entry.update(trees_added=result.trees_added, trees_dropped=result.trees_dropped, fit_s=result.fit_s)
+        except ValueError as e:
+            entry['error'] = str(e)
+        entry['after'] = evaluate(name, pipeline, model_data['X_test'], model_data['y_test'])
+        joblib.dump(pipeline, os.path.join(version_dir, f'{name}.pkl'))
+        report['models'][name] = entry
+    report['update_s'] = time.perf_counter() - start
+
+    with open(os.path.join(version_dir, 'update_report.json'), 'w') as file:
+        json.dump(report, file, indent=2)
+    register(version_dir, registry_dir, version)
+    print_report(report)
+    print(f"\nUpdated in {report['update_s']:.1f} s; wrote and registered {version_dir}")
+    if args.publish:
+        result = publish(registry_dir, version)
+        print(f"Canary {'passed' if result.passed else 'failed: ' + '; '.join(result.problems)}; "
+              f"serving version {current_version(registry_dir)}")
+        if not result.passed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()